@@ -0,0 +1,89 @@
+"""
+Benchmark the datetime64/float64 clean_data and make_plot against the per-row
+strftime and to_numeric path they replaced
+
+Run from the repository root:
+    python -m benchmarks.bench_clean_data
+"""
+
+import json
+import timeit
+import datetime
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objs as go
+
+from stockdashboard.signals.technical_signal_calculations import clean_data
+from stockdashboard.plots.plots import make_plot
+from benchmarks.synthetic import make_eod_rows
+
+ROWS = 12000
+REPEAT = 10
+
+
+def legacy_clean_data(ticker_eod):
+    """
+    The clean_data previously used by the technical indicators
+
+    Parameters:
+        ticker_eod: The end of day data for the ticker
+
+    Returns:
+        cleaned_data: The cleaned data in a pandas dataframe indexed by date string
+    """
+
+    cleaned_data = pd.DataFrame([x for x in ticker_eod], columns=["Date", "Open", "High", "Low", "Close", "Volume", "AdjClose"])
+    cleaned_data['Date'] = cleaned_data['Date'].apply(lambda d: d.strftime(r'%Y-%m-%d'))
+    cleaned_data.set_index('Date', inplace=True)
+    cleaned_data = cleaned_data.apply(pd.to_numeric, errors="ignore")
+
+    last_day_in_df = cleaned_data.tail(1).index.item()
+    if(last_day_in_df >= datetime.date.today().strftime("%Y-%m-%d")):
+        cleaned_data.drop(cleaned_data.tail(1).index, inplace=True)
+
+    return cleaned_data
+
+
+def legacy_make_plot(chart_data):
+    """
+    The make_plot previously used by the overview page
+
+    Parameters:
+        chart_data: The end of day data
+
+    Returns:
+        graphJSON: Json format of the chart
+    """
+
+    df = pd.DataFrame(chart_data, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'AdjClose'])
+    df['Date'] = df['Date'].apply(lambda d: d.strftime(r'%Y-%m-%d'))
+
+    return json.dumps([go.Scatter(x=df['Date'], y=df['Close'])], cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def main():
+    eod_data = make_eod_rows(ROWS)
+
+    legacy = legacy_clean_data(eod_data)
+    fast = clean_data(eod_data)
+    np.testing.assert_array_equal(fast.values, legacy.values.astype(float))
+    np.testing.assert_array_equal(fast.index.strftime('%Y-%m-%d'), legacy.index)
+    assert make_plot(eod_data) == legacy_make_plot(eod_data)
+
+    legacy_time = min(timeit.repeat(lambda: legacy_clean_data(eod_data), number=1, repeat=REPEAT))
+    fast_time = min(timeit.repeat(lambda: clean_data(eod_data), number=1, repeat=REPEAT))
+    legacy_plot_time = min(timeit.repeat(lambda: legacy_make_plot(eod_data), number=1, repeat=REPEAT))
+    plot_time = min(timeit.repeat(lambda: make_plot(eod_data), number=1, repeat=REPEAT))
+
+    print(f"{ROWS} rows")
+    print(f"clean_data strftime/to_numeric: {legacy_time * 1000:8.3f} ms")
+    print(f"clean_data datetime64/float64:  {fast_time * 1000:8.3f} ms")
+    print(f"speedup:                        {legacy_time / fast_time:8.1f}x")
+    print(f"make_plot strftime:             {legacy_plot_time * 1000:8.3f} ms")
+    print(f"make_plot datetime64:           {plot_time * 1000:8.3f} ms")
+    print(f"speedup:                        {legacy_plot_time / plot_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark the latest bar, last bars and date range queries of the controller against
+the relationship loads they replaced, on a database of thousands of tickers, with and
+without the (security_ticker, date) index
+
+Run from the repository root, the database is created in a temporary directory:
+    python -m benchmarks.bench_daily_price_queries
+"""
+
+import os
+import timeit
+import tempfile
+import datetime
+
+from stockdashboard import app, db
+from stockdashboard.models import Security, Daily_Price
+from stockdashboard.controller import clean_eod_data, get_latest_bar, get_last_bars, get_bars_between
+from benchmarks.synthetic import make_eod_rows
+
+TICKERS = 2000
+ROWS = 500
+SAMPLE = 50
+REPEAT = 3
+
+
+def fill_database(tickers, rows):
+    """
+    Insert the synthetic securities and their end of day bars, the tickers are
+    interleaved by date like bars appended day after day
+
+    Parameters:
+        tickers: The list of ticker symbols
+        rows: The number of bars per ticker
+    """
+
+    db.session.execute(Security.__table__.insert(), [{'name': f'{ticker} Inc.', 'ticker': ticker} for ticker in tickers])
+    histories = {ticker: make_eod_rows(rows, seed=seed, start='2018-01-02') for seed, ticker in enumerate(tickers)}
+    for idx in range(rows):
+        db.session.execute(Daily_Price.__table__.insert(), [
+            {'date': eod[0], 'open_price': eod[1], 'high_price': eod[2], 'low_price': eod[3], 'close_price': eod[4],
+             'daily_volume': eod[5], 'adjusted_close_price': eod[6], 'security_ticker': ticker}
+            for ticker, eod in ((ticker, history[idx]) for ticker, history in histories.items())])
+    db.session.commit()
+
+
+def legacy_queries(ticker, start, end):
+    """
+    The relationship loads previously used by the controller, the whole history of
+    the ticker is loaded as Daily_Price objects for every query
+
+    Returns:
+        results: The latest bar, the last 30 bars and the bars between start and end
+    """
+
+    security = Security.query.filter(Security.ticker == ticker).first()
+    latest = clean_eod_data([security.eod_data.all()[-1]])[0]
+    last_bars = clean_eod_data(security.eod_data.all()[-30:])
+    between = [bar for bar in clean_eod_data(security.eod_data.all()) if start <= bar[0] <= end]
+    return latest, last_bars, between
+
+
+def helper_queries(ticker, start, end):
+    """
+    The same results with the query helpers of the controller
+
+    Returns:
+        results: The latest bar, the last 30 bars and the bars between start and end
+    """
+
+    return get_latest_bar(ticker), get_last_bars(ticker, 30), get_bars_between(ticker, start, end)
+
+
+def _time(function, sample, start, end):
+    db.session.expire_all()
+    return min(timeit.repeat(lambda: [function(ticker, start, end) for ticker in sample], number=1, repeat=REPEAT)) / len(sample)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir, app.app_context():
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+        db.create_all()
+
+        tickers = [f'T{idx:04d}' for idx in range(TICKERS)]
+        fill_database(tickers, ROWS)
+        sample = tickers[::TICKERS // SAMPLE]
+        start, end = datetime.date(2019, 1, 1), datetime.date(2019, 3, 31)
+        for ticker in sample:
+            assert helper_queries(ticker, start, end) == legacy_queries(ticker, start, end)
+
+        legacy_time = _time(legacy_queries, sample, start, end)
+        indexed_time = _time(helper_queries, sample, start, end)
+        indexed_latest = _time(lambda ticker, *_: get_latest_bar(ticker), sample, start, end)
+
+        for index in Daily_Price.__table__.indexes:
+            index.drop(bind=db.engine)
+        unindexed_time = _time(helper_queries, sample, start, end)
+        unindexed_latest = _time(lambda ticker, *_: get_latest_bar(ticker), sample, start, end)
+        db.session.remove()
+
+        print(f"{TICKERS} tickers x {ROWS} bars, {TICKERS * ROWS} Daily_Price rows, times per ticker")
+        print("latest bar, 30 bars and a quarter:")
+        print(f"  relationship loads, no index:        {legacy_time * 1000:9.3f} ms")
+        print(f"  query helpers, no index:             {unindexed_time * 1000:9.3f} ms")
+        print(f"  query helpers, (ticker, date) index: {indexed_time * 1000:9.3f} ms  {legacy_time / indexed_time:7.1f}x")
+        print("latest bar only:")
+        print(f"  query helper, no index:              {unindexed_latest * 1000:9.3f} ms")
+        print(f"  query helper, (ticker, date) index:  {indexed_latest * 1000:9.3f} ms  {unindexed_latest / indexed_latest:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark the columnar EODColumns of the chart API against the list of tuples
+returned by get_eod_API, from the json to the indicator arrays and the DB rows
+
+Run from the repository root:
+    python -m benchmarks.bench_eod_api
+"""
+
+import json
+import timeit
+import datetime
+import numpy as np
+
+from stockdashboard.scrapers.yahoo_finance_scraper import YahooFinanceScraper
+from stockdashboard.scrapers.eod_columns import EODColumns
+from stockdashboard.signals.eod_arrays import eod_to_arrays
+from benchmarks.synthetic import make_chart_json
+
+REPEAT = 10
+
+
+def legacy_rows(json_data):
+    """
+    The list of tuples returned by the row based get_eod_API
+
+    Parameters:
+        json_data: The json data of the chart API response
+
+    Returns:
+        eod_data: The list of tuple of end of data, missing values as 0
+    """
+
+    return YahooFinanceScraper.__new__(YahooFinanceScraper)._parse_eod_API(json_data)
+
+
+def legacy_arrays(eod_data):
+    """
+    The conversion of the rows to the date and price arrays of the indicator engine
+
+    Parameters:
+        eod_data: The list of tuple of end of data
+
+    Returns:
+        dates: The numpy datetime64[D] array of the dates
+        prices: The dictionary of price column and float64 array
+    """
+
+    return eod_to_arrays([(datetime.datetime.utcfromtimestamp(int(eod[0])).date(),) + tuple(eod[1:7]) for eod in eod_data], drop_today=False)
+
+
+def legacy_db_rows(eod_data, ticker):
+    """
+    The per row conversions of the previous controller._add_daily_price_DB
+
+    Parameters:
+        eod_data: The list of tuple of end of data
+        ticker: The ticker symbol of the security
+
+    Returns:
+        rows: The list of dictionaries of Daily_Price column and value
+    """
+
+    return [dict(date=datetime.datetime.utcfromtimestamp(int(eod[0])), open_price=float(eod[1]), close_price=float(eod[4]),
+                 adjusted_close_price=float(eod[6]), low_price=float(eod[3]), high_price=float(eod[2]),
+                 daily_volume=float(eod[5]), security_ticker=ticker) for eod in eod_data]
+
+
+def _time(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+def main():
+    rows = int(np.busday_count('1975-01-02', datetime.date.today().isoformat()))
+    json_data = json.loads(json.dumps(make_chart_json(rows)))
+
+    eod_data = legacy_rows(json_data)
+    eod_columns = EODColumns.from_chart_json(json_data)
+    complete = eod_columns.complete
+    assert eod_columns.to_rows() == [tuple(float(v) if i else v for i, v in enumerate(row)) for row in eod_data]
+    dates, prices = eod_columns.to_eod_arrays()
+    np.testing.assert_array_equal(dates, legacy_arrays(eod_data)[0][complete])
+    np.testing.assert_array_equal(prices['Close'], legacy_arrays(eod_data)[1]['Close'][complete])
+    assert [row['close_price'] for row in eod_columns.to_db_rows('SYN')] == [row['close_price'] for row, keep in zip(legacy_db_rows(eod_data, 'SYN'), complete) if keep]
+
+    stages = [
+        ('parse the chart json', lambda: legacy_rows(json_data), lambda: EODColumns.from_chart_json(json_data)),
+        ('indicator engine arrays', lambda: legacy_arrays(eod_data), lambda: eod_columns.to_eod_arrays()),
+        ('Daily_Price column values', lambda: legacy_db_rows(eod_data, 'SYN'), lambda: eod_columns.to_db_rows('SYN')),
+        ('json to indicator arrays', lambda: legacy_arrays(legacy_rows(json_data)), lambda: EODColumns.from_chart_json(json_data).to_eod_arrays()),
+    ]
+
+    print(f"{rows} daily bars (1975 to today), {len(eod_columns) - int(complete.sum())} with a missing value")
+    print(f"{'':28s} {'tuples':>10s} {'columns':>10s}")
+    for name, legacy, columnar in stages:
+        legacy_time, columnar_time = _time(legacy), _time(columnar)
+        print(f"{name:28s} {legacy_time * 1000:7.3f} ms {columnar_time * 1000:7.3f} ms  {legacy_time / columnar_time:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark the one pass key statistics extractor against the two regex scans per metric of
+the QuoteSummaryStore it replaced
+
+Run from the repository root, on the synthetic page or on saved pages, i.e. html
+files or the entries of the http cache recorded with HTTP_CACHE_MODE = 'record':
+    python -m benchmarks.bench_key_statistics [page.html | http_cache/<key>.json ...]
+"""
+
+import re
+import sys
+import json
+import timeit
+from bs4 import BeautifulSoup as soup
+
+from stockdashboard.scrapers.key_statistics import METERICS, parse_key_statistics_page
+from benchmarks.synthetic import make_key_statistics_page
+
+REPEAT = 10
+
+
+def legacy_stats(text):
+    """
+    The extraction previously used by get_company_stats, the page was parsed with
+    BeautifulSoup and the store was searched with two regexes per metric
+
+    Parameters:
+        text: The html of the key statistics page
+
+    Returns:
+        stats_output: The dictionary of company stat and value
+    """
+
+    data = str(soup(text, 'lxml').body.find_all('script'))
+    values = data.split(r'"QuoteSummaryStore"')
+
+    stats_output = dict()
+    for key, val in METERICS.items():
+        pattern = '"%s":{(.*?)}' % (val,)
+        found_data = re.findall(pattern, values[1])
+
+        if found_data:
+            pattern2 = r'"fmt":(.*)'
+            found_stats = re.findall(pattern2, found_data[0])
+        else:
+            found_stats = found_data
+
+        if found_stats:
+            final_stats_data = found_stats[0].split(',', 1)[0]
+            final_stats_data = final_stats_data.strip('""')
+            stats_output[key] = final_stats_data
+        else:
+            stats_output[key] = 'NAN'
+    return stats_output
+
+
+def assert_same(stats, legacy):
+    """
+    Check the extractors agree, the regexes cut a value at its first comma and
+    returned a null value as 'null', the decoded store keeps the whole value and
+    returns 'NAN' like a missing one
+
+    Parameters:
+        stats: The stats of parse_key_statistics_page
+        legacy: The stats of legacy_stats
+    """
+
+    assert stats.keys() == legacy.keys()
+    for key, value in stats.items():
+        expected = 'NAN' if legacy[key] == 'null' else legacy[key]
+        assert value.split(',', 1)[0] == expected or (value == 'NAN' and expected == ''), (key, value, legacy[key])
+
+
+def load_page(path):
+    """
+    Read a saved page, an html file or an entry of the http cache
+
+    Parameters:
+        path: The path of the page
+
+    Returns:
+        text: The html of the page
+    """
+
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    return json.loads(text)['text'] if path.endswith('.json') else text
+
+
+def main(paths):
+    pages = [(path, load_page(path)) for path in paths] or [('synthetic', make_key_statistics_page())]
+
+    for name, text in pages:
+        stats = parse_key_statistics_page(text)
+        assert_same(stats, legacy_stats(text))
+
+        legacy_time = min(timeit.repeat(lambda: legacy_stats(text), number=1, repeat=REPEAT))
+        fast_time = min(timeit.repeat(lambda: parse_key_statistics_page(text), number=1, repeat=REPEAT))
+
+        print(f"{name}: {len(text) / 1024:.0f} KB page, {sum(v != 'NAN' for v in stats.values())}/{len(stats)} stats reported")
+        print(f"BeautifulSoup and regex scans:     {legacy_time * 1000:8.3f} ms")
+        print(f"store decoded once, one pass:      {fast_time * 1000:8.3f} ms")
+        print(f"speedup:                           {legacy_time / fast_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,91 @@
+"""
+Benchmark the news ingestion, the per header lookups it replaced against the hashed batch
+check of controller._add_news_DB, as the news table grows. Half of the scraped headlines
+are already stored
+
+Run from the repository root, the database is created in a temporary directory:
+    python -m benchmarks.bench_news_dedup
+"""
+
+import os
+import time
+import tempfile
+
+from stockdashboard import app, db
+from stockdashboard.models import News
+from stockdashboard.controller import _add_news_DB
+from stockdashboard.utils import normalize_news_header, normalize_news_link, news_hash
+
+TABLE_SIZES = (10000, 100000, 1000000)
+BATCH = 200
+
+
+def make_news(start, count):
+    """
+    Synthetic market news rows
+
+    Parameters:
+        start: The index of the first article
+        count: The number of articles
+
+    Returns:
+        rows: The list of header, link, source, security_ticker and hash dictionaries
+    """
+
+    rows = list()
+    for idx in range(start, start + count):
+        header = f'Company {idx % 5000} shares move after quarterly report number {idx}'
+        link = f'https://www.example.com/markets/{idx % 97}/article-{idx}?utm_source=feed'
+        rows.append({'header': header, 'link': link, 'source': 'google', 'security_ticker': None,
+                     'header_hash': news_hash(normalize_news_header(header)), 'link_hash': news_hash(normalize_news_link(link))})
+    return rows
+
+
+def legacy_add_news(news_data):
+    """
+    The ingestion previously used by the controller, one unindexed header lookup and one
+    ORM object per scraped article
+    """
+
+    for header, link, source in news_data:
+        if not News.query.filter(News.header == header).first():
+            db.session.add(News(header=header, link=link, source=source))
+    db.session.flush()
+
+
+def _ingest(function, news_data, stored):
+    start = time.perf_counter()
+    function(news_data)
+    elapsed = time.perf_counter() - start
+    added = {header for header, in db.session.query(News.header).filter(News.id > stored)}
+    db.session.rollback()
+    return added, elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir, app.app_context():
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+        db.create_all()
+
+        print(f"{BATCH} scraped headlines, {BATCH // 2} already stored")
+        print(f"{'news rows':>10s} {'header lookups ms':>18s} {'hashed batch ms':>16s} {'speedup':>8s}")
+        stored = 0
+        for size in TABLE_SIZES:
+            rows = make_news(stored, size - stored)
+            for idx in range(0, len(rows), 50000):
+                db.session.execute(News.__table__.insert(), rows[idx:idx + 50000])
+            db.session.commit()
+            stored = size
+
+            scraped = make_news(stored - BATCH // 2, BATCH)
+            news_data = [(row['header'], row['link'], row['source']) for row in scraped]
+            legacy_added, legacy_time = _ingest(legacy_add_news, news_data, stored)
+            hashed_added, hashed_time = _ingest(_add_news_DB, news_data, stored)
+            assert legacy_added == hashed_added and len(hashed_added) == BATCH // 2
+            print(f"{size:10d} {legacy_time * 1000:18.1f} {hashed_time * 1000:16.2f} {legacy_time / hashed_time:7.0f}x")
+
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark the market news page, the read of every stored news it replaced against one
+keyset page per source, as the news table grows, then prune the news past the retention
+
+Run from the repository root, the database is created in a temporary directory:
+    python -m benchmarks.bench_news_pages
+"""
+
+import os
+import time
+import datetime
+import tempfile
+import tracemalloc
+
+from stockdashboard import app, db
+from stockdashboard.models import News
+from stockdashboard.controller import clean_news, get_news_page, prune_news
+from benchmarks.bench_news_dedup import make_news
+
+TABLE_SIZES = (10000, 100000, 300000)
+SOURCES = ('financial_post', 'google', 'marketwatch', 'business_insider')
+DAYS = 720
+
+
+def legacy_news_page():
+    """
+    The read previously used by get_all_news, every news as an ORM object, reversed and
+    bucketed by source in python
+    """
+
+    result_dict = {source: list() for source in SOURCES}
+    for news in clean_news(News.query.all())[::-1]:
+        result_dict[news[2]].append(news)
+    return result_dict
+
+
+def keyset_news_page():
+    return {source: get_news_page(source=source)[0] for source in SOURCES}
+
+
+def _measure(function):
+    db.session.expire_all()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.remove()
+    return result, elapsed, peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir, app.app_context():
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+        db.create_all()
+        page_size = app.config['NEWS_PAGE_SIZE']
+        first_day = datetime.datetime.utcnow() - datetime.timedelta(days=DAYS)
+
+        print(f"{page_size} news per source page, the news span {DAYS} days")
+        print(f"{'news rows':>10s} {'read all ms':>12s} {'peak MB':>8s} {'keyset ms':>10s} {'peak MB':>8s}")
+        stored = 0
+        for size in TABLE_SIZES:
+            rows = make_news(stored, size - stored)
+            for idx, row in enumerate(rows, stored):
+                row['source'] = SOURCES[idx % len(SOURCES)]
+                row['date_retrieved'] = first_day + datetime.timedelta(days=DAYS * idx / TABLE_SIZES[-1])
+            for idx in range(0, len(rows), 50000):
+                db.session.execute(News.__table__.insert(), rows[idx:idx + 50000])
+            db.session.commit()
+            stored = size
+
+            legacy, legacy_time, legacy_peak = _measure(legacy_news_page)
+            keyset, keyset_time, keyset_peak = _measure(keyset_news_page)
+            assert all(keyset[source] == legacy[source][:page_size] for source in SOURCES)
+            print(f"{size:10d} {legacy_time * 1000:12.1f} {legacy_peak / 2 ** 20:8.1f} {keyset_time * 1000:10.2f} {keyset_peak / 2 ** 20:8.2f}")
+
+        # walking the pages of a source gives the same news as the full read
+        pages, before_id = list(), None
+        while True:
+            news, before_id = get_news_page(source='google', before_id=before_id, limit=5000)
+            pages.extend(news)
+            if before_id is None:
+                break
+        assert pages == legacy['google']
+
+        start = time.perf_counter()
+        pruned = prune_news(archive_dir=os.path.join(tmp_dir, 'news_archive'))
+        elapsed = time.perf_counter() - start
+        retention = app.config['NEWS_RETENTION_DAYS']
+        assert News.query.count() == stored - pruned and not News.query.filter(
+            News.date_retrieved < datetime.datetime.utcnow() - datetime.timedelta(days=retention)).count()
+        print(f"pruned and archived {pruned} news older than {retention} days in {elapsed:.1f} s, {stored - pruned} kept")
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark the lxml.html extraction of the news and quote pages against the
+BeautifulSoup path it replaced, every page is parsed once per response
+
+Run from the repository root:
+    python -m benchmarks.bench_parsing
+"""
+
+import timeit
+from bs4 import BeautifulSoup as soup
+
+from stockdashboard.scrapers.connection import ScrapedResponse
+from stockdashboard.scrapers.financial_news import FinancialNewsData
+from benchmarks.synthetic import make_html_page
+
+ITEMS = 200
+REPEAT = 10
+
+
+def legacy_extract(text, term='SYN'):
+    """
+    The BeautifulSoup extraction previously used by the scrapers, the page was
+    parsed again for every get_body and get_element call
+
+    Parameters:
+        text: The html page
+        term: The term of the Google News search
+
+    Returns:
+        results: The Marketwatch, Business Insider, Financial Post and Google News
+                 dictionaries, the quote page title and the current price
+    """
+
+    body = soup(text, 'lxml').body
+    marketwatch = dict()
+    for link, title in zip([x.get('href') for x in body.find_all('a', {'class':'link'})], [x.text for x in body.find_all('a', {'class':'link'})]):
+        if link and link.startswith(r'https://www.marketwatch.com/story/'):
+            marketwatch[' '.join(title.strip().split()).replace('â\x80\x99', "'")] = link
+
+    body = soup(text, 'lxml').body
+    business_insider, already_seen = dict(), list()
+    for link, headline in zip([x.get('href') for x in body.find_all('a', {'class':'teaser-headline'})], [x.text for x in body.find_all('a', {'class':'teaser-headline'})]):
+        if headline not in already_seen:
+            business_insider[headline.replace('â\x80\x99', "'")] = 'http://markets.businessinsider.com{}'.format(link)
+            already_seen.append(headline)
+
+    body = soup(text, 'lxml').body
+    financial_post = dict()
+    for heading in ('h4', 'h2'):
+        for links in [x.find_all('a') for x in body.find_all(heading, {'class':'entry-title'})]:
+            for href in links:
+                financial_post[href.text] = href.get('href')
+
+    title = [x.text for x in soup(text, 'lxml').find_all('h1')]
+
+    google, seen_urls = dict(), list()
+    for data in soup(text, 'lxml').find_all('div', {'class': 'kCrYT'}):
+        data_text = data.find('div', {'class': 'BNeawe vvjwJb AP7Wnd'})
+        header_text = data_text.text if data_text else term + " News"
+        news_link = data.find('a')['href'].lstrip('/url?q=').split('&')
+        if news_link[0] not in seen_urls:
+            seen_urls.append(news_link[0])
+            google[header_text.replace('â\x80\x99', "'")] = news_link[0]
+
+    body = soup(text, 'lxml').body
+    prices = [x.find_all('span',{'data-reactid':'14'}) for x in body.find_all('div',{'data-reactid':'13'})]
+    current_price = prices[0][0].text
+    prices = [x.find_all('span',{'data-reactid':'14'}) for x in body.find_all('div',{'data-reactid':'13'})]
+    current_price = prices[0][0].text
+    percentages = [x.find_all('span',{'data-reactid':'16'}) for x in body.find_all('div',{'data-reactid':'13'})]
+
+    return marketwatch, business_insider, financial_post, google, title, (current_price, percentages[0][0].text)
+
+
+def extract(text, term='SYN'):
+    """
+    The same extraction through the parse helpers of the scrapers on one ScrapedResponse
+
+    Parameters:
+        text: The html page
+        term: The term of the Google News search
+
+    Returns:
+        results: The same results as legacy_extract
+    """
+
+    response = ScrapedResponse('https://example.com', 200, text)
+    news = FinancialNewsData.__new__(FinancialNewsData)
+
+    google, seen_urls = dict(), list()
+    news._parse_google_news(term, response, seen_urls, google)
+    quote = response.select("//body//div[@data-reactid='13']")
+
+    return (news._parse_marketwatch_news(response), news._parse_business_insider_news(response),
+            news._parse_financial_post_news(response), google, news._google_news_searches(term, response)[1:],
+            (quote[0].xpath(".//span[@data-reactid='14']")[0].text_content(), quote[0].xpath(".//span[@data-reactid='16']")[0].text_content()))
+
+
+def main():
+    text = make_html_page(ITEMS)
+    assert extract(text) == legacy_extract(text)
+
+    legacy_time = min(timeit.repeat(lambda: legacy_extract(text), number=1, repeat=REPEAT))
+    fast_time = min(timeit.repeat(lambda: extract(text), number=1, repeat=REPEAT))
+    soup_time = min(timeit.repeat(lambda: soup(text, 'lxml'), number=1, repeat=REPEAT))
+    tree_time = min(timeit.repeat(lambda: ScrapedResponse('', 200, text).get_tree(), number=1, repeat=REPEAT))
+
+    print(f"{len(text) / 1024:.0f} KB page, {ITEMS} articles per source")
+    print(f"one BeautifulSoup parse:             {soup_time * 1000:8.3f} ms")
+    print(f"one lxml.html parse:                 {tree_time * 1000:8.3f} ms")
+    print(f"extraction, BeautifulSoup per call:  {legacy_time * 1000:8.3f} ms")
+    print(f"extraction, lxml.html parsed once:   {fast_time * 1000:8.3f} ms")
+    print(f"speedup:                             {legacy_time / fast_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark suite for the signals package on synthetic end of day histories
+
+Times every indicator calculation and the full get_techical_indicators over a
+universe of synthetic tickers, and records the peak memory of each. The results
+can be saved as a json baseline and later compared against it, the comparison
+fails when a calculation is slower than the baseline by more than the threshold.
+
+Run from the repository root:
+    python -m benchmarks.bench_signals --bars 12000 --tickers 5 --save baseline.json
+    python -m benchmarks.bench_signals --bars 12000 --tickers 5 --compare baseline.json --threshold 0.25
+"""
+
+import sys
+import json
+import timeit
+import argparse
+import platform
+import tracemalloc
+
+from stockdashboard.signals.technical_signal_calculations import (clean_data, atr_calculation, rsi_calculation,
+                                                                  bollinger_bands_calculation, macd_calculation,
+                                                                  correlation_coefficient_calculation, get_techical_indicators)
+from benchmarks.synthetic import make_universe
+
+
+def _benchmarks(ticker_eod_data, sp500_data):
+    """
+    Get the calculations to benchmark, each one runs over every ticker
+
+    Parameters:
+        ticker_eod_data: The dictionary of ticker symbol and end of day data
+        sp500_data: The end of day data for the S&P 500
+
+    Returns:
+        benchmarks: The dictionary of benchmark name and function
+    """
+
+    eod_dfs = [clean_data(eod_data) for eod_data in ticker_eod_data.values()]
+
+    return {
+        'atr_calculation': lambda: [atr_calculation(df) for df in eod_dfs],
+        'rsi_calculation': lambda: [rsi_calculation(df) for df in eod_dfs],
+        'bollinger_bands_calculation': lambda: [bollinger_bands_calculation(df) for df in eod_dfs],
+        'macd_calculation': lambda: [macd_calculation(df) for df in eod_dfs],
+        'correlation_coefficient_calculation': lambda: [correlation_coefficient_calculation(df, sp500_data) for df in eod_dfs],
+        'get_techical_indicators': lambda: [get_techical_indicators(eod_data, sp500_data) for eod_data in ticker_eod_data.values()],
+    }
+
+
+def _peak_memory(func):
+    """
+    Measure the peak memory allocated while the function runs
+
+    Parameters:
+        func: The function to run
+
+    Returns:
+        peak: The peak number of bytes allocated by python and numpy
+    """
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def run(bars, tickers, repeat, seed):
+    """
+    Run every benchmark on a synthetic universe
+
+    Parameters:
+        bars: The number of bars of every synthetic history
+        tickers: The number of synthetic tickers
+        repeat: The number of timed runs, the fastest is kept
+        seed: The random seed of the synthetic histories
+
+    Returns:
+        report: The json serializable dictionary of the configuration and results
+    """
+
+    ticker_eod_data, sp500_data = make_universe(tickers, bars, seed=seed)
+
+    results = dict()
+    for name, func in _benchmarks(ticker_eod_data, sp500_data).items():
+        func() # warm up, i.e. the shared S&P 500 cleaning
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        results[name] = {'seconds': seconds, 'peak_bytes': _peak_memory(func)}
+
+    return {
+        'config': {'bars': bars, 'tickers': tickers, 'repeat': repeat, 'seed': seed},
+        'platform': {'python': platform.python_version(), 'machine': platform.machine(), 'processor': platform.processor()},
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare the results to a baseline
+
+    Parameters:
+        report: The report of the current run
+        baseline: The report of the baseline run
+        threshold: The allowed slowdown ratio, i.e. 0.25 for 25% slower
+
+    Returns:
+        regressions: The list of the names of the calculations slower than the threshold
+    """
+
+    if report['config'] != baseline['config']:
+        print(f"WARNING: the baseline configuration {baseline['config']} differs from {report['config']}")
+
+    regressions = list()
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            print(f"{name:40s} not in the baseline")
+            continue
+
+        ratio = result['seconds'] / baseline['results'][name]['seconds']
+        status = 'REGRESSION' if ratio > 1 + threshold else 'ok'
+        print(f"{name:40s} {baseline['results'][name]['seconds'] * 1000:10.2f} ms -> {result['seconds'] * 1000:10.2f} ms  {ratio:6.2f}x  {status}")
+
+        if status == 'REGRESSION':
+            regressions.append(name)
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the signals package on synthetic histories')
+    parser.add_argument('--bars', type=int, default=12000, help='bars of every synthetic history')
+    parser.add_argument('--tickers', type=int, default=5, help='number of synthetic tickers')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs, the fastest is kept')
+    parser.add_argument('--seed', type=int, default=1975, help='random seed of the histories')
+    parser.add_argument('--save', metavar='PATH', help='save the results as a json baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare the results to a json baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown against the baseline (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    report = run(args.bars, args.tickers, args.repeat, args.seed)
+
+    print(f"{args.tickers} tickers x {args.bars} bars")
+    for name, result in report['results'].items():
+        print(f"{name:40s} {result['seconds'] * 1000:10.2f} ms  peak {result['peak_bytes'] / 1024 / 1024:8.2f} MB")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"FAILED: {', '.join(regressions)} slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Show that concurrent callers asking for the same page, or the same ticker, make one
+upstream fetch: CALLERS threads, then CALLERS coroutines, request one slow url of a
+local server at the same moment, with and without the request coalescing
+
+Run from the repository root:
+    python -m benchmarks.bench_single_flight
+"""
+
+import time
+import asyncio
+import threading
+import concurrent.futures
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from stockdashboard.scrapers.connection import EstablishConnectionByRequest
+from stockdashboard.scrapers.async_connection import EstablishConnectionByAiohttp
+from stockdashboard.scrapers.single_flight import SingleFlight
+
+CALLERS = 32
+LATENCY = 0.2
+
+
+class SlowUpstream(BaseHTTPRequestHandler):
+    """
+    A server answering every request after LATENCY seconds and counting the requests per path
+    """
+
+    hits = dict()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        time.sleep(LATENCY)
+        body = f'{{"path": "{self.path}"}}'.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_threads(function):
+    """
+    Call the function from CALLERS threads released at the same moment
+
+    Parameters:
+        function: The function without arguments
+
+    Returns:
+        results: The list of results
+        elapsed: The seconds until the last caller returned
+    """
+
+    barrier = threading.Barrier(CALLERS)
+
+    def call():
+        barrier.wait()
+        return function()
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(CALLERS) as executor:
+        results = list(executor.map(lambda _: call(), range(CALLERS)))
+    return results, time.perf_counter() - start
+
+
+async def run_coroutines(coroutine_function):
+    start = time.perf_counter()
+    results = await asyncio.gather(*[coroutine_function() for _ in range(CALLERS)])
+    return results, time.perf_counter() - start
+
+
+def report(name, path, results, elapsed):
+    hits = SlowUpstream.hits.get(path, 0)
+    print(f"{name:44s} {sum(bool(r) for r in results):3d} responses {hits:3d} upstream fetches {elapsed * 1000:8.1f} ms")
+    return hits
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowUpstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    print(f"{CALLERS} concurrent callers, {LATENCY * 1000:.0f} ms upstream latency")
+
+    connection = EstablishConnectionByRequest(pool_size=CALLERS)
+    results, elapsed = run_threads(lambda: connection._request('GET', base + '/threads/legacy'))
+    assert report('threads, every caller sends the request', '/threads/legacy', results, elapsed) == CALLERS
+    results, elapsed = run_threads(lambda: connection.connect(base + '/threads/quote'))
+    assert report('threads, coalesced connect', '/threads/quote', results, elapsed) == 1
+    assert len({id(r) for r in results}) == CALLERS and all(r.get_json_data() == {'path': '/threads/quote'} for r in results)
+
+    async def coroutines():
+        aio_connection = EstablishConnectionByAiohttp(limit_per_host=CALLERS)
+        results, elapsed = await run_coroutines(lambda: aio_connection._request('GET', base + '/async/legacy'))
+        assert report('coroutines, every caller sends the request', '/async/legacy', results, elapsed) == CALLERS
+        results, elapsed = await run_coroutines(lambda: aio_connection.connect(base + '/async/quote'))
+        assert report('coroutines, coalesced connect', '/async/quote', results, elapsed) == 1
+        await aio_connection.close()
+    asyncio.run(coroutines())
+
+    # controller.get_all_data runs the load of a ticker through a SingleFlight keyed by the ticker
+    loads = list()
+    ticker_flights = SingleFlight()
+    def load_ticker(ticker):
+        loads.append(ticker)
+        return connection._request('GET', f'{base}/ticker/{ticker}')
+    results, elapsed = run_threads(lambda: ticker_flights.do('TSLA', lambda: load_ticker('TSLA')))
+    assert report('threads, get_all_data of one ticker', '/ticker/TSLA', results, elapsed) == 1 and loads == ['TSLA']
+
+    connection.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
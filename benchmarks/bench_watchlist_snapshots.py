@@ -0,0 +1,99 @@
+"""
+Benchmark the watchlist read from the Security_Snapshot table against the per ticker
+loop it replaced, counting the sql statements of each, for growing watchlists
+
+Run from the repository root, the database is created in a temporary directory:
+    python -m benchmarks.bench_watchlist_snapshots
+"""
+
+import os
+import timeit
+import tempfile
+
+from sqlalchemy import event
+
+from stockdashboard import app, db
+from stockdashboard.models import User, Security, Company_Information
+from stockdashboard.controller import get_user_watchlist, refresh_all_snapshots
+from benchmarks.bench_daily_price_queries import fill_database
+
+TICKERS = 500
+ROWS = 500
+WATCHLIST_SIZES = (5, 50, 500)
+REPEAT = 3
+
+
+def legacy_watchlist(user_email):
+    """
+    The watchlist loop previously used by the controller, the company information and the
+    whole price history of every ticker are loaded, twice
+    """
+
+    user = User.query.filter_by(email=user_email).first()
+    output_ticker_data = list()
+    for ticker in user.watchlist_tickers.all():
+        sector = ticker.company_information[0].sector
+        industry = ticker.company_information[0].industry
+        previous_close = ticker.eod_data.all()[-1].close_price
+        previous_volume = ticker.eod_data.all()[-1].daily_volume
+        output_ticker_data.append([ticker.ticker, ticker.name, sector, industry, previous_close, previous_volume])
+    return output_ticker_data
+
+
+class StatementCounter():
+    """
+    Count the sql statements sent by the engine
+    """
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+    def measure(self, function):
+        self.count = 0
+        function()
+        return self.count
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir, app.app_context():
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+        db.create_all()
+
+        tickers = [f'T{idx:04d}' for idx in range(TICKERS)]
+        fill_database(tickers, ROWS)
+        db.session.execute(Company_Information.__table__.insert(), [
+            {'sector': f'Sector {idx % 11}', 'industry': f'Industry {idx % 60}', 'security_ticker': ticker}
+            for idx, ticker in enumerate(tickers)])
+        securities = {security.ticker: security for security in Security.query.all()}
+        for size in WATCHLIST_SIZES:
+            user = User(first_name='Bench', last_name=str(size), email=f'bench{size}@example.com',
+                        username=f'bench{size}', password=f'password{size}')
+            user.watchlist_tickers.extend(securities[ticker] for ticker in tickers[:size])
+            db.session.add(user)
+        db.session.commit()
+
+        counter = StatementCounter(db.engine)
+        refresh_time = min(timeit.repeat(refresh_all_snapshots, number=1, repeat=1))
+        print(f"{TICKERS} tickers x {ROWS} bars, refresh_all_snapshots {refresh_time * 1000:.1f} ms")
+        print(f"{'watchlist':>10s} {'loop ms':>10s} {'statements':>11s} {'snapshot ms':>12s} {'statements':>11s}")
+
+        for size in WATCHLIST_SIZES:
+            email = f'bench{size}@example.com'
+            assert sorted(get_user_watchlist(email)) == sorted(legacy_watchlist(email))
+
+            db.session.expire_all()
+            legacy_statements = counter.measure(lambda: legacy_watchlist(email))
+            snapshot_statements = counter.measure(lambda: get_user_watchlist(email))
+            legacy_time = min(timeit.repeat(lambda: legacy_watchlist(email), number=1, repeat=REPEAT))
+            snapshot_time = min(timeit.repeat(lambda: get_user_watchlist(email), number=1, repeat=REPEAT))
+            print(f"{size:10d} {legacy_time * 1000:10.1f} {legacy_statements:11d} {snapshot_time * 1000:12.2f} {snapshot_statements:11d}")
+
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
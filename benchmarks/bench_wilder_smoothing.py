@@ -0,0 +1,64 @@
+"""
+Benchmark the vectorized Wilder smoothing against the python loop it replaced
+
+Run from the repository root:
+    python -m benchmarks.bench_wilder_smoothing
+"""
+
+import timeit
+import numpy as np
+import pandas as pd
+
+from stockdashboard.signals.technical_signal_calculations import wilder_smoothing
+
+YEARS = 50
+TRADING_DAYS_PER_YEAR = 252
+REPEAT = 20
+
+
+def legacy_wilder_smoothing(values, period=14):
+    """
+    The python loop previously used by atr_calculation and rsi_calculation
+
+    Parameters:
+        values: The array of values to smooth
+        period: The smoothing period
+
+    Returns:
+        smoothed: The list of smoothed values
+    """
+
+    average = pd.Series(values).rolling(period).mean().values
+    smoothed = [0] * len(average)
+
+    for x in range(len(average)):
+        if x < period:
+            smoothed[x] = average[x]
+        else:
+            smoothed[x] = ((average[x-1] * (period - 1)) + values[x]) / period
+            average[x] = smoothed[x]
+
+    return smoothed
+
+
+def main():
+    rng = np.random.default_rng(1975)
+    true_range = np.abs(rng.normal(0.5, 0.25, YEARS * TRADING_DAYS_PER_YEAR)).round(4)
+
+    legacy = np.asarray(legacy_wilder_smoothing(true_range), dtype=float)
+    vectorized = wilder_smoothing(true_range)
+
+    np.testing.assert_allclose(vectorized, legacy, rtol=1e-12, equal_nan=True)
+    np.testing.assert_array_equal(np.round(vectorized, 2), np.round(legacy, 2))
+
+    legacy_time = min(timeit.repeat(lambda: legacy_wilder_smoothing(true_range), number=1, repeat=REPEAT))
+    vectorized_time = min(timeit.repeat(lambda: wilder_smoothing(true_range), number=1, repeat=REPEAT))
+
+    print(f"{len(true_range)} bars ({YEARS} years)")
+    print(f"python loop:  {legacy_time * 1000:8.3f} ms")
+    print(f"vectorized:   {vectorized_time * 1000:8.3f} ms")
+    print(f"speedup:      {legacy_time / vectorized_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Synthetic end of day histories and scraped pages for the benchmarks
+"""
+
+import json
+import datetime
+import numpy as np
+import pandas as pd
+
+from stockdashboard.scrapers.key_statistics import METERICS
+
+
+def make_eod_rows(rows, seed=1975, start='1975-01-02', price=20.0):
+    """
+    Make a synthetic end of day history shaped like the rows stored in the DB,
+    a geometric random walk on business days
+
+    Parameters:
+        rows: The number of trading days
+        seed: The random seed
+        start: The date of the first bar
+        price: The first close
+
+    Returns:
+        eod_data: The list of [date, open, high, low, close, volume, adjusted close] rows
+    """
+
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=rows).date
+    close = price * np.exp(np.cumsum(rng.normal(0.0003, 0.02, rows)))
+    open_price = close * (1 + rng.normal(0, 0.005, rows))
+    high = np.maximum(close, open_price) * (1 + np.abs(rng.normal(0, 0.01, rows)))
+    low = np.minimum(close, open_price) * (1 - np.abs(rng.normal(0, 0.01, rows)))
+    volume = rng.integers(100000, 10000000, rows)
+
+    return [[dates[i], round(open_price[i], 4), round(high[i], 4), round(low[i], 4), round(close[i], 4), int(volume[i]), round(close[i], 4)]
+            for i in range(rows)]
+
+
+def make_universe(tickers, rows, seed=1975):
+    """
+    Make the synthetic histories of many tickers and of the S&P 500
+
+    Parameters:
+        tickers: The number of tickers
+        rows: The number of trading days of every history
+        seed: The random seed
+
+    Returns:
+        ticker_eod_data: The dictionary of ticker symbol and end of day data
+        sp500_data: The end of day data for the S&P 500
+    """
+
+    ticker_eod_data = {f'SYN{idx}': make_eod_rows(rows, seed=seed + idx + 1) for idx in range(tickers)}
+    sp500_data = make_eod_rows(rows, seed=seed, price=100.0)
+
+    return ticker_eod_data, sp500_data
+
+
+def make_html_page(items, seed=1975, filler=20):
+    """
+    Make a synthetic news page with the markup of the scraped sources: Marketwatch
+    links, Business Insider teasers, Financial Post headings, Google News results and
+    a Yahoo quote header, buried in unrelated nested markup like the real pages
+
+    Parameters:
+        items: The number of articles of every source
+        seed: The random seed
+        filler: The number of unrelated blocks around every article
+
+    Returns:
+        html: The html page
+    """
+
+    rng = np.random.default_rng(seed)
+    words = ['stocks', 'market', 'rally', 'bonds', 'yields', 'fed', 'earnings', 'oil', 'tech', 'slump', 'â\x80\x99s', 'TSX']
+
+    def headline():
+        return ' '.join(rng.choice(words, 6))
+
+    def noise():
+        return ''.join(f'<div class="row c{i}"><span data-reactid="{i}">{headline()}</span><a class="nav" href="/n/{i}">more</a></div>'
+                       for i in rng.integers(100, 999, filler))
+
+    blocks = ['<div data-reactid="13"><span data-reactid="14">123.45</span><span data-reactid="16">+1.2 (+0.98%)</span></div>']
+    for idx in range(items):
+        blocks.append(noise())
+        blocks.append(f'<a class="link" href="https://www.marketwatch.com/story/{idx}">\n  {headline()}  </a>')
+        blocks.append(f'<a class="link" href="/video/{idx}">{headline()}</a>')
+        blocks.append(f'<a class="teaser-headline" href="/news/{idx}">{headline()}</a>')
+        blocks.append(f'<h4 class="entry-title"><a href="https://business.financialpost.com/{idx}">{headline()}</a></h4>')
+        blocks.append(f'<h2 class="entry-title big"><a href="https://business.financialpost.com/h2/{idx}">{headline()}</a></h2>')
+        blocks.append(f'<div class="kCrYT"><a href="/url?q=https://news.example.com/{idx % (items // 2 + 1)}&sa=U">'
+                      f'<div class="BNeawe vvjwJb AP7Wnd">{headline()}</div></a></div>')
+
+    return ('<!DOCTYPE html><html><head><title>synthetic</title><script>var data = {"x": 1};</script></head>'
+            f'<body><h1>Synthetic Inc. (SYN)</h1>{"".join(blocks)}</body></html>')
+
+
+def make_chart_json(rows, seed=1975, missing=0.001, start='1975-01-02'):
+    """
+    Make a synthetic chart API response for a daily history, like
+    get_eod_API downloads from 1975 to today
+
+    Parameters:
+        rows: The number of trading days
+        seed: The random seed
+        missing: The fraction of the values sent as null
+        start: The date of the first bar
+
+    Returns:
+        json_data: The json data of the chart API response
+    """
+
+    rng = np.random.default_rng(seed)
+    eod_data = make_eod_rows(rows, seed=seed, start=start)
+    timestamps = [int(datetime.datetime(d.year, d.month, d.day, 14, 30).timestamp()) for d in (x[0] for x in eod_data)]
+
+    def field(idx):
+        values = [x[idx] for x in eod_data]
+        for i in np.flatnonzero(rng.random(rows) < missing):
+            values[i] = None
+        return values
+
+    return {'chart': {'result': [{'meta': {'symbol': 'SYN'}, 'timestamp': timestamps,
+                                  'indicators': {'quote': [{'open': field(1), 'high': field(2), 'low': field(3), 'close': field(4), 'volume': field(5)}],
+                                                 'adjclose': [{'adjclose': field(6)}]}}],
+                      'error': None}}
+
+
+def make_key_statistics_page(seed=1975, filler=300):
+    """
+    Make a synthetic Yahoo key statistics page, the QuoteSummaryStore of the stats is
+    embedded in the app state script between unrelated stores and scripts like the real page
+
+    Parameters:
+        seed: The random seed
+        filler: The number of unrelated scripts and news items around the store
+
+    Returns:
+        html: The html page
+    """
+
+    rng = np.random.default_rng(seed)
+
+    def value(kind):
+        raw = float(rng.lognormal(2, 2))
+        fmt = {'ratio': f'{raw:.2f}', 'percent': f'{raw / 100:.2%}', 'big': f'{raw / 10:.2f}B', 'date': f'20{rng.integers(10, 21)}-0{rng.integers(1, 10)}-1{rng.integers(0, 10)}'}[kind]
+        return {'raw': raw, 'fmt': fmt, 'longFmt': f'{raw:,.0f}'}
+
+    kinds = ['ratio', 'percent', 'big', 'date']
+    fields = list(METERICS.values())
+    modules = {'defaultKeyStatistics': {}, 'financialData': {}, 'summaryDetail': {}, 'calendarEvents': {}}
+    for idx, field in enumerate(fields):
+        if idx % 17 == 5:
+            continue # not reported for the company
+        module = list(modules.values())[idx % 4]
+        module[field] = {} if idx % 13 == 7 else value(kinds[idx % 4])
+    modules['summaryDetail']['beta'] = value('ratio') # also in defaultKeyStatistics, the first one is shown
+    modules['price'] = {'regularMarketPrice': value('ratio'), 'marketCap': value('big'), 'longName': 'Synthetic Inc.'}
+
+    news = [{'id': f'n{idx}', 'title': ' '.join(rng.choice(['stocks', 'rally', 'fed', 'oil', 'beta'], 8)),
+             'summary': 'x' * 400, 'finance': {'stockTickers': [{'symbol': 'SYN'}]}} for idx in range(filler)]
+    state = {'context': {'dispatcher': {'stores': {'PageStore': {'pageData': {'pageName': 'key-statistics'}},
+                                                   'StreamStore': {'streams': news},
+                                                   'QuoteSummaryStore': modules,
+                                                   'RecommendationStore': {'recommendedSymbols': [{'symbol': f'S{i}', 'score': value('ratio')} for i in range(filler)]}}}}}
+
+    scripts = ''.join(f'<script>window.f{idx} = function(a) {{ return a * {idx}; }};</script>' for idx in range(filler))
+    rows = ''.join(f'<tr><td>Row {idx}</td><td>{idx}</td></tr>' for idx in range(filler))
+    return (f'<!DOCTYPE html><html><head><title>SYN key statistics</title>{scripts}</head>'
+            f'<body><table>{rows}</table><script>root.App.main = {json.dumps(state, separators=(",", ":"))};\n}}(this));</script></body></html>')
@@ -18,5 +18,7 @@ login_manager.login_message = "You must login to access this feature."
 login_manager.session_protection = "strong"
 
 from stockdashboard import routes
+from stockdashboard.models import upgrade_schema
 
-db.create_all()
\ No newline at end of file
+db.create_all()
+upgrade_schema()
\ No newline at end of file
@@ -1,21 +1,54 @@
-from stockdashboard import db, cache
-from stockdashboard.models import User, Security, News, Company_Information, Daily_Price, Financial
+from stockdashboard import app, db, cache
+from stockdashboard.models import User, Security, News, Company_Information, Daily_Price, Financial, Indicator_State, Security_Snapshot
 from stockdashboard.scrapers import financial_news, yahoo_finance_scraper
-from stockdashboard.signals.technical_signal_calculations import get_techical_indicators
+from stockdashboard.scrapers.connection import EstablishConnectionByRequest
+from stockdashboard.scrapers.async_connection import EstablishConnectionByAiohttp, run_async
+from stockdashboard.scrapers.http_cache import HTTPCache
+from stockdashboard.scrapers.host_policy import HostPolicy
+from stockdashboard.scrapers.single_flight import SingleFlight
+from stockdashboard.signals.technical_signal_calculations import get_techical_indicators, TECHNICAL_INDICATORS
+from stockdashboard.signals.incremental_indicators import build_indicator_state, update_indicator_state
+from stockdashboard.signals.batch_indicators import align_eod_data, get_batch_technical_indicators
+from stockdashboard.signals.indicator_farm import get_farm_technical_indicators
+from stockdashboard.signals.indicator_cache import IndicatorCache, indicator_params_hash
+from stockdashboard.signals.benchmark_analytics import BENCHMARK_SYMBOLS, benchmark_store, get_benchmark_analytics
+from stockdashboard.utils import normalize_news_header, normalize_news_link, news_hash
 
 import datetime
 import json
+import gzip
 import numpy as np 
 import pandas as pd 
-import concurrent.futures
+import os
+from sqlalchemy import bindparam, case, or_
+
+# Scraped pages shared by all the scrapers, see HTTPCache for the record/replay modes 
+http_cache = HTTPCache(os.path.join(app.root_path, app.config['HTTP_CACHE_DIR']), app.config['HTTP_CACHE_MAX_BYTES'], mode=app.config['HTTP_CACHE_MODE'])
+
+# Rate limits, retries and circuit breakers of the scraped hosts, shared by all the connections 
+host_policy = HostPolicy(retries=app.config['HOST_POLICY_RETRIES'], failure_threshold=app.config['HOST_POLICY_FAILURE_THRESHOLD'], reset_timeout=app.config['HOST_POLICY_RESET_TIMEOUT'])
 
 # Instantiate the scraping classes  
-yahoo = yahoo_finance_scraper.YahooFinanceScraper()
-fin_news_data = financial_news.FinancialNewsData()
+yahoo = yahoo_finance_scraper.YahooFinanceScraper(EstablishConnectionByRequest(cache=http_cache, policy=host_policy))
+fin_news_data = financial_news.FinancialNewsData(EstablishConnectionByRequest(cache=http_cache, policy=host_policy))
+
+# The async scrapers share one event loop and its kept alive connections 
+async_yahoo = yahoo_finance_scraper.AsyncYahooFinanceScraper(EstablishConnectionByAiohttp(cache=http_cache, policy=host_policy))
+async_fin_news_data = financial_news.AsyncFinancialNewsData(EstablishConnectionByAiohttp(cache=http_cache, policy=host_policy))
+
+# The get_all_data calls in flight, the concurrent calls for a ticker share one scrape 
+ticker_flights = SingleFlight()
+
+# Memoized technical indicators, kept across tickers and restarts 
+indicator_cache = IndicatorCache(os.path.join(app.root_path, app.config['INDICATOR_CACHE_DIR']), app.config['INDICATOR_CACHE_MEMORY_BUDGET'])
+
+# The pruned news are archived here before they are deleted, no archive if empty 
+news_archive_dir = os.path.join(app.root_path, app.config['NEWS_ARCHIVE_DIR']) if app.config['NEWS_ARCHIVE_DIR'] else None
 
 def get_all_data(ticker='tsla'):
   """
-  Gets the data for the specified ticker, either from the database or by webscrape 
+  Gets the data for the specified ticker, either from the database or by webscrape, the
+  callers asking for a ticker already being loaded wait for it and share its result 
   
   Parameters:
       ticker: the ticker to get the data for  
@@ -25,6 +58,20 @@ def get_all_data(ticker='tsla'):
   """
 
   ticker = ticker.upper()
+  return ticker_flights.do(ticker, lambda: _get_all_data(ticker))
+
+
+def _get_all_data(ticker):
+  """
+  Gets the data for the specified ticker, either from the database or by webscrape 
+  
+  Parameters:
+      ticker: the upper case ticker to get the data for  
+        
+  Returns:
+      Boolean: True, if the data exists or else false
+  """
+
   end = _get_end_date()
   ticker_in_DB = ticker_exists(ticker)
   if ticker_in_DB: # check if the ticker exists in the DB
@@ -41,7 +88,7 @@ def get_all_data(ticker='tsla'):
   cach_ticker.last_updated = datetime.datetime.utcnow()
 
   ticker_stats = get_stats_data(ticker)
-  cach_ticker_eod_data = clean_eod_data(cach_ticker.eod_data.all())
+  cach_ticker_eod_data = get_bars_between(ticker)
   cach_ticker_fiancials = clean_financials(cach_ticker.financials.all()[-1])
   cach_ticker_comp_info = clean_company_information(cach_ticker.company_information.all()[-1])
 
@@ -83,7 +130,7 @@ def _get_end_date():
 
 def get_stats_data(ticker):
   """
-  Get stats data for the ticker 
+  Get stats data for the ticker, shared for STATS_CACHE_TIMEOUT seconds 
   
   Parameters:
       ticker: the ticker to get the data for  
@@ -93,9 +140,19 @@ def get_stats_data(ticker):
   """
   
   ticker = ticker.upper()
-  
-  if yahoo.get_company_stats(ticker):
-      return yahoo.get_company_stats(ticker)
+
+  ticker_stats = cache.get(f'stats_{ticker}')
+  if ticker_stats:
+    return ticker_stats
+
+  # only the stats modules are requested, the whole fundamentals are fetched when a ticker is added 
+  ticker_stats = yahoo.get_key_statistics(ticker)
+  if not ticker_stats: # no quoteSummary response, scrape the key statistics page
+    ticker_stats = yahoo.get_company_stats(ticker)
+
+  if ticker_stats:
+    cache.set(f'stats_{ticker}', ticker_stats, timeout=app.config['STATS_CACHE_TIMEOUT'])
+    return ticker_stats
   
   return False
 
@@ -111,7 +168,49 @@ def get_latest_ticker_price(ticker):
     price: returns the current price 
   """
 
-  return yahoo.get_current_price(ticker)
+  price = get_latest_ticker_prices([ticker]).get(ticker.upper())
+  if price is None: # no quote from the quote API, scrape the quote page 
+    price = yahoo.get_current_price(ticker)
+
+  return price
+
+
+def get_latest_ticker_prices(tickers):
+  """
+  Get the latest prices of many tickers, the quotes are shared by all the clients for 
+  QUOTE_CACHE_TIMEOUT seconds and the missing ones are fetched in one batched request 
+
+  Parameters:
+    tickers: the list of ticker symbols 
+  
+  Returns:
+    prices: the dictionary of ticker symbol and current price, the tickers without a quote are left out 
+  """
+
+  tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+  cached = cache.get_many(*[f'quote_{ticker}' for ticker in tickers]) if tickers else []
+  prices = {ticker: quote for ticker, quote in zip(tickers, cached) if quote is not None}
+
+  missing = [ticker for ticker in tickers if ticker not in prices]
+  if missing:
+    quotes = yahoo.get_quotes(missing)
+    if quotes:
+      cache.set_many({f'quote_{ticker}': quote for ticker, quote in quotes.items()}, timeout=app.config['QUOTE_CACHE_TIMEOUT'])
+    prices.update(quotes)
+
+  return prices
+
+
+def get_connection_stats():
+  """
+  Get the counters of the scraper connections, to watch the throttling of the scraped hosts 
+
+  Returns:
+    stats: the dictionary of the host policy counters and of the http cache hits, misses and revalidations 
+  """
+
+  return {'hosts': host_policy.stats(),
+          'http_cache': {'hits': http_cache.hits, 'misses': http_cache.misses, 'revalidated': http_cache.revalidated}}
 
   
 def ticker_exists(ticker):
@@ -128,6 +227,67 @@ def ticker_exists(ticker):
   return Security.query.filter(Security.ticker == ticker).first()
 
 
+# the columns of the end of day rows, in the order of clean_eod_data 
+EOD_COLUMNS = (Daily_Price.date, Daily_Price.open_price, Daily_Price.high_price, Daily_Price.low_price,
+               Daily_Price.close_price, Daily_Price.daily_volume, Daily_Price.adjusted_close_price)
+
+
+def get_latest_bar(ticker):
+  """
+  Get the most recent end of day bar of the ticker, one lookup of the (ticker, date) index 
+
+  Parameters:
+    ticker: the ticker symbol of the stock 
+  
+  Returns:
+    bar: the [date, open, high, low, close, volume, adjusted close] row, None if there is none 
+  """
+
+  bar = (db.session.query(*EOD_COLUMNS).filter(Daily_Price.security_ticker == ticker)
+           .order_by(Daily_Price.date.desc()).first())
+  return list(bar) if bar else None
+
+
+def get_last_bars(ticker, count):
+  """
+  Get the most recent end of day bars of the ticker 
+
+  Parameters:
+    ticker: the ticker symbol of the stock 
+    count: the number of bars 
+  
+  Returns:
+    eod_data: the list of [date, open, high, low, close, volume, adjusted close] rows sorted by date 
+  """
+
+  bars = (db.session.query(*EOD_COLUMNS).filter(Daily_Price.security_ticker == ticker)
+            .order_by(Daily_Price.date.desc()).limit(count).all())
+  return [list(bar) for bar in reversed(bars)]
+
+
+def get_bars_between(ticker, start_date=None, end_date=None):
+  """
+  Get the end of day bars of the ticker in a date range, the rows are read without creating 
+  Daily_Price objects 
+
+  Parameters:
+    ticker: the ticker symbol of the stock 
+    start_date: the first date included, None for the first bar 
+    end_date: the last date included, None for the latest bar 
+  
+  Returns:
+    eod_data: the list of [date, open, high, low, close, volume, adjusted close] rows sorted by date 
+  """
+
+  query = db.session.query(*EOD_COLUMNS).filter(Daily_Price.security_ticker == ticker)
+  if start_date is not None:
+    query = query.filter(Daily_Price.date >= start_date)
+  if end_date is not None:
+    query = query.filter(Daily_Price.date <= end_date)
+
+  return [list(bar) for bar in query.order_by(Daily_Price.date)]
+
+
 def _update_eod_DB(ticker, end, ticker_DB):
   """
   Update the eod_data in the DB
@@ -138,8 +298,16 @@ def _update_eod_DB(ticker, end, ticker_DB):
       ticker_DB: the DB object for the ticker 
   """
 
-  ticker_data = ticker_DB.eod_data.all()[-1]
-  recent_date = ticker_data.date
+  latest_bar = get_latest_bar(ticker)
+  if latest_bar is None: # the ticker has no eod data yet, get the whole history 
+    print('DB UPDATING, GETTING ALL ' + ticker + ' EOD DATA')
+    ticker_eod = yahoo.get_eod_API(ticker, end_date=end, columnar=True)
+    if ticker_eod:
+      _add_daily_price_DB(ticker_eod, ticker)
+      indicator_cache.invalidate(ticker)
+    return
+
+  recent_date = latest_bar[0]
   recent_end = datetime.datetime.strptime(_get_end_date(),'%d/%m/%Y %H:%M:%S')
   print("CURRENT DATE", recent_end.date())
   print("RECENT EOD DATA DATE IN DB", recent_date)
@@ -156,11 +324,14 @@ def _update_eod_DB(ticker, end, ticker_DB):
     recent_date = datetime.datetime.strptime(recent_date.strftime('%d/%m/%Y %H:%M:%S'), '%d/%m/%Y %H:%M:%S')
     next_day = (recent_date.replace(hour=9, minute=30, second=0) + datetime.timedelta(days=1)).strftime("%d/%m/%Y %H:%M:%S")
     
-    recent_eod = yahoo.get_eod_API(ticker, start_date=next_day, end_date=end)
+    recent_eod = yahoo.get_eod_API(ticker, start_date=next_day, end_date=end, columnar=True)
     if recent_eod:
-      recent_eod = [x for x in recent_eod if x and datetime.datetime.fromtimestamp(int(x[0])).hour in range(9,10)]
+      recent_eod = recent_eod.filter(np.array([datetime.datetime.fromtimestamp(x).hour in range(9,10) for x in recent_eod.timestamps.tolist()], dtype=bool))
       _add_daily_price_DB(recent_eod, ticker)
 
+      if recent_eod: # the cached indicators of the ticker are out of date
+        indicator_cache.invalidate(ticker)
+
 
 def _add_new_data(ticker, end):
   """
@@ -176,49 +347,115 @@ def _add_new_data(ticker, end):
 
   print("ADDING NEW DATA", ticker)
   
-  eod_data_curr = yahoo.get_eod_API(ticker,end_date=_get_end_date())
-
-  with concurrent.futures.ThreadPoolExecutor() as executor:
-      results = [executor.submit(funcs, ticker) 
-                 for funcs in [yahoo.get_ticker_info, 
-                               yahoo.get_company_name,yahoo.get_company_financials]]
-  
-  ticker_eod = eod_data_curr
-  ticker_gen_info = results[0].result()
-  ticker_name = results[1].result()
-  ticker_fins = results[2].result()
+  ticker_eod, fundamentals = run_async(async_yahoo.get_new_ticker_data(ticker, _get_end_date()))
   if not ticker_eod: # check if the ticker has any eod data 
     print("EOD DATA DOES NOT EXISTS",ticker)
     return False
 
   print("EOD DATA EXISTS",ticker)
 
+  if not fundamentals: # check if the ticker has a company profile 
+    print("FUNDAMENTALS DO NOT EXIST",ticker)
+    return False
+
+  if not _valid_fundamentals(fundamentals): # check every part before anything is written to the db 
+    print("FUNDAMENTALS ARE INCOMPLETE",ticker)
+    return False
+
   # add the securty name and ticker to db
-  _add_security_DB(ticker_name['name'], ticker)
+  _add_security_DB(fundamentals['name']['name'], ticker)
 
   # add the end of day data to db
   _add_daily_price_DB(ticker_eod, ticker)
 
   # add the company general information data to db
-  _add_comp_info_DB(ticker_gen_info, ticker)
+  _add_comp_info_DB(fundamentals['info'], ticker)
 
   # add the company financials data to db
-  _add_financial_DB(ticker_fins, ticker)
+  _add_financial_DB(fundamentals['financials'], ticker)
+
+  # the stats came with the same response, get_stats_data does not scrape them again
+  cache.set(f'stats_{ticker}', fundamentals['stats'], timeout=app.config['STATS_CACHE_TIMEOUT'])
 
   return True
 
 
-def _add_daily_price_DB(eod_data, ticker):
+# the parts of the fundamentals written to the db, with the keys each one needs 
+FUNDAMENTALS_KEYS = {'info': ('Business Summary', 'Full-Time Employees', 'Industry', 'Sector', 'Website'),
+                     'financials': ('Cashflow Statement', 'Balance Sheet', 'Income Statement')}
+
+
+def _valid_fundamentals(fundamentals):
+  """
+  Check the fundamentals have a company name and every key of the company information and financials 
+  
+  Parameters:
+      fundamentals: the dictionary of the parsed fundamentals 
+        
+  Returns:
+      Boolean: True, if every part can be written to the db or else false
+  """
+
+  if not (fundamentals.get('name') or {}).get('name'):
+    return False
+  return all(isinstance(fundamentals.get(part), dict) and all(key in fundamentals[part] for key in keys)
+             for part, keys in FUNDAMENTALS_KEYS.items())
+
+
+def _add_daily_price_DB(eod_data, ticker, on_conflict='skip'):
   """
-  Add the end of day data to the db
+  Add the end of day data to the db with batched inserts of DB_BULK_BATCH_SIZE rows, no ORM object 
+  is created. The bars with a missing value are skipped, the bars of a date already stored for the 
+  ticker are skipped or update the stored row 
   
   Parameters:
       ticker: the ticker to insert the data for 
-      eod_data: the eod data to be inserted into the DB
+      eod_data: the EODColumns to be inserted into the DB
+      on_conflict: 'skip' or 'update' the bars of a date already stored 
+
+  Returns:
+      inserted: the number of rows inserted 
+      updated: the number of rows updated 
   """
 
-  for eod in eod_data:
-        db.session.add(Daily_Price(date=datetime.datetime.utcfromtimestamp(int(eod[0])),open_price=float(eod[1]),close_price=float(eod[4]),adjusted_close_price=float(eod[6]),low_price=float(eod[3]),high_price=float(eod[2]), daily_volume=float(eod[5]),security_ticker=ticker))
+  if on_conflict not in ('skip', 'update'):
+    raise ValueError(f"on_conflict must be 'skip' or 'update', got {on_conflict!r}")
+
+  skipped = len(eod_data) - int(eod_data.complete.sum())
+  if skipped:
+    print(f"SKIPPING {skipped} INCOMPLETE {ticker} EOD BARS")
+
+  rows = list({row['date']: row for row in eod_data.to_db_rows(ticker)}.values()) # one bar per date, the last one 
+  if not rows:
+    return 0, 0
+
+  db.session.flush() # the pending security of a new ticker is written before its prices 
+  existing = dict(db.session.query(Daily_Price.date, Daily_Price.id)
+                    .filter(Daily_Price.security_ticker == ticker, 
+                            Daily_Price.date.between(min(row['date'] for row in rows), max(row['date'] for row in rows))))
+  
+  table = Daily_Price.__table__
+  batch_size = app.config['DB_BULK_BATCH_SIZE']
+  new_rows = [row for row in rows if row['date'] not in existing]
+  for idx in range(0, len(new_rows), batch_size):
+    db.session.execute(table.insert(), new_rows[idx:idx + batch_size])
+
+  updated = 0
+  if on_conflict == 'update' and existing:
+    update = table.update().where(table.c.id == bindparam('row_id'))
+    changed_rows = [dict(row, row_id=existing[row['date']]) for row in rows if row['date'] in existing]
+    for row in changed_rows:
+      del row['date'], row['security_ticker']
+    for idx in range(0, len(changed_rows), batch_size):
+      db.session.execute(update, changed_rows[idx:idx + batch_size])
+    updated = len(changed_rows)
+  elif existing:
+    print(f"SKIPPING {len(rows) - len(new_rows)} {ticker} EOD BARS ALREADY IN THE DB")
+
+  if new_rows or updated:
+    _refresh_snapshot_DB(ticker)
+
+  return len(new_rows), updated
 
 
 def _add_security_DB(ticker_name, ticker):
@@ -243,6 +480,96 @@ def _add_comp_info_DB(ticker_gen_info, ticker):
   """
 
   db.session.add(Company_Information(business_summary=ticker_gen_info['Business Summary'],employees=ticker_gen_info['Full-Time Employees'],industry=ticker_gen_info['Industry'],sector=ticker_gen_info['Sector'],website=ticker_gen_info['Website'],security_ticker=ticker))
+  _refresh_snapshot_DB(ticker)
+
+
+# the windows of the snapshot statistics, in calendar days before the latest bar 
+SNAPSHOT_RANGE_DAYS = 365
+SNAPSHOT_AVERAGE_VOLUME_DAYS = 91
+
+# the columns of the snapshot rows, the watchlist renders the first six 
+SNAPSHOT_COLUMNS = (Security_Snapshot.security_ticker, Security_Snapshot.name, Security_Snapshot.sector, Security_Snapshot.industry,
+                    Security_Snapshot.last_close, Security_Snapshot.last_volume, Security_Snapshot.last_date,
+                    Security_Snapshot.high_52_week, Security_Snapshot.low_52_week, Security_Snapshot.average_volume)
+
+
+def _refresh_snapshot_DB(ticker):
+  """
+  Recompute the snapshot of the ticker from its security, latest company information and end of 
+  day data, called whenever one of them is written. The 52 week range and the 3 month average 
+  volume are aggregated by the db over the (ticker, date) index 
+  
+  Parameters:
+      ticker: the ticker to refresh the snapshot for 
+
+  Returns:
+      snapshot: the Security_Snapshot DB object, None if the ticker is not in the DB 
+  """
+
+  security = ticker_exists(ticker)
+  if not security:
+    return None
+
+  snapshot = Security_Snapshot.query.filter(Security_Snapshot.security_ticker == ticker).first() or Security_Snapshot(security_ticker=ticker)
+  comp_info = security.company_information.order_by(Company_Information.id.desc()).first()
+  snapshot.name = security.name
+  snapshot.sector = comp_info.sector if comp_info else None
+  snapshot.industry = comp_info.industry if comp_info else None
+
+  latest_bar = get_latest_bar(ticker)
+  if latest_bar:
+    snapshot.last_date, snapshot.last_close, snapshot.last_volume = latest_bar[0], latest_bar[4], latest_bar[5]
+    volume_start = latest_bar[0] - datetime.timedelta(days=SNAPSHOT_AVERAGE_VOLUME_DAYS)
+    snapshot.high_52_week, snapshot.low_52_week, snapshot.average_volume = (
+      db.session.query(db.func.max(Daily_Price.high_price), db.func.min(Daily_Price.low_price),
+                       db.func.avg(case([(Daily_Price.date > volume_start, Daily_Price.daily_volume)])))
+        .filter(Daily_Price.security_ticker == ticker, 
+                Daily_Price.date > latest_bar[0] - datetime.timedelta(days=SNAPSHOT_RANGE_DAYS))
+        .one())
+
+  db.session.add(snapshot) # a new snapshot joins the session once filled, the queries above autoflush 
+  return snapshot
+
+
+def refresh_all_snapshots():
+  """
+  Recompute the snapshots of every ticker in the DB, i.e. after the snapshot statistics change 
+
+  Returns:
+    count: the number of snapshots refreshed 
+  """
+
+  tickers = [ticker for ticker, in db.session.query(Security.ticker)]
+  for ticker in tickers:
+    _refresh_snapshot_DB(ticker)
+  db.session.commit()
+
+  return len(tickers)
+
+
+def get_snapshots(tickers=None, sector=None, industry=None):
+  """
+  Get the snapshots of the tickers with one query, for the search results and the screeners 
+
+  Parameters:
+    tickers: the ticker symbols, None for every ticker 
+    sector: only the tickers of the sector 
+    industry: only the tickers of the industry 
+  
+  Returns:
+    snapshots: the list of [ticker, name, sector, industry, last close, last volume, last date, 
+               52 week high, 52 week low, average volume] rows sorted by ticker 
+  """
+
+  query = db.session.query(*SNAPSHOT_COLUMNS)
+  if tickers is not None:
+    query = query.filter(Security_Snapshot.security_ticker.in_([ticker.upper() for ticker in tickers]))
+  if sector is not None:
+    query = query.filter(Security_Snapshot.sector == sector)
+  if industry is not None:
+    query = query.filter(Security_Snapshot.industry == industry)
+
+  return [list(row) for row in query.order_by(Security_Snapshot.security_ticker)]
 
 
 def _add_financial_DB(ticker_fins, ticker):
@@ -257,18 +584,48 @@ def _add_financial_DB(ticker_fins, ticker):
   db.session.add(Financial(cashflow_statement=json.dumps(ticker_fins['Cashflow Statement']),balance_sheet=json.dumps(ticker_fins['Balance Sheet']),income_statement=json.dumps(ticker_fins['Income Statement']),security_ticker=ticker))
 
 
-def _add_news_DB(header, link, ticker, source='google'):
+# the news hashes looked up per query, the two lists stay under the 999 parameters of older sqlite builds 
+NEWS_LOOKUP_BATCH_SIZE = 450
+
+
+def _add_news_DB(news_data, ticker=None):
   """
-  Add the company or market news data to the db
+  Add the company or market news that are not in the db yet. The headers and links are normalized 
+  and hashed, the batch is checked against the indexed hashes with one query and the new news are 
+  inserted with batched inserts, no ORM object is created. A news is already stored if its header 
+  or its link is 
   
   Parameters:
-      ticker: the ticker to insert the data for 
-      header: the news header for the article 
-      link: the link for the news article 
-      source: the source of the news article 
+      news_data: the list of (header, link, source) of the scraped articles 
+      ticker: the ticker to insert the data for, None for the market news 
+
+  Returns:
+      inserted: the number of news inserted 
   """
 
-  db.session.add(News(header=header,link=link,source=source,security_ticker=ticker))
+  rows = list()
+  batch_hashes = set()
+  for header, link, source in news_data:
+    header_hash, link_hash = news_hash(normalize_news_header(header)), news_hash(normalize_news_link(link))
+    if header_hash not in batch_hashes and link_hash not in batch_hashes: # the same article listed twice 
+      batch_hashes.update((header_hash, link_hash))
+      rows.append({'header': header, 'link': link, 'source': source, 'security_ticker': ticker, 
+                   'header_hash': header_hash, 'link_hash': link_hash})
+
+  stored_hashes = set()
+  for idx in range(0, len(rows), NEWS_LOOKUP_BATCH_SIZE):
+    batch = rows[idx:idx + NEWS_LOOKUP_BATCH_SIZE]
+    stored = (db.session.query(News.header_hash, News.link_hash)
+                .filter(or_(News.header_hash.in_([row['header_hash'] for row in batch]), 
+                            News.link_hash.in_([row['link_hash'] for row in batch]))))
+    stored_hashes.update(stored_hash for stored_news in stored for stored_hash in stored_news)
+  
+  new_rows = [row for row in rows if row['header_hash'] not in stored_hashes and row['link_hash'] not in stored_hashes]
+  batch_size = app.config['DB_BULK_BATCH_SIZE']
+  for idx in range(0, len(new_rows), batch_size):
+    db.session.execute(News.__table__.insert(), new_rows[idx:idx + batch_size])
+
+  return len(new_rows)
 
 
 def clean_eod_data(db_eod_data):
@@ -329,19 +686,75 @@ def _add_SP500_data(ticker, end_date):
       end: the end date to get the ticker data 
   """
 
+  cache.set('sp500_eod', _add_index_data(ticker, end_date, "Standard&Poor 500"))
+
+
+def _add_index_data(ticker, end_date, name):
+  """
+  Adds or updates the market index data in the DB 
+  
+  Parameters:
+      ticker: the index symbol to get the data for  
+      end: the end date to get the index data 
+      name: the name of the index stored with a new symbol 
+
+  Returns:
+      index_eod: the cleaned eod data of the index 
+  """
+
   ticker_in_DB = ticker_exists(ticker)
   if ticker_in_DB:
     _update_eod_DB(ticker, end_date, ticker_in_DB)
   else:
-    _add_security_DB("Standard&Poor 500", ticker)
-    ticker_eod = yahoo.get_eod_API(ticker, end_date=end_date)
-    
+    ticker_eod = yahoo.get_eod_API(ticker, end_date=end_date, columnar=True)
+    if not ticker_eod: # the security is only added with its eod data 
+      print("INDEX DATA DOES NOT EXIST", ticker)
+      return []
+
+    _add_security_DB(name, ticker)
     _add_daily_price_DB(ticker_eod, ticker)
     
   db.session.commit()
   cach_ticker = Security.query.filter(Security.ticker == ticker).first()
   cach_ticker.last_updated = datetime.datetime.utcnow()
-  cache.set('sp500_eod', clean_eod_data(cach_ticker.eod_data.all()))
+
+  return get_bars_between(ticker)
+
+
+def get_bench_analytics():
+  """
+  Calculate the rolling correlation and beta of the ticker to the market indexes and cache the data,
+  every index is cleaned once and shared by all the tickers and by the S&P 500 correlation of the 
+  technical indicators 
+
+  Returns:
+    bench_analytics: the IndicatorResult of the correlation and beta columns 
+  """
+
+  ticker = cache.get('comp_ticker')
+  ticker_eod = cache.get('comp_eod')
+  bench_analytics = cache.get(f'bench_analytics_{ticker}')
+  if bench_analytics is not None and bench_analytics.last_date == _last_bar_date(ticker_eod):
+    return bench_analytics
+
+  end = _get_end_date()
+
+  benchmarks = list()
+  for name, symbol in BENCHMARK_SYMBOLS.items():
+    cache_key = 'sp500_eod' if symbol == '^GSPC' else f'index_eod_{symbol}'
+    index_eod = cache.get(cache_key)
+    if not index_eod:
+      print('GETTING INDEX DATA', symbol)
+      index_eod = _add_index_data(symbol, end, name)
+      cache.set(cache_key, index_eod)
+
+    if index_eod:
+      benchmarks.append(benchmark_store.get(name, index_eod))
+
+  bench_analytics = get_benchmark_analytics(ticker_eod, benchmarks)
+  cache.set(f'bench_analytics_{ticker}', bench_analytics)
+
+  return bench_analytics
 
 
 def get_ticker_news(ticker):
@@ -358,15 +771,12 @@ def get_ticker_news(ticker):
 
   if cach_ticker:
     print("GETTING NEWS FOR", ticker)
-    ticker_news = fin_news_data.get_google_news(ticker)
-    for header_data, link_data in ticker_news.items():
-      if not News.query.filter(News.header == header_data).first():
-        # print(ticker + ' NEWS: ADDING', header_data)
-        _add_news_DB(header_data, link_data, ticker, 'google')
+    ticker_news = run_async(async_fin_news_data.get_google_news(ticker)) or {}
+    _add_news_DB([(header_data, link_data, 'google') for header_data, link_data in ticker_news.items()], ticker)
 
     db.session.commit() 
 
-  cach_ticker_news = clean_news(cach_ticker.current_news.all())[::-1]
+  cach_ticker_news, _ = get_news_page(ticker=ticker)
   cache.set('comp_news', cach_ticker_news) 
 
 
@@ -391,47 +801,258 @@ def get_all_news(): # done
   """
 
   print('GETTING ALL NEWS')
-  all_news_funcs = [fin_news_data.get_financial_post_news,fin_news_data.get_market_news,fin_news_data.get_marketwatch_news, fin_news_data.get_business_insider_news]
-
-  with concurrent.futures.ThreadPoolExecutor() as executor:
-    results = [executor.submit(func) for func in all_news_funcs]
+  market_news, marketwatch_news, business_insider_news, financial_post_news = run_async(async_fin_news_data.get_all_news())
 
   all_news_dict = {
-    "financial_post":results[0].result(),
-    "google":results[1].result(),
-    "marketwatch":results[2].result(),
-    "business_insider":results[3].result(),
+    "financial_post":financial_post_news or {},
+    "google":market_news or {},
+    "marketwatch":marketwatch_news or {},
+    "business_insider":business_insider_news or {},
   }
 
-  # current_news_in_DB = clean_news(News.query.all())
-  # existing_headers = [x[0] for x in current_news_in_DB] if len(current_news_in_DB) > 0 else []  
-  for news_source, news_results in all_news_dict.items():
-    for header, link in news_results.items():
-      if not News.query.filter(News.header == header).first():
-        # print('ALL NEWS: ADDING ', header)
-        _add_news_DB(header, link, None, news_source)
+  _add_news_DB([(header, link, news_source) for news_source, news_results in all_news_dict.items() for header, link in news_results.items()])
 
   db.session.commit()
-  updated_news_in_DB = clean_news(News.query.all())[::-1]
-  
-  result_dict = {
-    "financial_post": list(),
-    "google": list(),
-    "marketwatch": list(),
-    "business_insider": list(),
-  }
-  
-  for news in updated_news_in_DB:
-    result_dict[news[2]].append(news)
+
+  if not cache.get('news_pruned'): # the retention runs at most once per NEWS_PRUNE_INTERVAL 
+    cache.set('news_pruned', True, timeout=app.config['NEWS_PRUNE_INTERVAL'])
+    prune_news()
+
+  result_dict = dict()
+  for news_source in all_news_dict:
+    result_dict[news_source], _ = get_news_page(source=news_source)
   
   return result_dict
 
 
+def get_news_page(source=None, ticker=None, limit=None, before_id=None):
+  """
+  Get a page of the newest news of a source or a ticker. The news are read newest first along the 
+  (source, id) or (ticker, id) index and the next page starts below the last id of this one, the 
+  cost of a page does not grow with the number of news stored 
+
+  Parameters:
+    source: only the news of the source, i.e. 'google' 
+    ticker: only the news of the ticker 
+    limit: the number of news of the page, NEWS_PAGE_SIZE by default 
+    before_id: the next_before_id of the previous page, None for the first page 
+  
+  Returns:
+    news: the list of [header, link, source] rows, newest first 
+    next_before_id: the before_id of the next page, None on the last page 
+  """
+
+  limit = limit or app.config['NEWS_PAGE_SIZE']
+  query = db.session.query(News.id, News.header, News.link, News.source)
+  if source is not None:
+    query = query.filter(News.source == source)
+  if ticker is not None:
+    query = query.filter(News.security_ticker == ticker.upper())
+  if before_id is not None:
+    query = query.filter(News.id < before_id)
+
+  rows = query.order_by(News.id.desc()).limit(limit + 1).all() # one more row tells if there is a next page 
+  next_before_id = rows[limit - 1].id if len(rows) > limit else None
+
+  return [[row.header, row.link, row.source] for row in rows[:limit]], next_before_id
+
+
+def prune_news(max_age_days=None, batch_size=None, archive_dir=news_archive_dir):
+  """
+  Delete the news retrieved more than max_age_days ago, in id order in batches of batch_size rows 
+  each committed on its own so the table is never locked for long. The rows of a batch are appended 
+  to the gzipped json lines archive of the day before they are deleted 
+
+  Parameters:
+    max_age_days: the age of the news kept, NEWS_RETENTION_DAYS by default 
+    batch_size: the number of news deleted per transaction, NEWS_PRUNE_BATCH_SIZE by default 
+    archive_dir: the directory of the archives, None to delete without archiving 
+
+  Returns:
+    pruned: the number of news deleted 
+  """
+
+  cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=max_age_days or app.config['NEWS_RETENTION_DAYS'])
+  batch_size = batch_size or app.config['NEWS_PRUNE_BATCH_SIZE']
+  columns = (News.id, News.header, News.link, News.source, News.date_retrieved, News.security_ticker)
+
+  pruned = 0
+  while True:
+    rows = db.session.query(*columns).filter(News.date_retrieved < cutoff).order_by(News.id).limit(batch_size).all()
+    if not rows:
+      break
+
+    if archive_dir:
+      os.makedirs(archive_dir, exist_ok=True)
+      with gzip.open(os.path.join(archive_dir, f'news_{datetime.date.today()}.jsonl.gz'), 'at', encoding='utf-8') as archive:
+        for row in rows:
+          archive.write(json.dumps(dict(row._asdict(), date_retrieved=row.date_retrieved.isoformat())) + '\n')
+
+    # the expired news up to the last id of the batch are the rows of the batch 
+    News.query.filter(News.id <= rows[-1].id, News.date_retrieved < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    pruned += len(rows)
+
+  if pruned:
+    print(f"PRUNED {pruned} NEWS RETRIEVED BEFORE {cutoff.date()}")
+
+  return pruned
+
+
 def get_tech_ind():
   """
-  Calculate the technical indicators and cache the data 
+  Calculate the technical indicators and cache the data, reusing the memoized indicators 
+  of the ticker or extending the stored indicator state with only the new bars
   """
-  cache.set('tech_ind',get_techical_indicators(cache.get('comp_eod'), cache.get('sp500_eod')))
+
+  ticker = cache.get('comp_ticker')
+  ticker_eod = cache.get('comp_eod')
+  sp500_eod = cache.get('sp500_eod')
+
+  last_date = _last_bar_date(ticker_eod)
+  params_hash = indicator_params_hash(TECHNICAL_INDICATORS, _last_bar_date(sp500_eod))
+
+  tech_ind = indicator_cache.get(ticker, last_date, params_hash)
+  if tech_ind is not None:
+    print('CACHED TECHNICAL INDICATORS', ticker)
+    cache.set(f'tech_ind_{ticker}', tech_ind)
+    cache.set('tech_ind', tech_ind)
+    return
+
+  tech_ind = cache.get(f'tech_ind_{ticker}')
+  ticker_state = Indicator_State.query.filter(Indicator_State.security_ticker == ticker).first()
+
+  # the new rows start after the stored state, they only extend a result ending on the same bar 
+  new_tech_ind = None
+  if tech_ind and ticker_state:
+    state = json.loads(ticker_state.state)
+    if tech_ind.last_date == state['last_date']:
+      new_tech_ind = update_indicator_state(state, ticker_eod, sp500_eod)
+
+  if new_tech_ind is None:
+    print('CALCULATING TECHNICAL INDICATORS', ticker)
+    tech_ind = get_techical_indicators(ticker_eod, sp500_eod)
+    state = build_indicator_state(ticker_eod, sp500_eod)
+  else:
+    print('EXTENDING TECHNICAL INDICATORS', ticker, len(new_tech_ind))
+    tech_ind = tech_ind.append(new_tech_ind)
+
+  _add_indicator_state_DB(state, ticker)
+  db.session.commit()
+
+  indicator_cache.set(ticker, last_date, params_hash, tech_ind)
+  cache.set(f'tech_ind_{ticker}', tech_ind)
+  cache.set('tech_ind', tech_ind)
+
+
+def get_batch_tech_ind(tickers, processes=None):
+  """
+  Calculate the technical indicators of many tickers in one batch and cache them per ticker, the 
+  stored indicator state of a ticker is rebuilt when it does not end on the bar of its indicators 
+
+  Parameters:
+    tickers: the list of ticker symbols already stored in the DB 
+    processes: the number of worker processes to shard the tickers across, 
+               None to calculate in this process 
+
+  Returns:
+    batch_tech_ind: the dictionary of ticker symbol and technical indicators 
+  """
+
+  if not cache.get('sp500_eod'):
+    _add_SP500_data("^GSPC", _get_end_date())
+
+  sp500_eod = cache.get('sp500_eod')
+  params_hash = indicator_params_hash(TECHNICAL_INDICATORS, _last_bar_date(sp500_eod))
+
+  securities = Security.query.filter(Security.ticker.in_([x.upper() for x in tickers])).all()
+  tickers_eod = {x.ticker: get_bars_between(x.ticker) for x in securities}
+  tickers_last_date = {ticker: _last_bar_date(eod_data) for ticker, eod_data in tickers_eod.items()}
+
+  # only the tickers without memoized indicators are calculated
+  batch_tech_ind = {ticker: indicator_cache.get(ticker, tickers_last_date[ticker], params_hash) for ticker in tickers_eod}
+  missing_tickers = {ticker: tickers_eod[ticker] for ticker, tech_ind in batch_tech_ind.items() if tech_ind is None}
+
+  if missing_tickers and processes:
+    calculated_tech_ind = get_farm_technical_indicators(missing_tickers, sp500_eod, processes=processes)
+  elif missing_tickers:
+    dates, prices, sp500_close = align_eod_data(missing_tickers, sp500_eod)
+    calculated_tech_ind = get_batch_technical_indicators(list(missing_tickers), dates, prices, sp500_close)
+
+  if missing_tickers:
+    for ticker, tech_ind in calculated_tech_ind.items():
+      indicator_cache.set(ticker, tickers_last_date[ticker], params_hash, tech_ind)
+      batch_tech_ind[ticker] = tech_ind
+
+  # get_tech_ind extends the cached indicators from the stored state, both must end on the same bar 
+  states_last_date = dict(db.session.query(Indicator_State.security_ticker, Indicator_State.last_date)
+                            .filter(Indicator_State.security_ticker.in_(list(batch_tech_ind))))
+  for ticker, tech_ind in batch_tech_ind.items():
+    if len(tech_ind) and str(states_last_date.get(ticker)) != tech_ind.last_date:
+      _add_indicator_state_DB(build_indicator_state(tickers_eod[ticker], sp500_eod), ticker)
+  db.session.commit()
+
+  for ticker, tech_ind in batch_tech_ind.items():
+    cache.set(f'tech_ind_{ticker}', tech_ind)
+
+  return batch_tech_ind
+
+
+def recalculate_all_tech_ind(processes=None):
+  """
+  Recalculate the technical indicators of every ticker in the DB on a process pool, 
+  i.e. the nightly recalculation, the tickers with memoized indicators are skipped 
+
+  Parameters:
+    processes: the number of worker processes, the number of cores by default 
+
+  Returns:
+    all_tech_ind: the dictionary of ticker symbol and technical indicators 
+  """
+
+  index_symbols = set(BENCHMARK_SYMBOLS.values())
+  tickers = [x.ticker for x in Security.query.all() if x.ticker not in index_symbols]
+
+  return get_batch_tech_ind(tickers, processes=processes or os.cpu_count() or 1)
+
+
+def _last_bar_date(eod_data):
+  """
+  Get the date of the last complete end of day bar, today's bar is not used by the indicators
+  
+  Parameters:
+      eod_data: the eod data sorted by date 
+
+  Returns:
+      last_date: the date string (%Y-%m-%d) of the last complete bar, None if there is none
+  """
+
+  today = datetime.date.today().strftime('%Y-%m-%d')
+  for eod in reversed(eod_data or []):
+    eod_date = eod[0].strftime('%Y-%m-%d')
+    if eod_date < today:
+      return eod_date
+
+  return None
+
+
+def _add_indicator_state_DB(state, ticker):
+  """
+  Add or replace the trailing technical indicator state of the ticker in the db
+  
+  Parameters:
+      state: the indicator state to be stored 
+      ticker: the ticker to insert the data for 
+  """
+
+  ticker_state = Indicator_State.query.filter(Indicator_State.security_ticker == ticker).first()
+  last_date = datetime.datetime.strptime(state['last_date'], '%Y-%m-%d').date()
+
+  if ticker_state:
+    ticker_state.last_date = last_date
+    ticker_state.state = json.dumps(state)
+  else:
+    db.session.add(Indicator_State(last_date=last_date, state=json.dumps(state), security_ticker=ticker))
 
 
 def user_exists(email):
@@ -449,28 +1070,50 @@ def user_exists(email):
 
 def get_user_watchlist(user_email):
   """
-  Get the watchlist of the user
+  Get the watchlist of the user from the snapshots of its tickers, one query whatever the 
+  number of tickers. The tickers added before the snapshots existed get theirs once 
 
   Parameters:
     user_email: the email of the user 
+
+  Returns:
+    watchlist: the list of [ticker, name, sector, industry, previous close, previous volume] rows 
   """
 
+  output_ticker_data = list()
   user = user_exists(user_email)
   if user:
-    all_tickers = user.watchlist_tickers.all()
-    output_ticker_data = list() 
-    for ticker in all_tickers:
-      ticker_name = ticker.ticker
-      comp_name = ticker.name
-      sector = ticker.company_information[0].sector
-      industry = ticker.company_information[0].industry
-      previous_close = ticker.eod_data[-1].close_price 
-      previous_volume = ticker.eod_data[-1].daily_volume 
-      output_ticker_data.append([ticker_name,comp_name,sector,industry,previous_close,previous_volume])
+    output_ticker_data = _watchlist_snapshots(user)
+    missing = [row[0] for row in output_ticker_data if row[1] is None]
+    if missing:
+      for ticker in missing:
+        _refresh_snapshot_DB(ticker)
+      db.session.commit()
+      output_ticker_data = _watchlist_snapshots(user)
       
   return output_ticker_data
 
 
+def _watchlist_snapshots(user):
+  """
+  Get the snapshot rows of the watchlist tickers of the user, the name is None for a ticker 
+  without a snapshot 
+
+  Parameters:
+    user: the DB object of the user 
+
+  Returns:
+    watchlist: the list of [ticker, name, sector, industry, previous close, previous volume] rows 
+  """
+
+  watchlist = db.metadata.tables['Watchlist']
+  rows = (db.session.query(watchlist.c.security_ticker, *SNAPSHOT_COLUMNS[1:6])
+            .outerjoin(Security_Snapshot, Security_Snapshot.security_ticker == watchlist.c.security_ticker)
+            .filter(watchlist.c.user_id == user.id))
+
+  return [list(row) for row in rows]
+
+
 def add_user_watchlist(user_email, ticker):
   """
   Add ticker to the watchlist of the user 
@@ -3,6 +3,7 @@ import datetime
 from collections import OrderedDict
 import json
 from flask_login import UserMixin
+from stockdashboard.utils import normalize_news_header, normalize_news_link, news_hash
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -41,6 +42,8 @@ class Security(db.Model):
   company_information = db.relationship('Company_Information', backref='security', lazy='dynamic')
   eod_data = db.relationship('Daily_Price', backref='security', lazy='dynamic')
   financials = db.relationship('Financial', backref='security', lazy='dynamic')
+  indicator_state = db.relationship('Indicator_State', backref='security', lazy='dynamic')
+  snapshot = db.relationship('Security_Snapshot', backref='security', uselist=False)
 
   def __repr__(self):
     return f'{self.name},{self.ticker},{self.date_created},{self.last_updated}'
@@ -51,9 +54,16 @@ class News(db.Model):
   header = db.Column(db.String(128), nullable=False)
   link = db.Column(db.String(128), nullable=False)
   source = db.Column(db.String(32), default='unknown')
-  date_retrieved = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+  date_retrieved = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
   security_ticker = db.Column(db.String(8), db.ForeignKey('security.ticker'))
 
+  # the hashes of the normalized header and link, a scraped news is new if neither is stored 
+  header_hash = db.Column(db.String(40), nullable=True, index=True)
+  link_hash = db.Column(db.String(40), nullable=True, index=True)
+
+  # the newest news of a source or a ticker are read backwards along these indexes, one page at a time 
+  __table_args__ = (db.Index('ix_news_source_id', 'source', 'id'), db.Index('ix_news_ticker_id', 'security_ticker', 'id'))
+
   def __repr__(self):
     return f'{self.header},{self.link},{self.source},{self.date_retrieved},{self.security_ticker}'
   
@@ -82,6 +92,9 @@ class Daily_Price(db.Model):
   daily_volume = db.Column(db.Integer, nullable=False)
   security_ticker = db.Column(db.String(8), db.ForeignKey('security.ticker'), nullable=False)
 
+  # one bar per ticker and date, the index also serves the latest bar and date range queries of a ticker
+  __table_args__ = (db.Index('ix_daily_price_ticker_date', 'security_ticker', 'date', unique=True),)
+
   def __repr__(self):
     return f'{self.date},{self.open_price},{self.close_price},{self.adjusted_close_price},{self.low_price},{self.high_price},{self.daily_volume},{self.security_ticker}'
 
@@ -97,6 +110,38 @@ class Financial(db.Model):
     return f'{json.loads(self.cashflow_statement)},{json.loads(self.balance_sheet)},{json.loads(self.income_statement)},{self.security_ticker}'
 
 
+class Indicator_State(db.Model):
+  id = db.Column(db.Integer, primary_key=True)
+  last_date = db.Column(db.Date, nullable=False)
+  state = db.Column(db.Text, nullable=False)
+  last_updated = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+  security_ticker = db.Column(db.String(8), db.ForeignKey('security.ticker'), unique=True, nullable=False)
+
+  def __repr__(self):
+    return f'{self.last_date},{json.loads(self.state)},{self.last_updated},{self.security_ticker}'
+
+
+class Security_Snapshot(db.Model):
+  id = db.Column(db.Integer, primary_key=True)
+  name = db.Column(db.String(64), nullable=False)
+  sector = db.Column(db.String(32), nullable=True)
+  industry = db.Column(db.String(32), nullable=True)
+  last_date = db.Column(db.Date, nullable=True)
+  last_close = db.Column(db.Float, nullable=True)
+  last_volume = db.Column(db.Integer, nullable=True)
+  high_52_week = db.Column(db.Float, nullable=True)
+  low_52_week = db.Column(db.Float, nullable=True)
+  average_volume = db.Column(db.Float, nullable=True)
+  last_updated = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+  security_ticker = db.Column(db.String(8), db.ForeignKey('security.ticker'), unique=True, nullable=False)
+
+  # the screeners filter the snapshots by sector and industry
+  __table_args__ = (db.Index('ix_security_snapshot_sector_industry', 'sector', 'industry'),)
+
+  def __repr__(self):
+    return f'{self.name},{self.sector},{self.industry},{self.last_date},{self.last_close},{self.last_volume},{self.high_52_week},{self.low_52_week},{self.average_volume},{self.security_ticker}'
+
+
 class UserSchema(ma.ModelSchema):
   class Meta:
     model = User
@@ -124,4 +169,59 @@ class Daily_PriceSchema(ma.ModelSchema):
 
 class FinancialSchema(ma.ModelSchema):
   class Meta:
-    model = Financial
\ No newline at end of file
+    model = Financial
+
+
+class Indicator_StateSchema(ma.ModelSchema):
+  class Meta:
+    model = Indicator_State
+
+
+class Security_SnapshotSchema(ma.ModelSchema):
+  class Meta:
+    model = Security_Snapshot
+
+def upgrade_schema():
+  """
+  Bring a db created by an older version up to date, db.create_all only creates the missing tables. 
+  The missing columns are added, the news stored without hashes get them, then the missing indexes 
+  are created, the duplicate end of day bars of a ticker and date are removed first and the most 
+  recent row is kept 
+  """
+
+  with db.engine.begin() as connection:
+    inspector = db.inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+
+    for table in db.metadata.sorted_tables:
+      existing = [column['name'] for column in inspector.get_columns(table.name)]
+      for column in table.columns:
+        if column.name not in existing:
+          connection.execute(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column.type.compile(connection.dialect)}')
+
+    _hash_news(connection)
+
+    for table in db.metadata.sorted_tables:
+      existing = [index['name'] for index in inspector.get_indexes(table.name)]
+      missing = [index for index in table.indexes if index.name not in existing]
+      if missing and table is Daily_Price.__table__:
+        kept = db.select([db.func.max(table.c.id)]).group_by(table.c.security_ticker, table.c.date)
+        connection.execute(table.delete().where(~table.c.id.in_(kept)))
+      for index in missing:
+        index.create(bind=connection)
+
+
+def _hash_news(connection):
+  """
+  Set the header and link hashes of the news stored without them 
+
+  Parameters:
+    connection: the connection of the upgrade transaction 
+  """
+
+  table = News.__table__
+  news = connection.execute(db.select([table.c.id, table.c.header, table.c.link]).where(table.c.header_hash == None)).fetchall()
+  if news:
+    connection.execute(table.update().where(table.c.id == db.bindparam('row_id')), 
+                       [{'row_id': row.id, 'header_hash': news_hash(normalize_news_header(row.header)), 
+                         'link_hash': news_hash(normalize_news_link(row.link))} for row in news])
@@ -1,12 +1,14 @@
 import plotly
 import plotly.graph_objs as go
-import pandas as pd
+import numpy as np
 import json
 import datetime 
 
+from stockdashboard.signals.eod_arrays import eod_to_arrays
+
 def make_plot(chart_data='https://raw.githubusercontent.com/plotly/datasets/master/finance-charts-apple.csv'):
   """
-  Renders the plot using a pandas dataframe 
+  Renders the plot using the date and close arrays 
   
   Parameters:
       chart_data: chart data to be used for the plot 
@@ -14,12 +16,11 @@ def make_plot(chart_data='https://raw.githubusercontent.com/plotly/datasets/mast
   Returns:
       graphJSON: Json format of the chart to be rendered by Plotly 
   """
-  df = pd.DataFrame(chart_data, columns =['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'AdjClose'])
-  df['Date'] = df['Date'].apply(lambda d: d.strftime(r'%Y-%m-%d'))
+  dates, prices = eod_to_arrays(chart_data, drop_today=False)
 
   data = [go.Scatter(
-    x = df['Date'], 
-    y= df['Close']
+    x = np.datetime_as_string(dates, unit='D'), 
+    y= prices['Close']
     )]
 
   graphJSON = json.dumps(data, cls=plotly.utils.PlotlyJSONEncoder)
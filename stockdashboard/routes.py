@@ -8,7 +8,7 @@ from stockdashboard import app, cache, bcrypt, login_manager
 from stockdashboard.utils import search_bar_data
 from stockdashboard.plots.plots import make_plot
 from stockdashboard.signals import technical_signal_calculations
-from stockdashboard.controller import get_all_data, get_tech_ind, add_user, user_exists, get_latest_ticker_price, get_all_news, get_ticker_news, get_user_watchlist, add_user_watchlist, delete_user_watchlist, update_user_login
+from stockdashboard.controller import get_all_data, get_tech_ind, get_bench_analytics, add_user, user_exists, get_latest_ticker_price, get_latest_ticker_prices, get_connection_stats, get_all_news, get_ticker_news, get_news_page, get_user_watchlist, add_user_watchlist, delete_user_watchlist, update_user_login
 from stockdashboard.forms import RegistrationForm, LoginForm
 
 search_bar_options = cache.get('search_bar_options')
@@ -183,6 +183,36 @@ def get_price():
   return res
 
 
+@app.route('/get_prices', methods=['POST'])
+def get_prices():
+  tickers = request.get_json(force=True, silent=True)
+  tickers = tickers.get('tickers') if isinstance(tickers, dict) else None
+
+  # a list of at most PRICES_MAX_TICKERS symbols, one batched quote request 
+  if not isinstance(tickers, list) or not all(isinstance(ticker, str) and ticker.strip() for ticker in tickers):
+    return make_response(jsonify({'message': "tickers must be a list of ticker symbols"}), 400)
+  if len(tickers) > app.config['PRICES_MAX_TICKERS']:
+    return make_response(jsonify({'message': f"at most {app.config['PRICES_MAX_TICKERS']} tickers per request"}), 400)
+
+  result = get_latest_ticker_prices([ticker.strip() for ticker in tickers])
+  
+  res = make_response(jsonify({ticker: {'new_price':price['Current Price'], 'new_price_diff':price['Current Percentage']} 
+                               for ticker, price in result.items()}), 200)
+  return res
+
+
+@app.route('/connection_stats', methods=['GET'])
+@login_required
+def connection_stats():
+  return jsonify(get_connection_stats())
+
+
+@app.route('/news_page', methods=['GET'])
+def news_page():
+  news, next_before_id = get_news_page(source=request.args.get('source'), ticker=request.args.get('ticker'), before_id=request.args.get('before', type=int))
+  return jsonify({'news': news, 'next': next_before_id})
+
+
 @app.route('/get_daily_price_csv')
 @login_required
 def get_daily_price_csv():
@@ -199,12 +229,20 @@ def get_daily_price_csv():
 @login_required
 def get_tech_ind_csv():
   print("DOWNLOADING TECHNICAL INDICATORS CSV")
-  df =  pd.DataFrame.from_dict(cache.get('tech_ind'), orient='index')
-  df.to_csv(r'outputs\technical_indicators.csv')
-  return send_file(r'..\outputs\technical_indicators.csv',
-                     mimetype='text/csv',
-                     attachment_filename='technical_indicators.csv',
-                     as_attachment=True)
+  res = make_response(cache.get('tech_ind').to_csv(), 200)
+  res.headers['Content-Disposition'] = 'attachment; filename=technical_indicators.csv'
+  res.mimetype = 'text/csv'
+  return res
+
+
+@app.route('/benchmark_analytics', methods=['GET'])
+def benchmark_analytics():
+  if not cache.get('comp_eod'):
+    cache_data()
+
+  res = make_response(get_bench_analytics().to_json(), 200)
+  res.mimetype = 'application/json'
+  return res
 
 
 @app.errorhandler(404)
@@ -237,12 +275,10 @@ def parse_date_tech_ind():
   if dates_to_parse['start_date'] == "reset_dates":
     return render_template('techind.html', tech_ind_data=cache.get('tech_ind'))
   
-  start_date = datetime.datetime.strptime(dates_to_parse['start_date'][:10], "%Y-%m-%d").date().strftime("%Y-%m-%d")
-  end_date = datetime.datetime.strptime(dates_to_parse['end_date'][:10], "%Y-%m-%d").date().strftime("%Y-%m-%d")
+  start_date = datetime.datetime.strptime(dates_to_parse['start_date'][:10], "%Y-%m-%d").date()
+  end_date = datetime.datetime.strptime(dates_to_parse['end_date'][:10], "%Y-%m-%d").date()
   
-  df = pd.DataFrame.from_dict(cache.get('tech_ind'), orient='index')
-  temp_data = df.loc[start_date:end_date]
-  output = temp_data.to_dict('index')
+  output = cache.get('tech_ind').slice(start_date, end_date)
 
   return render_template('techind.html', tech_ind_data=output)
 
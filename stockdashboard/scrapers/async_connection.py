@@ -0,0 +1,231 @@
+import asyncio
+import threading
+import aiohttp
+from stockdashboard.scrapers.interfaces import EstablishConnectionInterface
+from stockdashboard.scrapers.connection import ScrapedResponse
+from stockdashboard.scrapers.host_policy import CircuitOpenError
+from stockdashboard.scrapers.single_flight import AsyncSingleFlight, request_key
+
+
+class EstablishConnectionByAiohttp(EstablishConnectionInterface):
+    """
+    Connect to urls using aiohttp from one event loop, the connections are kept
+    alive and the number of concurrent connections per host is limited. The GET
+    requests go through the HTTPCache when one is given, the requests that reach
+    the network are paced, retried and failed fast by the HostPolicy when one is given.
+    Identical GET requests in flight at the same time are sent once and share the response
+    Implements:
+        -EstablishConnection
+    """
+
+    def __init__(self, *, limit=32, limit_per_host=4, keepalive_timeout=30, cache=None, policy=None):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache if cache is not None and cache.enabled else None
+        self.policy = policy
+        self.flights = AsyncSingleFlight()
+        self.session = None
+
+    def _get_session(self):
+        """
+        Get the client session, created on the running event loop the first time
+
+        Returns:
+            session: the aiohttp client session
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _send(self, method, url, **kwargs):
+        """
+        Send the request and read the whole body, the connection is released before any backoff
+
+        Returns:
+            response: the released aiohttp response, its status and headers can still be read
+            text: the body of the response
+        """
+        async with self._get_session().request(method, url, **kwargs) as response:
+            return response, await response.text(errors='replace')
+
+    async def _send_with_policy(self, method, url, **kwargs):
+        """
+        Send the request paced, retried and failed fast by the HostPolicy
+
+        Returns:
+            response: the released aiohttp response, the last one when the retries are exhausted
+            text: the body of the response
+        """
+        if self.policy is None:
+            return await self._send(method, url, **kwargs)
+
+        host = self.policy.host(url)
+        attempt = 0
+        while True:
+            wait = self.policy.acquire(host)
+            if wait:
+                await asyncio.sleep(wait)
+
+            try:
+                response, text = await self._send(method, url, **kwargs)
+            except Exception as e:
+                delay = self.policy.failed(host, method, attempt,
+                                           retryable=isinstance(e, aiohttp.ClientConnectionError) and not isinstance(e, asyncio.TimeoutError))
+                if delay is None:
+                    raise
+            else:
+                delay = self.policy.completed(host, method, attempt, response.status, response.headers.get('Retry-After'))
+                if delay is None:
+                    return response, text
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _request(self, method, url, *, json_data=None, payload=None, headers=None,
+                       credentials=None, query_string=None, timeout=30):
+        """
+        Make the request and read the whole body
+
+        Returns:
+            response: the ScrapedResponse, False if the request failed
+        """
+        cache_key = entry = None
+        if self.cache and method == 'GET':
+            cache_key = self.cache.key(url, query_string)
+            entry, fresh = self.cache.lookup(cache_key)
+            if fresh:
+                return ScrapedResponse(entry['url'], entry['status'], entry['text'])
+            if self.cache.mode == 'replay':
+                print(f"\nEstablishConnectionByAiohttp.{method.lower()} REPLAY ERROR: {url} was not recorded\n")
+                return False
+            headers = self.cache.revalidation_headers(entry, headers)
+
+        try:
+            auth = aiohttp.BasicAuth(*credentials) if credentials else None
+            response, text = await self._send_with_policy(method, url, json=json_data, data=payload,
+                                                          params=query_string, headers=headers, auth=auth,
+                                                          timeout=aiohttp.ClientTimeout(total=timeout))
+            if cache_key and entry and response.status == 304:
+                self.cache.refresh(cache_key, entry)
+                return ScrapedResponse(entry['url'], entry['status'], entry['text'])
+
+            response.raise_for_status()
+            if cache_key:
+                self.cache.set(cache_key, str(response.url), response.status, text,
+                               response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return ScrapedResponse(str(response.url), response.status, text)
+        except CircuitOpenError as e:
+            print(f"\nEstablishConnectionByAiohttp.{method.lower()} CIRCUIT OPEN: {e}\n")
+            return False
+        except aiohttp.ClientResponseError as e:
+            print(f"\nEstablishConnectionByAiohttp.{method.lower()} HTTP ERROR: {e}\n")
+            return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"\nEstablishConnectionByAiohttp.{method.lower()} REQUEST ERROR: {e!r}\n")
+            return False
+        except Exception as e:
+            print(f"\nEstablishConnectionByAiohttp.{method.lower()} ERROR: {e}\n")
+            return False
+
+    async def connect(self, url, *, json_data=None, payload=None, headers=None,
+                      credentials=None, query_string=None, timeout=30):
+        """
+        Connect to webpage using a 'get' request
+
+        Parameters:
+            url: The url of the page being requested
+            payload: The body of the request
+            headers: The headers data to pass with the request
+            credentials: The (login, password) for basic authentication
+            query_string: The key/value pairs query string to pass with the request
+            timeout: amount of seconds to wait for the whole request
+
+        Returns:
+            response, the ScrapedResponse if a succesfull connection was made, False otherwise
+        """
+        if json_data is None and payload is None and credentials is None:
+            response = await self.flights.do(request_key('GET', url, query_string, headers),
+                                             lambda: self._request('GET', url, headers=headers, query_string=query_string, timeout=timeout))
+            # every caller gets its own response, the parsed pages are not shared between callers
+            return ScrapedResponse(response.url, response.status, response.text) if response else response
+
+        return await self._request('GET', url, json_data=json_data, payload=payload, headers=headers,
+                                   credentials=credentials, query_string=query_string, timeout=timeout)
+
+    async def connect_post(self, url, *, json_data=None, payload=None, headers=None,
+                           credentials=None, query_string=None, timeout=30):
+        """
+        Connect to webpage using a 'post' request
+
+        Parameters:
+            url: The url of the page being requested
+            payload: The body of the request
+            headers: The headers data to pass with the request
+            credentials: The (login, password) for basic authentication
+            query_string: The key/value pairs query string to pass with the request
+            timeout: amount of seconds to wait for the whole request
+
+        Returns:
+            response, the ScrapedResponse if a succesfull connection was made, False otherwise
+        """
+        return await self._request('POST', url, json_data=json_data, payload=payload, headers=headers,
+                                   credentials=credentials, query_string=query_string, timeout=timeout)
+
+    async def close(self):
+        """
+        Close the client session and its kept alive connections
+        """
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+class EventLoopThread():
+    """
+    An event loop running in a background thread, used to run the scraper coroutines
+    from the (synchronous) flask views and keep the connections alive between them
+    """
+
+    def __init__(self):
+        self.loop = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """
+        Start the event loop thread the first time it is needed
+        """
+        with self._lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name='scrapers-event-loop', daemon=True).start()
+
+    def run(self, coroutine):
+        """
+        Run the coroutine on the event loop and wait for the result
+
+        Parameters:
+            coroutine: The coroutine to run
+
+        Returns:
+            result: The result of the coroutine
+        """
+        self._start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+scrapers_event_loop = EventLoopThread()
+
+
+def run_async(coroutine):
+    """
+    Run a scraper coroutine on the shared scrapers event loop and wait for the result
+
+    Parameters:
+        coroutine: The coroutine to run
+
+    Returns:
+        result: The result of the coroutine
+    """
+    return scrapers_event_loop.run(coroutine)
@@ -2,6 +2,7 @@ import re
 from collections import OrderedDict
 import codecs
 from stockdashboard.scrapers.connection import EstablishConnectionByRequest
+from stockdashboard.scrapers.key_statistics import parse_key_statistics_page
 
 
 class CompanyInformationData():
@@ -24,8 +25,9 @@ class CompanyInformationData():
         """
 
         try:
-            if self.connection.connect(r'https://finance.yahoo.com/quote/{}'.format(ticker)):
-                name = [x.text for x in self.connection.get_element('h1')]
+            response = self.connection.connect(r'https://finance.yahoo.com/quote/{}'.format(ticker))
+            if response:
+                name = [x.text for x in response.get_element('h1')]
                 if name:
                     names = name[0].split('-')
                     return [x.strip(' -') for x in names]
@@ -45,86 +47,10 @@ class CompanyInformationData():
             stats_output: The dictionary of company stat and value 
         """
     
-        # meterics to webscrape for companies 
-        METERICS = {'% Held by Insiders': 'heldPercentInsiders',
-                     '% Held by Institutions': 'heldPercentInstitutions',
-                     '52-Week Change': '52WeekChange',
-                     '5-Year Average Dividend Yield': 'fiveYearAvgDividendYield',
-                     '10-Day Average Volume': 'averageDailyVolume10Day',
-                     '3-Month Average Volume': 'averageDailyVolume3Month',
-                     'Beta': 'beta',
-                     'Book Value Per Share': 'bookValue',
-                     'Current Ratio': 'currentRatio',
-                     'Diluted EPS': 'trailingEps',
-                     'Dividend Date': 'dividendDate',
-                     'EBITDA': 'ebitda',
-                     'Enterprise Value': 'enterpriseValue',
-                     'Enterprise to EBITDA': 'enterpriseToEbitda',
-                     'Enterprise to Revenue': 'enterpriseToRevenue',
-                     'ExDividend Date': 'exDividendDate',
-                     'Fiscal Year End': 'lastFiscalYearEnd',
-                     'Float': 'floatShares',
-                     'Forward Annual Dividend Rate': 'dividendRate',
-                     'Forward Annual Dividend Yield': 'dividendYield',
-                     'Forward EPS': 'forwardEps',
-                     'Forward PE': 'forwardPE',
-                     'Gross Profit': 'grossProfits',
-                     'LastSplit Date': 'lastSplitDate',
-                     'Levered Free Cashflow': 'freeCashflow',
-                     'Market Capitalization': 'marketCap',
-                     'Most Recent Quarter': 'mostRecentQuarter',
-                     'Net Income Available to Common': 'netIncomeToCommon',
-                     'Operating Cashflow': 'operatingCashflow',
-                     'Operating Margin': 'operatingMargins',
-                     'PEG Ratio': 'pegRatio',
-                     'Payout Ratio': 'payoutRatio',
-                     'Price to Book': 'priceToBook',
-                     'Price to Sales': 'priceToSalesTrailing12Months',
-                     'Profit Margin': 'profitMargins',
-                     'Quaterly Revenue Growth': 'revenueGrowth',
-                     'Return on Assets': 'returnOnAssets',
-                     'Return on Equity': 'returnOnEquity',
-                     'Revenue': 'totalRevenue',
-                     'Revenue per Share': 'revenuePerShare',
-                     'Shares Outstanding': 'sharesOutstanding',
-                     'Shares Short': 'sharesShort',
-                     'Short% of Float': 'shortPercentOfFloat',
-                     'Short% of Shares Outstanding': 'sharesPercentSharesOut',
-                     'Short Ratio': 'shortRatio',
-                     'Total Cash': 'totalCash',
-                     'Total Cash Per Share': 'totalCashPerShare',
-                     'Total Debt': 'totalDebt',
-                     'Total Debt to Equity': 'debtToEquity',
-                     'Trailing Annual Dividend Rate': 'trailingAnnualDividendRate',
-                     'Trailing Annual Dividend Yield': 'trailingAnnualDividendYield',
-                     'Trailing PE': 'trailingPE'
-                  }
         try:
-            if self.connection.connect(r'https://ca.finance.yahoo.com/quote/{}/key-statistics'.format(ticker)):
-                body = self.connection.get_body()
-                data = str(body.find_all('script'))
-                values = data.split(r'"QuoteSummaryStore"')
-                
-                # check if the data needed exits within the scraped data 
-                stats_output = dict()
-                for key, val in METERICS.items():
-                    pattern = '"%s":{(.*?)}' % (val,)
-                    found_data = re.findall(pattern, values[1])
-                    
-                    if found_data:
-                        pattern2 = r'"fmt":(.*)'
-                        found_stats = re.findall(pattern2, found_data[0])
-                    else:
-                        found_stats = found_data
-                    
-                    if found_stats:
-                        final_stats_data =  found_stats[0].split(',', 1)[0]
-                        final_stats_data = final_stats_data.strip('""')
-                        stats_output[key] = final_stats_data
-                    else:
-                        value_none = 'NAN'
-                        stats_output[key] = value_none
-                return stats_output
+            response = self.connection.connect(r'https://ca.finance.yahoo.com/quote/{}/key-statistics'.format(ticker))
+            if response:
+                return parse_key_statistics_page(response.get_raw_data())
                         
             return False
         except Exception as e:
@@ -146,8 +72,9 @@ class CompanyInformationData():
         groups = {'Sector':"sector", 'Industry':"industry", 'Business Summary':"longBusinessSummary", 'Website':"website"}
         
         try:
-            if self.connection.connect(r'https://ca.finance.yahoo.com/quote/{}'.format(ticker)):
-                body = self.connection.get_body()
+            response = self.connection.connect(r'https://ca.finance.yahoo.com/quote/{}'.format(ticker))
+            if response:
+                body = response.get_body()
                 data = str(body.find_all('script'))
                 values = data.split(r'"summaryProfile"')
                 
@@ -244,12 +171,13 @@ class CompanyInformationData():
         try:
             financials_data_output = dict()
             for key, link in all_urls.items():
-                if self.connection.connect(link, headers=headers1):
-                    header = self.connection.get_element('div','class','D(tbhg)')
+                response = self.connection.connect(link, headers=headers1)
+                if response:
+                    header = response.get_element('div','class','D(tbhg)')
                     dates = [x.find_all('span') for x in header]
                     all_dates = dates[0] if len(dates) > 0 else None
                     
-                    rows_of_data = self.connection.get_element('div','data-test','fin-row')
+                    rows_of_data = response.get_element('div','data-test','fin-row')
                     columns_of_data = [row.find_all('span') for row in rows_of_data]
                     most_common_length = [len(x) for x in columns_of_data]
                     most_common_length = max(set(most_common_length), key=most_common_length.count)
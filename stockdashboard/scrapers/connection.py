@@ -1,177 +1,355 @@
+import os
+import json 
+import time
+import queue
+import threading
 import requests 
+import lxml.html
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup as soup
 from stockdashboard.scrapers.interfaces import EstablishConnectionInterface, ExtractDataInterface
-import json 
+from stockdashboard.scrapers.host_policy import CircuitOpenError
+from stockdashboard.scrapers.single_flight import SingleFlight, request_key
+
+# same default as the thread pools the scrapers are called from, one session per worker  
+DEFAULT_POOL_SIZE = min(32, (os.cpu_count() or 1) + 4)
+
+
+def xpath_class(name):
+    """
+    Get the xpath condition matching an element with the class, like the css selector .name  
+    
+    Parameters:
+        name: The class name 
+    
+    Returns:
+        condition: The xpath condition, i.e. for //div[condition]
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
 
-class EstablishConnectionByRequest(EstablishConnectionInterface, ExtractDataInterface):
+class ScrapedResponse(ExtractDataInterface):
     """
-    Connect to url using Request module 
+    The body of a completed request with the helpers to extract its data, every
+    request gets its own response so concurrent requests never share parse state
     Implements:
-        -EstablishConnection 
         -ExtractDataInterface
     """
-    
-    def __init__(self):
-        self.current_session = requests.Session()
-        self.response = None 
-        self.html = None
-        
-    def connect(self, url, *, json_data=None, payload=None, headers=None, 
-                credentials=None, query_string=None, timeout=30, stream=None):
+
+    def __init__(self, url, status, text):
+        self.url = url
+        self.status = status
+        self.text = text
+        self._page_soup = None
+        self._tree = None
+
+    def get_raw_data(self):
         """
-        Connect to webpage using request 'get'
+        Get the html result of the response 
         
-        Parameters:
-            url: The url of the page being requested 
-            payload: The body of the request 
-            headers: The headers data to pass with the request
-            credentials: The credentials passed to the request for basic authentication
-            query_string: The key/value pairs query string to pass with the request 
-            timeout: amount of seconds to wait for connection and read
-            stream: boolean, stream data, i.e. download media files 
-            
         Returns:
-            response, succesfull connection was made, False otherwise
+            text: the html data of the scraped resource
         """
-        try:
-             self.response = self.current_session.get(url, json=json_data, data=payload, 
-                                                      params=query_string, headers=headers, 
-                                                      auth=credentials, timeout=timeout, 
-                                                      stream=stream)
-             self.response.raise_for_status()
-             return self.response
-        except requests.exceptions.HTTPError as e:
-            print(f"\nEstablishConnectionByRequest.connect HTTP ERROR: {e}\n")
-            return False
-        except requests.exceptions.RequestException as e:
-            print(f"\nEstablishConnectionByRequest.connect REQUEST ERROR: {e}\n")
-            return False
-        except Exception as e:
-            print(f"\nEstablishConnectionByRequest.connect ERROR: {e}\n")
-            return False
-    
-    def connect_post(self, url, *, json_data=None, payload=None, headers=None, 
-                     credentials=None, query_string=None, timeout=30, stream=None):
+        return self.text
+
+    def _get_page_soup(self):
         """
-        Connect to webpage using request 'post'
+        Get the lxml result of the response, parsed once 
         
-        Parameters:
-            url: The url of the page being requested 
-            payload: The body of the request 
-            headers: The headers data to pass with the request
-            credentials: The credentials passed to the request for basic authentication
-            query_string: The key/value pairs query string to pass with the request
-            timeout: amount of seconds to wait for connection and read
-            stream: boolean, stream data, i.e. download media files 
-            
         Returns:
-            response, succesfull connection was made, False otherwise
+            page_soup: the ResultSet object of the scraped resource
         """
         try:
-             self.response = self.current_session.post(url, data=payload, json=json_data,
-                                                       params=query_string, headers=headers, 
-                                                       auth=credentials, timeout=timeout, 
-                                                       stream=stream)
-             self.response.raise_for_status()
-             return self.response
-        except requests.exceptions.HTTPError as e:
-            print(f"EstablishConnectionByRequest.connect_post HTTP ERROR: {e}")
-            return False
-        except requests.exceptions.RequestException as e:
-            print(f"EstablishConnectionByRequest.connect_post REQUEST ERROR: {e}")
-            return False
+            if self._page_soup is None:
+                self._page_soup = soup(self.text, 'lxml')
+            return self._page_soup
         except Exception as e:
-            print(f"EstablishConnectionByRequest.connect_post ERROR: {e}")
-            return False
-    
-    def close(self):
-        """
-        Close the request session connection
-        """
-        self.current_session.close()
-    
-    def get_raw_data(self):
+            print(f"ScrapedResponse._get_page_soup ERROR: {e}")
+            return None
+
+    def get_tree(self):
         """
-        Get the html result of the response 
+        Get the lxml.html document of the response, parsed once. It is built and 
+        searched many times faster than the BeautifulSoup tree, the hot extraction
+        paths use it through select 
         
         Returns:
-            self.html: the html data of the scraped resource
+            tree: the root HtmlElement of the scraped resource
         """
         try:
-            self.html = self.response.text
-            return self.html
+            if self._tree is None:
+                try:
+                    self._tree = lxml.html.document_fromstring(self.text)
+                except ValueError: # str with an xml encoding declaration 
+                    self._tree = lxml.html.document_fromstring(self.text.encode('utf-8'))
+            return self._tree
         except Exception as e:
-            print(f"EstablishConnectionByRequest.get_raw_data ERROR: {e}")
+            print(f"ScrapedResponse.get_tree ERROR: {e}")
             return None
-    
-    def _get_page_soup(self):
+
+    def select(self, xpath):
         """
-        Get the lxml result of the response 
+        Get the elements of the lxml.html document matching the xpath 
+        
+        Parameters:
+            xpath: The xpath of the elements, i.e. "//h4[{xpath_class('entry-title')}]//a"
         
         Returns:
-            page_soup: the ResultSet object of the scraped resource
+            elements: the list of matching HtmlElement
         """
         try:
-            page_soup = soup(self.get_raw_data(), 'lxml')
-            return page_soup
+            return self.get_tree().xpath(xpath)
         except Exception as e:
-            print(f"EstablishConnectionByRequest._get_page_soup ERROR: {e}")
+            print(f"ScrapedResponse.select ERROR: {e}")
             return None
 
     def get_body(self):
         """
-        Get the body data of the request 
+        Get the body data of the response 
         
         Returns:
             body: the html body of the webpage 
         """
         try:
-            page_soup = self._get_page_soup()
-            self.body = page_soup.body
-            return self.body
+            return self._get_page_soup().body
         except Exception as e:
-            print(f"EstablishConnectionByRequest.get_body ERROR: {e}")
+            print(f"ScrapedResponse.get_body ERROR: {e}")
             return None
-    
+
     def get_element(self, element, attribute=None, value=None):
         """
-        Get the element data of the request 
+        Get the element data of the response 
         
         Returns:
             element_data: the data from the element 
         """
         try:
-            page_soup = self._get_page_soup()
-            element_data = page_soup.find_all(element, {attribute: value})
-            return element_data
+            return self._get_page_soup().find_all(element, {attribute: value})
         except Exception as e:
-            print(f"EstablishConnectionByRequest.get_element ERROR: {e}")
+            print(f"ScrapedResponse.get_element ERROR: {e}")
             return None
-    
+
     def get_json_data(self, raw_data=None):
         """
         Get the html data in json format 
         
         Returns:
-            json_html: the data from the html in json format
+            json_data: the data from the html in json format
         """
         
         if raw_data is None:
-            raw_data = self.get_raw_data()
+            raw_data = self.text
             
         try:
-            json_data = json.loads(raw_data)
-            return json_data
+            return json.loads(raw_data)
         except Exception as e:
-            print(f"EstablishConnectionByRequest.get_json_data ERROR: {e}")
+            print(f"ScrapedResponse.get_json_data ERROR: {e}")
             return None
+
+
+class EstablishConnectionByRequest(EstablishConnectionInterface):
+    """
+    Connect to url using Request module, safe to share between threads. Each
+    request borrows a keep-alive session from a pool, so at most pool_size 
+    requests run at once, and returns its own ScrapedResponse. The GET requests
+    go through the HTTPCache when one is given, the requests that reach the network
+    are paced, retried and failed fast by the HostPolicy when one is given. Identical
+    GET requests in flight at the same time are sent once and share the response
+    Implements:
+        -EstablishConnection 
+    """
+    
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, pool_maxsize=10, cache=None, policy=None):
+        self.pool_size = pool_size
+        self.pool_maxsize = pool_maxsize
+        self.cache = cache if cache is not None and cache.enabled else None
+        self.policy = policy
+        self.flights = SingleFlight()
+        self._sessions = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        
+    def _new_session(self):
+        """
+        Create a session keeping up to pool_maxsize connections alive per host
+        
+        Returns:
+            session: the requests session
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_maxsize, pool_maxsize=self.pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def _acquire(self):
+        """
+        Borrow a session, a new one is created while the pool is not full, 
+        otherwise wait for one to be released 
+        
+        Returns:
+            session: the requests session
+        """
+        try:
+            return self._sessions.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.pool_size
+                if create:
+                    self._created += 1
+            if create:
+                return self._new_session()
+            return self._sessions.get()
     
+    def _release(self, session):
+        """
+        Return a borrowed session to the pool 
+        """
+        self._sessions.put(session)
     
+    def _send(self, method, url, **kwargs):
+        """
+        Send the request on a pooled session, the session is released before any backoff 
         
-
-
-
-
-
-
-    
\ No newline at end of file
+        Returns:
+            response: the requests response 
+        """
+        session = self._acquire()
+        try:
+            return session.request(method, url, **kwargs)
+        finally:
+            self._release(session)
+    
+    def _send_with_policy(self, method, url, **kwargs):
+        """
+        Send the request paced, retried and failed fast by the HostPolicy 
+        
+        Returns:
+            response: the requests response, the last one when the retries are exhausted 
+        """
+        if self.policy is None:
+            return self._send(method, url, **kwargs)
+        
+        host = self.policy.host(url)
+        attempt = 0
+        while True:
+            wait = self.policy.acquire(host)
+            if wait:
+                time.sleep(wait)
+            
+            try:
+                response = self._send(method, url, **kwargs)
+            except Exception as e:
+                delay = self.policy.failed(host, method, attempt, 
+                                           retryable=isinstance(e, requests.exceptions.ConnectionError) and not isinstance(e, requests.exceptions.Timeout))
+                if delay is None:
+                    raise
+            else:
+                delay = self.policy.completed(host, method, attempt, response.status_code, response.headers.get('Retry-After'))
+                if delay is None:
+                    return response
+            
+            attempt += 1
+            time.sleep(delay)
+    
+    def _request(self, method, url, *, json_data=None, payload=None, headers=None, 
+                 credentials=None, query_string=None, timeout=30):
+        """
+        Make the request on a pooled session and read the whole body 
+        
+        Returns:
+            response: the ScrapedResponse, False if the request failed 
+        """
+        cache_key = entry = None
+        if self.cache and method == 'GET':
+            cache_key = self.cache.key(url, query_string)
+            entry, fresh = self.cache.lookup(cache_key)
+            if fresh:
+                return ScrapedResponse(entry['url'], entry['status'], entry['text'])
+            if self.cache.mode == 'replay':
+                print(f"\nEstablishConnectionByRequest.{method.lower()} REPLAY ERROR: {url} was not recorded\n")
+                return False
+            headers = self.cache.revalidation_headers(entry, headers)
+        
+        try:
+            response = self._send_with_policy(method, url, json=json_data, data=payload, 
+                                              params=query_string, headers=headers, 
+                                              auth=credentials, timeout=timeout)
+            if cache_key and entry and response.status_code == 304:
+                self.cache.refresh(cache_key, entry)
+                return ScrapedResponse(entry['url'], entry['status'], entry['text'])
+            
+            response.raise_for_status()
+            if cache_key:
+                self.cache.set(cache_key, response.url, response.status_code, response.text,
+                               response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return ScrapedResponse(response.url, response.status_code, response.text)
+        except CircuitOpenError as e:
+            print(f"\nEstablishConnectionByRequest.{method.lower()} CIRCUIT OPEN: {e}\n")
+            return False
+        except requests.exceptions.HTTPError as e:
+            print(f"\nEstablishConnectionByRequest.{method.lower()} HTTP ERROR: {e}\n")
+            return False
+        except requests.exceptions.RequestException as e:
+            print(f"\nEstablishConnectionByRequest.{method.lower()} REQUEST ERROR: {e}\n")
+            return False
+        except Exception as e:
+            print(f"\nEstablishConnectionByRequest.{method.lower()} ERROR: {e}\n")
+            return False
+        
+    def connect(self, url, *, json_data=None, payload=None, headers=None, 
+                credentials=None, query_string=None, timeout=30):
+        """
+        Connect to webpage using request 'get'
+        
+        Parameters:
+            url: The url of the page being requested 
+            payload: The body of the request 
+            headers: The headers data to pass with the request
+            credentials: The credentials passed to the request for basic authentication
+            query_string: The key/value pairs query string to pass with the request 
+            timeout: amount of seconds to wait for connection and read
+            
+        Returns:
+            response, the ScrapedResponse if a succesfull connection was made, False otherwise
+        """
+        if json_data is None and payload is None and credentials is None: 
+            response = self.flights.do(request_key('GET', url, query_string, headers), 
+                                       lambda: self._request('GET', url, headers=headers, query_string=query_string, timeout=timeout))
+            # every caller gets its own response, the parsed pages are not shared between threads 
+            return ScrapedResponse(response.url, response.status, response.text) if response else response
+        
+        return self._request('GET', url, json_data=json_data, payload=payload, headers=headers, 
+                             credentials=credentials, query_string=query_string, timeout=timeout)
+    
+    def connect_post(self, url, *, json_data=None, payload=None, headers=None, 
+                     credentials=None, query_string=None, timeout=30):
+        """
+        Connect to webpage using request 'post'
+        
+        Parameters:
+            url: The url of the page being requested 
+            payload: The body of the request 
+            headers: The headers data to pass with the request
+            credentials: The credentials passed to the request for basic authentication
+            query_string: The key/value pairs query string to pass with the request
+            timeout: amount of seconds to wait for connection and read
+            
+        Returns:
+            response, the ScrapedResponse if a succesfull connection was made, False otherwise
+        """
+        return self._request('POST', url, json_data=json_data, payload=payload, headers=headers, 
+                             credentials=credentials, query_string=query_string, timeout=timeout)
+    
+    def close(self):
+        """
+        Close the idle pooled sessions and their connections
+        """
+        while True:
+            try:
+                session = self._sessions.get_nowait()
+            except queue.Empty:
+                break
+            session.close()
+            with self._lock:
+                self._created -= 1
@@ -56,9 +56,10 @@ class EndOfDayData():
         self.url = 'https://ca.finance.yahoo.com/quote/{}/history?period1={}&period2={}&interval=1d&filter=history&frequency=1d'.format(self.ticker, self.start, self.end)
         
         try:
-            if self.connection.connect(self.url):
+            response = self.connection.connect(self.url)
+            if response:
                 eod_data_list = list()
-                body = self.connection.get_body()
+                body = response.get_body()
                 data = str(body.find_all('script'))
                 parsed_data_list = re.findall(r'"HistoricalPriceStore":(.*)\]?', data)
                 for parsed_data in parsed_data_list:
@@ -94,8 +95,9 @@ class EndOfDayData():
         if ticker is None:
             ticker = self.ticker
         try:
-            if self.connection.connect('https://ca.finance.yahoo.com/quote/{}'.format(ticker)):
-                body = self.connection.get_body()
+            response = self.connection.connect('https://ca.finance.yahoo.com/quote/{}'.format(ticker))
+            if response:
+                body = response.get_body()
                 prices = [x.find_all('span',{'data-reactid':'14'}) for x in body.find_all('div',{'data-reactid':'13'})]
                 current_price = prices[0][0].text if len(prices) > 0 else None
                 
@@ -0,0 +1,140 @@
+import numpy as np
+
+from stockdashboard.signals.eod_arrays import PRICE_COLUMNS
+
+
+class EODColumns():
+    """
+    Columnar end of day data from the Yahoo chart API, an int64 array of unix
+    timestamps and one float64 array per price column. Missing values are NaN
+    instead of 0, the rows with a missing price can be found with missing/complete
+    """
+
+    def __init__(self, timestamps, columns):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.columns = {name: np.asarray(values, dtype=float) for name, values in columns.items()}
+
+    @classmethod
+    def from_chart_json(cls, json_data):
+        """
+        Create the columns from the json of the chart API, every field is converted
+        to an array once, None becomes NaN
+
+        Parameters:
+            json_data: The json data of the chart API response
+
+        Returns:
+            eod_columns: The EODColumns, None if the response has no quote
+        """
+
+        result = json_data['chart']['result'][0]
+        indicators = result['indicators']
+        quote = indicators['quote'][0]
+        if not quote:
+            return None
+
+        columns = {'Open': quote['open'], 'High': quote['high'], 'Low': quote['low'],
+                   'Close': quote['close'], 'Volume': quote['volume']}
+        if indicators.get('adjclose'):
+            columns['AdjClose'] = indicators['adjclose'][0]['adjclose']
+        columns = {name: np.array(values, dtype=float) for name, values in columns.items()}
+
+        try:
+            timestamps = np.fromiter(result['timestamp'], dtype=np.int64, count=len(result['timestamp']))
+        except TypeError: # a bar without a timestamp can not be dated, it is dropped
+            timestamps = np.array(result['timestamp'], dtype=float)
+            dated = ~np.isnan(timestamps)
+            return cls(timestamps[dated], {name: values[dated] for name, values in columns.items()})
+
+        return cls(timestamps, columns)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def dates(self):
+        """
+        Get the UTC dates of the bars as a numpy datetime64[D] array
+        """
+
+        return self.timestamps.astype('datetime64[s]').astype('datetime64[D]')
+
+    @property
+    def missing(self):
+        """
+        Get the dictionary of column and boolean mask of the missing values
+        """
+
+        return {name: np.isnan(values) for name, values in self.columns.items()}
+
+    @property
+    def complete(self):
+        """
+        Get the boolean mask of the bars with every value
+        """
+
+        complete = np.ones(len(self), dtype=bool)
+        for mask in self.missing.values():
+            complete &= ~mask
+        return complete
+
+    def filter(self, mask):
+        """
+        Get the bars selected by a mask
+
+        Parameters:
+            mask: The boolean mask, or index array, of the bars to keep
+
+        Returns:
+            eod_columns: The EODColumns of the selected bars
+        """
+
+        return EODColumns(self.timestamps[mask], {name: values[mask] for name, values in self.columns.items()})
+
+    def to_rows(self, fill=0):
+        """
+        Get the bars as the list of tuples returned by the row based scrapers
+
+        Parameters:
+            fill: The value of the missing values
+
+        Returns:
+            eod_data: The list of tuple of the timestamp followed by the columns
+        """
+
+        columns = [np.where(np.isnan(values), fill, values).tolist() for values in self.columns.values()]
+        return list(zip(self.timestamps.tolist(), *columns))
+
+    def to_eod_arrays(self):
+        """
+        Get the complete bars in the format of signals.eod_arrays.eod_to_arrays, for the indicator engine
+
+        Returns:
+            dates: The numpy datetime64[D] array of the dates
+            prices: The dictionary of price column and float64 array
+        """
+
+        complete = self.filter(self.complete)
+        return complete.dates, {column: complete.columns[column] for column in PRICE_COLUMNS if column in complete.columns}
+
+    def to_db_rows(self, ticker):
+        """
+        Get the complete bars as Daily_Price column values, converted to python types once per column
+
+        Parameters:
+            ticker: The ticker symbol of the security
+
+        Returns:
+            rows: The list of dictionaries of Daily_Price column and value
+        """
+
+        complete = self.filter(self.complete)
+        dates = complete.dates.tolist() # datetime.date objects
+        columns = {name: values.tolist() for name, values in complete.columns.items()}
+
+        return [{'date': date, 'open_price': open_price, 'high_price': high_price, 'low_price': low_price,
+                 'close_price': close_price, 'daily_volume': volume, 'adjusted_close_price': adjclose,
+                 'security_ticker': ticker}
+                for date, open_price, high_price, low_price, close_price, volume, adjclose
+                in zip(dates, columns['Open'], columns['High'], columns['Low'], columns['Close'],
+                       columns['Volume'], columns['AdjClose'])]
@@ -1,5 +1,7 @@
+import asyncio
 import concurrent.futures
-from stockdashboard.scrapers.connection import EstablishConnectionByRequest
+from stockdashboard.scrapers.connection import EstablishConnectionByRequest, xpath_class
+from stockdashboard.scrapers.async_connection import EstablishConnectionByAiohttp
 
 
 class FinancialNewsData():
@@ -7,8 +9,13 @@ class FinancialNewsData():
     Web scrape the current financial news from different sources
     """
     
-    def __init__(self):
-        self.connection = EstablishConnectionByRequest()
+    MARKET_TERMS = ["DJIA","VIX","S&P/TSX","NASDAQ","RUSSELL 2000", "bonds"]
+    FINANCIAL_POST_CATEGORIES = ['', 'economy', 'fp-street', 'retail-marketing', 'telecom', 'transportation', 'real-estate', 'commodities']
+    MARKETWATCH_URL = r'https://www.marketwatch.com/'
+    BUSINESS_INSIDER_URL = r'http://markets.businessinsider.com/'
+    
+    def __init__(self, connection=None):
+        self.connection = connection if connection else EstablishConnectionByRequest()
         
         
     def get_google_news(self, term):
@@ -23,40 +30,83 @@ class FinancialNewsData():
         """
         
         try:
-            if self.connection.connect(r'https://finance.yahoo.com/quote/{}'.format(term)):
-                search = [term + " stock market"]
-                title = [x.text for x in self.connection.get_element('h1')]
-                
-                if title:
-                    search += title
+            response = self.connection.connect(r'https://finance.yahoo.com/quote/{}'.format(term))
+            if response:
+                search = self._google_news_searches(term, response)
                     
                 seen_urls = list()
                 news_links = dict()
                 for s in search:
-                    if self.connection.connect(r"https://www.google.com/search?hl=en&q={0}&tbm=nws&source=univ".format(s)):
-                        data_header = self.connection.get_element('div','class','kCrYT')                        
-                        for idx, data in enumerate(data_header):
-                            data_text = data.find('div', {'class': 'BNeawe vvjwJb AP7Wnd'})
-                            header_text = term + " News"
-                            
-                            if data_text:
-                                header_text = data_text.text
-                            
-                            link = data.find('a')
-                            if link:
-                                news_link = link['href'].lstrip('/url?q=').split('&')
-                                
-                            if len(news_link) > 0:
-                                if news_link[0] not in seen_urls:
-                                    seen_urls.append(news_link[0])
-                                    header_text = header_text.replace('â\x80\x99', "'")
-                                    news_links[header_text] = news_link[0]    
+                    result = self.connection.connect(self._google_news_url(s))
+                    if result:
+                        self._parse_google_news(term, result, seen_urls, news_links)
                 return news_links
                 
             return False
         except Exception as e:
             print("YAHOO FIN NEWS SCRAPE - GOOGLE:", e)
             return False
+    
+    def _google_news_searches(self, term, response):
+        """
+        Get the Google News searches for the term, the term and the quote page title 
+        
+        Parameters:
+            term: The term to get news about
+            response: The ScrapedResponse of the quote page of the term 
+    
+        Returns:
+            search: The list of searches 
+        """
+        
+        search = [term + " stock market"]
+        title = [x.text_content() for x in response.select('//h1')]
+        
+        if title:
+            search += title
+        
+        return search
+    
+    def _google_news_url(self, search):
+        """
+        Get the Google News url of the search
+        
+        Parameters:
+            search: The search terms
+    
+        Returns:
+            url: The url of the search results 
+        """
+        
+        return r"https://www.google.com/search?hl=en&q={0}&tbm=nws&source=univ".format(search)
+    
+    def _parse_google_news(self, term, response, seen_urls, news_links):
+        """
+        Parse the Google News results of a search, the links not seen yet are added to news_links 
+        
+        Parameters:
+            term: The term to get news about
+            response: The ScrapedResponse of the search 
+            seen_urls: The list of the links already added, updated in place
+            news_links: The dictionary of news article headers and links, updated in place
+        """
+        
+        for idx, data in enumerate(response.select(f"//div[{xpath_class('kCrYT')}]")):
+            data_text = data.xpath(".//div[@class='BNeawe vvjwJb AP7Wnd']")
+            header_text = term + " News"
+            
+            if data_text:
+                header_text = data_text[0].text_content()
+            
+            link = data.xpath('.//a')
+            if link:
+                news_link = link[0].attrib['href'].lstrip('/url?q=').split('&')
+                
+            if len(news_link) > 0:
+                if news_link[0] not in seen_urls:
+                    seen_urls.append(news_link[0])
+                    header_text = header_text.replace('â\x80\x99', "'")
+                    news_links[header_text] = news_link[0]    
 
     def get_market_news(self):
         """
@@ -66,29 +116,41 @@ class FinancialNewsData():
             market_news: The dictionary of all the market news and links
         """
         try:
-            markets_terms = ["DJIA","VIX","S&P/TSX","NASDAQ","RUSSELL 2000", "bonds"]
-            
-            market_news = dict()
-            seen_market_news = set()
             finished = []
             
             with concurrent.futures.ThreadPoolExecutor() as executer:
-                results = [executer.submit(self.get_google_news, terms) for terms in markets_terms]
+                results = [executer.submit(self.get_google_news, terms) for terms in self.MARKET_TERMS]
             
                 for f in concurrent.futures.as_completed(results):
                     finished.append(f.result())
             
-            for news in finished:
-                for key, value in news.items():
-                    if key not in seen_market_news:
-                        market_news[key] = news[key]
-                        seen_market_news.add(key)
-                        
-            return market_news
+            return self._merge_news(finished)
         except Exception as e:
                 print("YAHOO FIN NEWS SCRAPE - MARKET NEWS:", e)
                 return False
     
+    def _merge_news(self, finished):
+        """
+        Merge the news of many terms, keeping the first link of every header  
+        
+        Parameters:
+            finished: The list of dictionaries of news article headers and links 
+        
+        Returns:
+            market_news: The dictionary of all the news and links
+        """
+        
+        market_news = dict()
+        seen_market_news = set()
+        
+        for news in finished:
+            for key, value in news.items():
+                if key not in seen_market_news:
+                    market_news[key] = news[key]
+                    seen_market_news.add(key)
+                    
+        return market_news
+    
     
     def get_marketwatch_news(self):
         """
@@ -98,25 +160,36 @@ class FinancialNewsData():
             market_news: The dictionary of the headlines and links from Marketwatch
         """
         try:
-            if self.connection.connect(r'https://www.marketwatch.com/'):
-                body = self.connection.get_body()
-                found_links = [link.get('href') for link in body.find_all('a', {'class':'link'})]
-                link_title = [x.text for x in body.find_all('a', {'class':'link'})] 
-            
-                market_news = dict()
-                for link, title in zip(found_links, link_title):
-                    if link and link.startswith(r'https://www.marketwatch.com/story/'):
-                        title = title.strip()
-                        title = ' '.join(title.split())
-                        title = title.replace('â\x80\x99', "'")
-                        market_news[title] = link
-                
-                return market_news
+            response = self.connection.connect(self.MARKETWATCH_URL)
+            if response:
+                return self._parse_marketwatch_news(response)
             return False
         except Exception as e:
             print("YAHOO FIN NEWS SCRAPE - MARKETWATCH NEWS:", e)
             return False
     
+    def _parse_marketwatch_news(self, response):
+        """
+        Parse the headlines and links from the Marketwatch home page
+        
+        Parameters:
+            response: The ScrapedResponse of the page 
+        
+        Returns:
+            market_news: The dictionary of the headlines and links from Marketwatch
+        """
+        
+        market_news = dict()
+        for a in response.select(f"//body//a[{xpath_class('link')}]"):
+            link, title = a.get('href'), a.text_content()
+            if link and link.startswith(r'https://www.marketwatch.com/story/'):
+                title = title.strip()
+                title = ' '.join(title.split())
+                title = title.replace('â\x80\x99', "'")
+                market_news[title] = link
+        
+        return market_news
+    
     
     def get_business_insider_news(self):
         """
@@ -127,28 +200,38 @@ class FinancialNewsData():
         """
         
         try:
-            if self.connection.connect(r'http://markets.businessinsider.com/'):
-                body = self.connection.get_body()
-                found_links = [link.get('href') for link in body.find_all('a', {'class':'teaser-headline'})]
-                found_headlines = [x.text for x in body.find_all('a', {'class':'teaser-headline'})]
-                
-                
-                business_insider_news = dict()
-                already_seen = list()
-                for link, headline in zip(found_links, found_headlines):
-                    
-                    if headline not in already_seen:
-                        link = 'http://markets.businessinsider.com{}'.format(link)
-                        headline = headline.replace('â\x80\x99', "'")
-                        business_insider_news[headline] = link
-                        already_seen.append(headline)
-                    
-                return business_insider_news
+            response = self.connection.connect(self.BUSINESS_INSIDER_URL)
+            if response:
+                return self._parse_business_insider_news(response)
                 
             return False
         except Exception as e:
             print("YAHOO FIN NEWS SCRAPE - BUSINESS INSIDER NEWS:", e)
             return False
+    
+    def _parse_business_insider_news(self, response):
+        """
+        Parse the headlines and links from the Business Insider markets page
+        
+        Parameters:
+            response: The ScrapedResponse of the page 
+        
+        Returns:
+            business_insider_news: The dictionary of the headlines and links from Business Insider
+        """
+        
+        business_insider_news = dict()
+        already_seen = set()
+        for a in response.select(f"//body//a[{xpath_class('teaser-headline')}]"):
+            link, headline = a.get('href'), a.text_content()
+            
+            if headline not in already_seen:
+                link = 'http://markets.businessinsider.com{}'.format(link)
+                headline = headline.replace('â\x80\x99', "'")
+                business_insider_news[headline] = link
+                already_seen.add(headline)
+            
+        return business_insider_news
         
     
     def get_financial_post_news_helper(self, news_category):
@@ -162,29 +245,44 @@ class FinancialNewsData():
             news: The dictionary of the headlines and links from Financial Post
         """
         try:
-            if self.connection.connect(r'https://business.financialpost.com/category/news/{}'.format(news_category)):
-                body = self.connection.get_body()
-                links = [x.find_all("a") for x in body.find_all('h4', {'class':'entry-title'})] 
-                links2 = [x.find_all("a") for x in body.find_all('h2', {'class':'entry-title'})] 
-            
-                news = dict()    
-                for link in links:
-                    for href in link:
-                        h4_text = href.text
-                        h4_text = h4_text.replace('â\x80\x99', "'")
-                        news[href.text] = href.get("href")
-                
-                for link in links2:
-                    for href in link:
-                        h2_text = href.text
-                        h2_text = h2_text.replace('â\x80\x99', "'")
-                        news[href.text] = href.get("href")
-        
-                return news  
+            response = self.connection.connect(self._financial_post_url(news_category))
+            if response:
+                return self._parse_financial_post_news(response)
             return False
         except Exception as e:
             print("YAHOO FIN NEWS SCRAPE - FINANCIAL POST NEWS:", e)
             return False
+    
+    def _financial_post_url(self, news_category):
+        """
+        Get the url of a Financial Post news category 
+        
+        Parameters:
+            news_category: The category to get the headlines and links from 
+        
+        Returns:
+            url: The url of the category page
+        """
+        
+        return r'https://business.financialpost.com/category/news/{}'.format(news_category)
+    
+    def _parse_financial_post_news(self, response):
+        """
+        Parse the headlines and links from a Financial Post category page
+        
+        Parameters:
+            response: The ScrapedResponse of the page 
+        
+        Returns:
+            news: The dictionary of the headlines and links from Financial Post
+        """
+        
+        news = dict()    
+        for heading in ('h4', 'h2'):
+            for href in response.select(f"//body//{heading}[{xpath_class('entry-title')}]//a"):
+                news[href.text_content()] = href.get("href")
+
+        return news  
         
         
     
@@ -196,11 +294,9 @@ class FinancialNewsData():
             fin_post_news: The dictionary of all the market news from Financial Post
         """
         
-        categories = ['', 'economy', 'fp-street', 'retail-marketing', 'telecom', 'transportation', 'real-estate', 'commodities']
-        
         fin_post_news = {}
         with concurrent.futures.ThreadPoolExecutor() as executer:
-            results = [executer.submit(self.get_financial_post_news_helper, category) for category in categories]
+            results = [executer.submit(self.get_financial_post_news_helper, category) for category in self.FINANCIAL_POST_CATEGORIES]
         
             for f in concurrent.futures.as_completed(results):
                 fin_post_news.update(f.result())
@@ -211,3 +307,138 @@ class FinancialNewsData():
         self.connection.close()
 
 
+class AsyncFinancialNewsData(FinancialNewsData):
+    """
+    Web scrape the current financial news from different sources, all the requests
+    are made concurrently from one event loop over kept alive connections
+    """
+    
+    def __init__(self, connection=None):
+        self.connection = connection if connection else EstablishConnectionByAiohttp()
+    
+    
+    async def get_google_news(self, term):
+        """
+        Web scrape the current news from Google using the term, the searches are made concurrently 
+        
+        Parameters:
+            term: The term to get news about
+    
+        Returns:
+            news_links: The dictionary of news article headers and links 
+        """
+        
+        try:
+            response = await self.connection.connect(r'https://finance.yahoo.com/quote/{}'.format(term))
+            if response:
+                search = self._google_news_searches(term, response)
+                results = await asyncio.gather(*[self.connection.connect(self._google_news_url(s)) for s in search])
+                
+                seen_urls = list()
+                news_links = dict()
+                for result in results:
+                    if result:
+                        self._parse_google_news(term, result, seen_urls, news_links)
+                return news_links
+                
+            return False
+        except Exception as e:
+            print("YAHOO FIN NEWS SCRAPE - GOOGLE:", e)
+            return False
+    
+    async def get_market_news(self):
+        """
+        Use the get_google_news to get the market news of all the terms concurrently 
+        
+        Returns:
+            market_news: The dictionary of all the market news and links
+        """
+        try:
+            finished = await asyncio.gather(*[self.get_google_news(terms) for terms in self.MARKET_TERMS])
+            return self._merge_news([news for news in finished if news])
+        except Exception as e:
+                print("YAHOO FIN NEWS SCRAPE - MARKET NEWS:", e)
+                return False
+    
+    async def get_marketwatch_news(self):
+        """
+        Web scrape the current news from Marketwatch
+        
+        Returns:
+            market_news: The dictionary of the headlines and links from Marketwatch
+        """
+        try:
+            response = await self.connection.connect(self.MARKETWATCH_URL)
+            if response:
+                return self._parse_marketwatch_news(response)
+            return False
+        except Exception as e:
+            print("YAHOO FIN NEWS SCRAPE - MARKETWATCH NEWS:", e)
+            return False
+    
+    async def get_business_insider_news(self):
+        """
+        Web scrape the current news from Business Insider
+        
+        Returns:
+            business_insider_news: The dictionary of the headlines and links from Business Insider
+        """
+        
+        try:
+            response = await self.connection.connect(self.BUSINESS_INSIDER_URL)
+            if response:
+                return self._parse_business_insider_news(response)
+            return False
+        except Exception as e:
+            print("YAHOO FIN NEWS SCRAPE - BUSINESS INSIDER NEWS:", e)
+            return False
+    
+    async def get_financial_post_news_helper(self, news_category):
+        """
+        Web scrape the headlines and links of one Financial Post category 
+        
+        Parameters:
+            news_category: The category to get the headlines and links from 
+        
+        Returns:
+            news: The dictionary of the headlines and links from Financial Post
+        """
+        try:
+            response = await self.connection.connect(self._financial_post_url(news_category))
+            if response:
+                return self._parse_financial_post_news(response)
+            return False
+        except Exception as e:
+            print("YAHOO FIN NEWS SCRAPE - FINANCIAL POST NEWS:", e)
+            return False
+    
+    async def get_financial_post_news(self):
+        """
+        Web scrape the current news from Financial Post, the categories are requested concurrently
+        
+        Returns:
+            fin_post_news: The dictionary of all the market news from Financial Post
+        """
+        
+        fin_post_news = {}
+        results = await asyncio.gather(*[self.get_financial_post_news_helper(category) for category in self.FINANCIAL_POST_CATEGORIES])
+        
+        for news in results:
+            if news:
+                fin_post_news.update(news)
+        
+        return fin_post_news
+    
+    async def get_all_news(self):
+        """
+        Web scrape the market, Marketwatch, Business Insider and Financial Post news concurrently
+        
+        Returns:
+            all_news: The list of the market, Marketwatch, Business Insider and Financial Post news 
+        """
+        
+        return list(await asyncio.gather(self.get_market_news(), self.get_marketwatch_news(),
+                                         self.get_business_insider_news(), self.get_financial_post_news()))
+    
+    async def clean_up(self):
+        await self.connection.close()
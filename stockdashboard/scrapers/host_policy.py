@@ -0,0 +1,301 @@
+import re
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+
+# (host pattern, requests per second, burst) the first matching pattern sets the pace of a host
+DEFAULT_RATES = (
+    (r'(^|\.)finance\.yahoo\.com$', 4, 8),   # quote, chart and quoteSummary APIs, query1/query2/ca
+    (r'(^|\.)google\.com$', 0.5, 2),         # google news searches are blocked quickly
+    (r'', 2, 4),                             # news pages
+)
+
+# responses telling the client to back off, the request can be sent again
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+THROTTLE_STATUSES = (429, 503)
+
+# only these are sent again, a POST could be applied twice
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to a host while its circuit is open
+    """
+
+    def __init__(self, host):
+        super().__init__(f"{host} is failing, the request was not sent")
+        self.host = host
+
+
+class TokenBucket():
+    """
+    Pace the requests to one host, up to burst requests at once then rate per second
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self):
+        """
+        Take a token, the tokens can go negative so concurrent callers queue in order
+
+        Returns:
+            wait: The seconds to wait before sending the request
+        """
+
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds):
+        """
+        Hold the next request for at least seconds, i.e. for the Retry-After of the host
+
+        Parameters:
+            seconds: The number of seconds
+        """
+
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class CircuitBreaker():
+    """
+    Stop sending requests to a host after failure_threshold consecutive failures. After
+    reset_timeout seconds one request is let through, its outcome closes or reopens the circuit
+
+    States:
+        closed: the requests are sent
+        open: the requests fail fast
+        half-open: one probe request is in flight, the others fail fast
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        """
+        Check if a request can be sent, the first call after reset_timeout becomes the probe,
+        a probe that never reported its outcome is replaced after reset_timeout
+
+        Returns:
+            Boolean: True if the request can be sent
+        """
+
+        if self.state == 'closed':
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = 'half-open'
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def success(self):
+        self.state = 'closed'
+        self.failures = 0
+
+    def failure(self):
+        """
+        Count a failure
+
+        Returns:
+            Boolean: True if the circuit was opened by this failure
+        """
+
+        self.failures += 1
+        if self.state == 'half-open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+
+class HostPolicy():
+    """
+    Per host pacing, retries and circuit breaking shared by the scraper connections.
+
+    Every request takes a token from the bucket of its host and waits when the host is
+    paced. A GET failing with a connection error or a RETRY_STATUSES response is sent
+    again after a jittered exponential backoff, or after the Retry-After of the server.
+    A host failing failure_threshold times in a row is not contacted for reset_timeout
+    seconds, its requests fail at once instead of waiting out the timeout.
+
+    The connections call acquire before sending, then completed or failed, and sleep
+    the returned seconds themselves so the policy works for threads and coroutines.
+    """
+
+    def __init__(self, rates=DEFAULT_RATES, retries=2, backoff=0.5, max_backoff=8,
+                 failure_threshold=5, reset_timeout=30):
+        self.rates = [(re.compile(pattern), rate, burst) for pattern, rate, burst in rates]
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.paced = 0
+        self.throttled = 0
+        self.retried = 0
+        self.circuits_opened = 0
+        self.rejected = 0
+        self._buckets = dict()
+        self._circuits = dict()
+        self._lock = threading.Lock()
+
+    def host(self, url):
+        """
+        Get the host of a url
+
+        Parameters:
+            url: The url of the request
+
+        Returns:
+            host: The lower case host name
+        """
+
+        return (urlsplit(url).hostname or '').lower()
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            rate, burst = next(((rate, burst) for pattern, rate, burst in self.rates if pattern.search(host)), (2, 4))
+            self._buckets[host] = TokenBucket(rate, burst)
+        return self._buckets[host]
+
+    def _circuit(self, host):
+        if host not in self._circuits:
+            self._circuits[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self._circuits[host]
+
+    def acquire(self, host):
+        """
+        Get the permission to send a request to a host
+
+        Parameters:
+            host: The host of the request
+
+        Returns:
+            wait: The seconds to wait before sending the request
+
+        Raises:
+            CircuitOpenError: The circuit of the host is open
+        """
+
+        with self._lock:
+            if not self._circuit(host).allow():
+                self.rejected += 1
+                raise CircuitOpenError(host)
+
+            wait = self._bucket(host).reserve()
+            if wait:
+                self.paced += 1
+            return wait
+
+    def completed(self, host, method, attempt, status, retry_after=None):
+        """
+        Record a response
+
+        Parameters:
+            host: The host of the request
+            method: The http method of the request
+            attempt: The number of retries already made
+            status: The http status of the response
+            retry_after: The Retry-After header of the response
+
+        Returns:
+            delay: The seconds to wait before sending the request again, None to keep the response
+        """
+
+        if status not in RETRY_STATUSES:
+            with self._lock:
+                self._circuit(host).success()
+            return None
+
+        retry_after = _retry_after_seconds(retry_after)
+        with self._lock:
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                if retry_after:
+                    self._bucket(host).pause(retry_after)
+            return self._failure(host, method, attempt, retry_after=retry_after)
+
+    def failed(self, host, method, attempt, retryable=True):
+        """
+        Record a request that got no response
+
+        Parameters:
+            host: The host of the request
+            method: The http method of the request
+            attempt: The number of retries already made
+            retryable: False if the error must not be retried, i.e. a timeout already took too long
+
+        Returns:
+            delay: The seconds to wait before sending the request again, None to give up
+        """
+
+        with self._lock:
+            return self._failure(host, method, attempt, retryable=retryable)
+
+    def _failure(self, host, method, attempt, retryable=True, retry_after=None):
+        """
+        Count a failure of the host and choose the backoff, called with the lock held
+
+        Returns:
+            delay: The seconds to wait before sending the request again, None to give up
+        """
+
+        circuit = self._circuit(host)
+        if circuit.failure():
+            self.circuits_opened += 1
+
+        if not retryable or method not in IDEMPOTENT_METHODS or attempt >= self.retries or circuit.state != 'closed':
+            return None
+        if retry_after is not None and retry_after > self.max_backoff: # waiting would take longer than failing
+            return None
+
+        self.retried += 1
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)) # full jitter
+        return max(delay, retry_after or 0)
+
+    def stats(self):
+        """
+        Get the counters of the policy
+
+        Returns:
+            stats: The dictionary of paced, throttled, retried, circuits_opened and rejected
+                   requests and the list of hosts with an open circuit
+        """
+
+        with self._lock:
+            return {'paced': self.paced, 'throttled': self.throttled, 'retried': self.retried,
+                    'circuits_opened': self.circuits_opened, 'rejected': self.rejected,
+                    'open_circuits': sorted(host for host, circuit in self._circuits.items() if circuit.state != 'closed')}
+
+
+def _retry_after_seconds(value):
+    """
+    Parse the seconds form of a Retry-After header
+
+    Parameters:
+        value: The header value
+
+    Returns:
+        seconds: The number of seconds, None if missing or an http date
+    """
+
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,286 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import collections
+
+# 256 MB of pages kept on disk
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# (url pattern, seconds) the first matching pattern sets how long a page is served without asking the server
+DEFAULT_TTLS = (
+    (r'/v1/finance/quoteType/', 7 * 24 * 3600),                    # company name
+    (r'/v10/finance/quoteSummary/.*modules=defaultKeyStatistics', 3600), # company stats, alone or first in the fundamentals
+    (r'/v10/finance/quoteSummary/.*modules=summaryProfile', 24 * 3600), # business summary
+    (r'/v10/finance/quoteSummary/.*modules=incomeStatementHistory', 24 * 3600), # financial statements
+    (r'/key-statistics', 3600),                                    # company stats
+    (r'/v8/finance/chart/.*interval=1d', 900),                     # end of day history
+    (r'/v8/finance/chart/', 60),                                   # intraday history
+    (r'//finance\.yahoo\.com/quote/[^/?]+$', 24 * 3600),           # quote page h1 used for the news searches
+    (r'//ca\.finance\.yahoo\.com/quote/[^/?]+$', 60),              # quote page current price
+    (r'google\.com/search', 900),                                  # google news
+    (r'marketwatch\.com|businessinsider\.com|financialpost\.com', 600), # news pages
+)
+
+CACHE_MODES = ('cache', 'record', 'replay', 'off')
+
+
+class HTTPCache():
+    """
+    On-disk cache of GET responses shared by the scraper connections.
+
+    Pages are served without a request while younger than the ttl of their url
+    pattern, after that they are revalidated with If-None-Match/If-Modified-Since
+    when the server sent an ETag/Last-Modified. The store is limited to max_bytes,
+    the least recently used pages are evicted first.
+
+    Modes:
+        cache: the default behaviour described above
+        record: always download and store every page, i.e. to build fixtures
+        replay: only serve stored pages, never connect, i.e. to run offline from fixtures
+        off: the cache is not used
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, ttls=DEFAULT_TTLS, mode='cache'):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"mode must be one of {CACHE_MODES}, got {mode!r}")
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = [(re.compile(pattern), seconds) for pattern, seconds in ttls]
+        self.mode = mode
+        self.total_bytes = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def _load_index(self):
+        """
+        Build the LRU order of the stored pages from their access times
+        """
+
+        stored = list()
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                stored.append((stat.st_mtime, name[:-len('.json')], stat.st_size))
+
+        for _, key, size in sorted(stored):
+            self._entries[key] = size
+            self.total_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def key(self, url, query_string=None):
+        """
+        Get the key of a GET request
+
+        Parameters:
+            url: The url of the request
+            query_string: The key/value pairs query string of the request
+
+        Returns:
+            key: The hex digest of the url and query string
+        """
+
+        params = sorted((str(k), str(v)) for k, v in (query_string or {}).items())
+        return hashlib.sha1(json.dumps([url, params]).encode()).hexdigest()
+
+    def ttl(self, url):
+        """
+        Get the number of seconds a page is fresh
+
+        Parameters:
+            url: The url of the page
+
+        Returns:
+            seconds: The ttl of the first matching pattern, 0 if none matches
+        """
+
+        for pattern, seconds in self.ttls:
+            if pattern.search(url):
+                return seconds
+        return 0
+
+    def get(self, key):
+        """
+        Get a stored page and mark it as recently used
+
+        Parameters:
+            key: The key of the request
+
+        Returns:
+            entry: The dictionary of url, status, text, etag, last_modified and stored_at, None if not stored
+        """
+
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(self._path(key))
+            return entry
+        except (OSError, ValueError):
+            self._forget(key)
+            return None
+
+    def lookup(self, key):
+        """
+        Get a stored page and whether it can be served without a request
+
+        Parameters:
+            key: The key of the request
+
+        Returns:
+            entry: The stored page, None if not stored
+            fresh: True if the page can be served as is
+        """
+
+        entry = self.get(key)
+        fresh = entry is not None and self.is_fresh(entry)
+
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return entry, fresh
+
+    def is_fresh(self, entry):
+        """
+        Check if a stored page can be served without a request
+
+        Parameters:
+            entry: The stored page
+
+        Returns:
+            Boolean: True if the page can be served as is
+        """
+
+        if self.mode == 'replay':
+            return True
+        if self.mode == 'record':
+            return False
+        return time.time() - entry['stored_at'] < self.ttl(entry['url'])
+
+    def revalidation_headers(self, entry, headers=None):
+        """
+        Add the conditional request headers of a stored page
+
+        Parameters:
+            entry: The stored page, or None
+            headers: The headers of the request
+
+        Returns:
+            headers: The headers with If-None-Match and If-Modified-Since added
+        """
+
+        if not entry or self.mode == 'record':
+            return headers
+
+        headers = dict(headers or {})
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def set(self, key, url, status, text, etag=None, last_modified=None):
+        """
+        Store a page, pages that would never be served are skipped outside of record mode
+
+        Parameters:
+            key: The key of the request
+            url: The url of the page
+            status: The http status of the response
+            text: The body of the response
+            etag: The ETag header of the response
+            last_modified: The Last-Modified header of the response
+        """
+
+        if self.mode != 'record' and not self.ttl(url) and not (etag or last_modified):
+            return
+
+        self._write(key, {'url': url, 'status': status, 'text': text, 'etag': etag,
+                          'last_modified': last_modified, 'stored_at': time.time()})
+
+    def refresh(self, key, entry):
+        """
+        Restart the ttl of a page revalidated by the server
+
+        Parameters:
+            key: The key of the request
+            entry: The stored page
+        """
+
+        with self._lock:
+            self.revalidated += 1
+
+        entry['stored_at'] = time.time()
+        self._write(key, entry)
+
+    def _write(self, key, entry):
+        """
+        Write a page atomically and evict the least recently used pages over the size limit
+
+        Parameters:
+            key: The key of the request
+            entry: The page to store
+        """
+
+        data = json.dumps(entry).encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+
+            evicted = list()
+            while self.total_bytes > self.max_bytes:
+                old_key, size = self._entries.popitem(last=False)
+                self.total_bytes -= size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, key):
+        """
+        Drop a page that can not be read anymore
+
+        Parameters:
+            key: The key of the request
+        """
+
+        with self._lock:
+            self.total_bytes -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
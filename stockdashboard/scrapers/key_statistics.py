@@ -0,0 +1,153 @@
+import json
+
+# meterics to webscrape for companies, display name and quoteSummary field
+METERICS = {'% Held by Insiders': 'heldPercentInsiders',
+            '% Held by Institutions': 'heldPercentInstitutions',
+            '52-Week Change': '52WeekChange',
+            '5-Year Average Dividend Yield': 'fiveYearAvgDividendYield',
+            '10-Day Average Volume': 'averageDailyVolume10Day',
+            '3-Month Average Volume': 'averageDailyVolume3Month',
+            'Beta': 'beta',
+            'Book Value Per Share': 'bookValue',
+            'Current Ratio': 'currentRatio',
+            'Diluted EPS': 'trailingEps',
+            'Dividend Date': 'dividendDate',
+            'EBITDA': 'ebitda',
+            'Enterprise Value': 'enterpriseValue',
+            'Enterprise to EBITDA': 'enterpriseToEbitda',
+            'Enterprise to Revenue': 'enterpriseToRevenue',
+            'ExDividend Date': 'exDividendDate',
+            'Fiscal Year End': 'lastFiscalYearEnd',
+            'Float': 'floatShares',
+            'Forward Annual Dividend Rate': 'dividendRate',
+            'Forward Annual Dividend Yield': 'dividendYield',
+            'Forward EPS': 'forwardEps',
+            'Forward PE': 'forwardPE',
+            'Gross Profit': 'grossProfits',
+            'LastSplit Date': 'lastSplitDate',
+            'Levered Free Cashflow': 'freeCashflow',
+            'Market Capitalization': 'marketCap',
+            'Most Recent Quarter': 'mostRecentQuarter',
+            'Net Income Available to Common': 'netIncomeToCommon',
+            'Operating Cashflow': 'operatingCashflow',
+            'Operating Margin': 'operatingMargins',
+            'PEG Ratio': 'pegRatio',
+            'Payout Ratio': 'payoutRatio',
+            'Price to Book': 'priceToBook',
+            'Price to Sales': 'priceToSalesTrailing12Months',
+            'Profit Margin': 'profitMargins',
+            'Quaterly Revenue Growth': 'revenueGrowth',
+            'Return on Assets': 'returnOnAssets',
+            'Return on Equity': 'returnOnEquity',
+            'Revenue': 'totalRevenue',
+            'Revenue per Share': 'revenuePerShare',
+            'Shares Outstanding': 'sharesOutstanding',
+            'Shares Short': 'sharesShort',
+            'Short% of Float': 'shortPercentOfFloat',
+            'Short% of Shares Outstanding': 'sharesPercentSharesOut',
+            'Short Ratio': 'shortRatio',
+            'Total Cash': 'totalCash',
+            'Total Cash Per Share': 'totalCashPerShare',
+            'Total Debt': 'totalDebt',
+            'Total Debt to Equity': 'debtToEquity',
+            'Trailing Annual Dividend Rate': 'trailingAnnualDividendRate',
+            'Trailing Annual Dividend Yield': 'trailingAnnualDividendYield',
+            'Trailing PE': 'trailingPE'}
+
+# quoteSummary modules holding the meterics, in search order
+STATS_MODULES = ('defaultKeyStatistics', 'financialData', 'summaryDetail', 'calendarEvents')
+
+QUOTE_SUMMARY_STORE = '"QuoteSummaryStore":'
+
+_decoder = json.JSONDecoder()
+
+
+def find_quote_summary_store(text):
+    """
+    Decode the QuoteSummaryStore embedded in the scripts of a Yahoo quote page, only
+    the store is decoded, the rest of the page is never parsed
+
+    Parameters:
+        text: The html of the page
+
+    Returns:
+        store: The dictionary of the store, None if the page has none
+    """
+
+    start = text.find(QUOTE_SUMMARY_STORE)
+    if start == -1:
+        return None
+
+    start += len(QUOTE_SUMMARY_STORE)
+    while text[start].isspace():
+        start += 1
+
+    store, _ = _decoder.raw_decode(text, start)
+    return store if isinstance(store, dict) else None
+
+
+def first_fields(data):
+    """
+    Collect the first object value of every key of a decoded json document, in
+    document order, i.e. the first "key":{...} a text search would find
+
+    Parameters:
+        data: The decoded json document
+
+    Returns:
+        fields: The dictionary of key and its first object value
+    """
+
+    fields = dict()
+    stack = [(None, data)]
+    while stack: # depth first, the children are pushed in reverse to pop them in order
+        key, node = stack.pop()
+        if isinstance(node, dict):
+            if key is not None and key not in fields:
+                fields[key] = node
+            stack.extend((child_key, value) for child_key, value in reversed(list(node.items()))
+                         if isinstance(value, (dict, list)))
+        else:
+            stack.extend((None, value) for value in reversed(node) if isinstance(value, (dict, list)))
+    return fields
+
+
+def parse_key_statistics(modules, meterics=METERICS):
+    """
+    Get the formatted value of every metric from the first module that has its field
+
+    Parameters:
+        modules: The list of dictionaries of field and {'raw': ..., 'fmt': ...} value, searched in order
+        meterics: The dictionary of display name and field
+
+    Returns:
+        stats_output: The dictionary of company stat and formatted value, 'NAN' if there is none
+    """
+
+    stats_output = dict()
+    for key, val in meterics.items():
+        stats_output[key] = 'NAN'
+        for module in modules:
+            if isinstance(module.get(val), dict): # the first module with the field has the value
+                stats_output[key] = module[val].get('fmt') or 'NAN'
+                break
+    return stats_output
+
+
+def parse_key_statistics_page(text, meterics=METERICS):
+    """
+    Parse the company financial statistics from the key statistics page in one pass,
+    the store is decoded once and every metric is a dictionary lookup
+
+    Parameters:
+        text: The html of the key statistics page
+        meterics: The dictionary of display name and field
+
+    Returns:
+        stats_output: The dictionary of company stat and formatted value, False if the page has no store
+    """
+
+    store = find_quote_summary_store(text)
+    if store is None:
+        return False
+    return parse_key_statistics([first_fields(store)], meterics)
@@ -0,0 +1,128 @@
+import json
+import asyncio
+import threading
+
+
+def request_key(method, url, query_string=None, headers=None):
+    """
+    Get the key of a request, the requests with the same key get the same response
+
+    Parameters:
+        method: The http method of the request
+        url: The url of the request
+        query_string: The key/value pairs query string of the request
+        headers: The headers of the request
+
+    Returns:
+        key: The key of the request
+    """
+
+    return json.dumps([method, url, sorted((str(k), str(v)) for k, v in (query_string or {}).items()),
+                       sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())])
+
+
+class _Call():
+    """
+    An operation in flight and its outcome
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight():
+    """
+    Run one operation per key at a time, the threads calling with a key already in flight
+    wait for it and share its result (or its exception) instead of running it again.
+    Nothing is kept once the operation is done, the next call runs it again
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._calls = dict()
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Run the function, or wait for the call in flight with the same key
+
+        Parameters:
+            key: The key of the operation
+            function: The function without arguments running the operation
+
+        Returns:
+            result: The result of the function
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight():
+    """
+    The SingleFlight of the coroutines of one event loop
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._calls = dict()
+
+    async def do(self, key, coroutine_function):
+        """
+        Await the coroutine, or the call in flight with the same key
+
+        Parameters:
+            key: The key of the operation
+            coroutine_function: The function without arguments returning the coroutine running the operation
+
+        Returns:
+            result: The result of the coroutine
+        """
+
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future) # a cancelled waiter does not cancel the others
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.calls += 1
+        try:
+            result = await coroutine_function()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception() # retrieved, asyncio does not log it when nobody was waiting
+            raise
+        finally:
+            del self._calls[key]
@@ -2,18 +2,24 @@ import os
 import re
 import datetime
 import time
+import asyncio
 from stockdashboard.scrapers.connection import EstablishConnectionByRequest
+from stockdashboard.scrapers.async_connection import EstablishConnectionByAiohttp
+from stockdashboard.scrapers.eod_columns import EODColumns
+from stockdashboard.scrapers.key_statistics import STATS_MODULES, parse_key_statistics, parse_key_statistics_page
+
+# quoteSummary modules of the financial statements
+FINANCIAL_MODULES = ('incomeStatementHistory', 'cashflowStatementHistory', 'balanceSheetHistory')
 
 class YahooFinanceScraper():
     """
     Web scrape the data from yahoo finance 
     """
     
-    def __init__(self):
-        self.connection = EstablishConnectionByRequest()
+    def __init__(self, connection=None):
+        self.connection = connection or EstablishConnectionByRequest()
     
-
-    def get_eod_API(self, ticker, *, end_date=datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"), start_date="01/01/1975 00:00:00"):   
+    def get_eod_API(self, ticker, *, end_date=datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"), start_date="01/01/1975 00:00:00", columnar=False):   
         """
         Web scrape the end of data from yahoo finance using the API
         
@@ -21,46 +27,74 @@ class YahooFinanceScraper():
             ticker: The ticker symbol of the company 
             start_date: The start date of the end of day data needed   
             end_date: The end date of the end of day data needed     
+            columnar: True to get EODColumns, with NaN for the missing values   
              
         Returns:
-            eod_data: The list of tuple of end of data for the stock
+            eod_data: The list of tuple of end of data for the stock, or the EODColumns
         """
         
-        start = int(time.mktime(datetime.datetime.strptime(start_date, 
-                                                                "%d/%m/%Y %H:%M:%S").timetuple()))
-        end = int(time.mktime(datetime.datetime.strptime(end_date, 
-                                                              "%d/%m/%Y %H:%M:%S").timetuple()))
-        ticker = ticker.upper()
-        url = f'https://query2.finance.yahoo.com/v8/finance/chart/{ticker}?formatted=true&crumb=Tib2mBtP9rD&lang=en-CA&region=CA&interval=1d&period1={start}&period2={end}&events=div%7Csplit&corsDomain=ca.finance.yahoo.com'
-         
         try:
-            if self.connection.connect(url):
-                json_data = self.connection.get_json_data()
-                if json_data['chart']['result'][0]['indicators']['quote'][0]:
-                    date = [0 if x is None else x for x in json_data['chart']['result'][0]['timestamp']]
-                    open_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['open']]
-                    high_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['high']]
-                    low_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['low']]
-                    close_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['close']]
-                    volume = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['volume']]
-                    adjclose_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['adjclose'][0]['adjclose']]
-                    eod_data = list(zip(date,open_price,high_price,low_price,close_price,volume,adjclose_price))
-
-                    return eod_data
+            response = self.connection.connect(self._eod_API_url(ticker, start_date, end_date))
+            if response:
+                return self._parse_eod_API(response.get_json_data(), columnar)
             return False
         except Exception as e:
             print(f"YahooFinanceScraper.get_eod_API ERROR: {e}")
             return False
     
-    def get_eod_one_min(self, ticker):   
+    def _eod_API_url(self, ticker, start_date, end_date):
+        """
+        Get the url of the end of day data API
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+            start_date: The start date of the end of day data needed   
+            end_date: The end date of the end of day data needed     
+             
+        Returns:
+            url: The url of the end of day data
+        """
+        
+        start = int(time.mktime(datetime.datetime.strptime(start_date, 
+                                                                "%d/%m/%Y %H:%M:%S").timetuple()))
+        end = int(time.mktime(datetime.datetime.strptime(end_date, 
+                                                              "%d/%m/%Y %H:%M:%S").timetuple()))
+        ticker = ticker.upper()
+        return f'https://query2.finance.yahoo.com/v8/finance/chart/{ticker}?formatted=true&crumb=Tib2mBtP9rD&lang=en-CA&region=CA&interval=1d&period1={start}&period2={end}&events=div%7Csplit&corsDomain=ca.finance.yahoo.com'
+    
+    def _parse_eod_API(self, json_data, columnar=False):
+        """
+        Parse the end of day data API response
+        
+        Parameters:
+            json_data: The json data of the response 
+            columnar: True to get EODColumns, with NaN for the missing values   
+             
+        Returns:
+            eod_data: The list of tuple of end of data for the stock, or the EODColumns, False if there is none
+        """
+        
+        if columnar:
+            return EODColumns.from_chart_json(json_data) or False
+        
+        result = json_data['chart']['result'][0]
+        quote = result['indicators']['quote'][0]
+        if quote:
+            fields = [result['timestamp'], quote['open'], quote['high'], quote['low'], quote['close'], 
+                      quote['volume'], result['indicators']['adjclose'][0]['adjclose']]
+            return list(zip(*[[0 if x is None else x for x in field] for field in fields]))
+        return False
+    
+    def get_eod_one_min(self, ticker, columnar=False):   
         """
         Web scrape the one minute end of data from yahoo finance
         
         Parameters:
             ticker: The ticker symbol of the company 
+            columnar: True to get EODColumns, with NaN for the missing values   
             
         Returns:
-            all_eod_data: The list of tuple of end of data for the stock
+            all_eod_data: The list of tuple of end of data for the stock, or the EODColumns
         """
         
         ticker = ticker.upper()
@@ -68,16 +102,12 @@ class YahooFinanceScraper():
         try:
             all_eod_data = list()
             url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?region=CA&lang=en-CA&includePrePost=false&interval=1m&range=7d&corsDomain=ca.finance.yahoo.com&.tsrc=finance"        
-            if self.connection.connect(url):
-                json_data = self.connection.get_json_data()
-                if json_data['chart']['result'][0]['indicators']['quote'][0]:
-                    date = [0 if x is None else x for x in json_data['chart']['result'][0]['timestamp']]
-                    open_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['open']]
-                    high_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['high']]
-                    low_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['low']]
-                    close_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['close']]
-                    volume = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['volume']]
-                    eod_data = list(zip(date,open_price,high_price,low_price,close_price,volume))
+            response = self.connection.connect(url)
+            if response:
+                eod_data = self._parse_intraday(response.get_json_data(), columnar)
+                if columnar:
+                    return eod_data if eod_data is not None else EODColumns([], {})
+                if eod_data:
                     all_eod_data += eod_data 
             
                 return all_eod_data
@@ -87,36 +117,53 @@ class YahooFinanceScraper():
             return False
         
         
-    def get_eod_one_hour(self, ticker):   
+    def get_eod_one_hour(self, ticker, columnar=False):   
         """
         Web scrape the one hour end of data from yahoo finance
         
         Parameters:
             ticker: The ticker symbol of the company 
+            columnar: True to get EODColumns, with NaN for the missing values   
             
         Returns:
-            eod_data: The list of tuple of end of data for the stock
+            eod_data: The list of tuple of end of data for the stock, or the EODColumns
         """
         
         ticker = ticker.upper()
         
         try:
             url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?region=CA&lang=en-CA&includePrePost=false&interval=1h&range=730d&corsDomain=ca.finance.yahoo.com&.tsrc=finance"
-            if self.connection.connect(url):
-                json_data = self.connection.get_json_data()
-                if json_data['chart']['result'][0]['indicators']['quote'][0]:
-                    date = [0 if x is None else x for x in json_data['chart']['result'][0]['timestamp']]
-                    open_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['open']]
-                    high_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['high']]
-                    low_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['low']]
-                    close_price = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['close']]
-                    volume = [0 if x is None else x for x in json_data['chart']['result'][0]['indicators']['quote'][0]['volume']]
-                    eod_data = list(zip(date,open_price,high_price,low_price,close_price,volume))
+            response = self.connection.connect(url)
+            if response:
+                eod_data = self._parse_intraday(response.get_json_data(), columnar)
+                if eod_data is not None:
                     return eod_data
             return False
         except Exception as e:
             print(f"YahooFinanceScraper.get_eod_one_min ERROR: {e}")
             return False
+    
+    def _parse_intraday(self, json_data, columnar=False):
+        """
+        Parse the intraday chart API response, it has no adjusted close
+        
+        Parameters:
+            json_data: The json data of the response 
+            columnar: True to get EODColumns, with NaN for the missing values   
+             
+        Returns:
+            eod_data: The list of tuple of end of data for the stock, or the EODColumns, None if there is none
+        """
+        
+        if columnar:
+            return EODColumns.from_chart_json(json_data)
+        
+        result = json_data['chart']['result'][0]
+        quote = result['indicators']['quote'][0]
+        if quote:
+            fields = [result['timestamp'], quote['open'], quote['high'], quote['low'], quote['close'], quote['volume']]
+            return list(zip(*[[0 if x is None else x for x in field] for field in fields]))
+        return None
         
     def get_current_price(self, ticker=None):
         """
@@ -132,15 +179,11 @@ class YahooFinanceScraper():
         if ticker is None:
             raise Exception('You have to pass a ticker as an argument')
         try:
-            if self.connection.connect('https://ca.finance.yahoo.com/quote/{}'.format(ticker)):
-                body = self.connection.get_body()
-                prices = [x.find_all('span',{'data-reactid':'14'}) for x in body.find_all('div',{'data-reactid':'13'})]
-                current_price = prices[0][0].text if len(prices) > 0 else None
-                
-                prices = [x.find_all('span',{'data-reactid':'14'}) for x in body.find_all('div',{'data-reactid':'13'})]
-                current_price = prices[0][0].text if len(prices) > 0 else None
-                percentages = [x.find_all('span',{'data-reactid':'16'}) for x in body.find_all('div',{'data-reactid':'13'})]
-                current_percentage = percentages[0][0].text if len(percentages) > 0 else None
+            response = self.connection.connect('https://ca.finance.yahoo.com/quote/{}'.format(ticker))
+            if response:
+                quote = response.select("//body//div[@data-reactid='13']")
+                current_price = quote[0].xpath(".//span[@data-reactid='14']")[0].text_content() if len(quote) > 0 else None
+                current_percentage = quote[0].xpath(".//span[@data-reactid='16']")[0].text_content() if len(quote) > 0 else None
                 
                 current = {'Current Price':current_price, 'Current Percentage':current_percentage}
                 
@@ -150,6 +193,68 @@ class YahooFinanceScraper():
             print(f"YahooFinanceScraper.get_current_price ERROR: {e}")
             return False
         
+    QUOTE_BATCH_SIZE = 100
+    
+    def get_quotes(self, tickers):
+        """
+        Get the current price and change of many tickers, one request per QUOTE_BATCH_SIZE tickers 
+        
+        Parameters:
+            tickers: The list of ticker symbols 
+         
+        Returns:
+            quotes: The dictionary of ticker and the current price dictionary of get_current_price,
+                    the tickers without a quote are left out
+        """
+        
+        quotes = dict()
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        try:
+            for idx in range(0, len(tickers), self.QUOTE_BATCH_SIZE):
+                response = self.connection.connect(self._quotes_url(tickers[idx:idx + self.QUOTE_BATCH_SIZE]))
+                if response:
+                    quotes.update(self._parse_quotes(response.get_json_data()))
+            return quotes
+        except Exception as e:
+            print(f"YahooFinanceScraper.get_quotes ERROR: {e}")
+            return quotes
+    
+    def _quotes_url(self, tickers):
+        """
+        Get the url of the quote API for many tickers 
+        
+        Parameters:
+            tickers: The list of ticker symbols 
+         
+        Returns:
+            url: The url of the quotes
+        """
+        
+        return 'https://query1.finance.yahoo.com/v7/finance/quote?lang=en-CA&region=CA&fields=regularMarketPrice,regularMarketChange,regularMarketChangePercent&symbols={}'.format(','.join(tickers))
+    
+    def _parse_quotes(self, json_data):
+        """
+        Parse the quote API response, formatted like the quote page 
+        
+        Parameters:
+            json_data: The json data of the response 
+         
+        Returns:
+            quotes: The dictionary of ticker and {'Current Price': '1,234.56', 'Current Percentage': '+1.20 (+0.10%)'}
+        """
+        
+        quotes = dict()
+        for quote in json_data['quoteResponse']['result']:
+            price = quote.get('regularMarketPrice')
+            if price is None:
+                continue
+            
+            change = quote.get('regularMarketChange') or 0
+            change_percent = quote.get('regularMarketChangePercent') or 0
+            quotes[quote['symbol'].upper()] = {'Current Price': f"{price:,.2f}", 
+                                               'Current Percentage': f"{change:+,.2f} ({change_percent:+.2f}%)"}
+        return quotes
+    
     def get_dividend_history(self, ticker=None):
         """
         Web scrape the historical dividends of a company
@@ -172,8 +277,10 @@ class YahooFinanceScraper():
             if ticker is None:
                 raise Exception('You have to pass a ticker as an argument')
                 
-            if self.connection.connect(url):
-                json_data = self.connection.get_json_data()
+            response = self.connection.connect(url)
+                
+            if response:
+                json_data = response.get_json_data()
                 if json_data['chart']['result'][0]['indicators']['quote'][0]:
                     events_exist = json_data['chart']['result'][0].get('events',None)
                     if events_exist:
@@ -200,92 +307,42 @@ class YahooFinanceScraper():
             stats_output: The dictionary of company stat and value 
         """
     
-        # meterics to webscrape for companies 
-        METERICS = {'% Held by Insiders': 'heldPercentInsiders',
-                     '% Held by Institutions': 'heldPercentInstitutions',
-                     '52-Week Change': '52WeekChange',
-                     '5-Year Average Dividend Yield': 'fiveYearAvgDividendYield',
-                     '10-Day Average Volume': 'averageDailyVolume10Day',
-                     '3-Month Average Volume': 'averageDailyVolume3Month',
-                     'Beta': 'beta',
-                     'Book Value Per Share': 'bookValue',
-                     'Current Ratio': 'currentRatio',
-                     'Diluted EPS': 'trailingEps',
-                     'Dividend Date': 'dividendDate',
-                     'EBITDA': 'ebitda',
-                     'Enterprise Value': 'enterpriseValue',
-                     'Enterprise to EBITDA': 'enterpriseToEbitda',
-                     'Enterprise to Revenue': 'enterpriseToRevenue',
-                     'ExDividend Date': 'exDividendDate',
-                     'Fiscal Year End': 'lastFiscalYearEnd',
-                     'Float': 'floatShares',
-                     'Forward Annual Dividend Rate': 'dividendRate',
-                     'Forward Annual Dividend Yield': 'dividendYield',
-                     'Forward EPS': 'forwardEps',
-                     'Forward PE': 'forwardPE',
-                     'Gross Profit': 'grossProfits',
-                     'LastSplit Date': 'lastSplitDate',
-                     'Levered Free Cashflow': 'freeCashflow',
-                     'Market Capitalization': 'marketCap',
-                     'Most Recent Quarter': 'mostRecentQuarter',
-                     'Net Income Available to Common': 'netIncomeToCommon',
-                     'Operating Cashflow': 'operatingCashflow',
-                     'Operating Margin': 'operatingMargins',
-                     'PEG Ratio': 'pegRatio',
-                     'Payout Ratio': 'payoutRatio',
-                     'Price to Book': 'priceToBook',
-                     'Price to Sales': 'priceToSalesTrailing12Months',
-                     'Profit Margin': 'profitMargins',
-                     'Quaterly Revenue Growth': 'revenueGrowth',
-                     'Return on Assets': 'returnOnAssets',
-                     'Return on Equity': 'returnOnEquity',
-                     'Revenue': 'totalRevenue',
-                     'Revenue per Share': 'revenuePerShare',
-                     'Shares Outstanding': 'sharesOutstanding',
-                     'Shares Short': 'sharesShort',
-                     'Short% of Float': 'shortPercentOfFloat',
-                     'Short% of Shares Outstanding': 'sharesPercentSharesOut',
-                     'Short Ratio': 'shortRatio',
-                     'Total Cash': 'totalCash',
-                     'Total Cash Per Share': 'totalCashPerShare',
-                     'Total Debt': 'totalDebt',
-                     'Total Debt to Equity': 'debtToEquity',
-                     'Trailing Annual Dividend Rate': 'trailingAnnualDividendRate',
-                     'Trailing Annual Dividend Yield': 'trailingAnnualDividendYield',
-                     'Trailing PE': 'trailingPE'
-                  }
         try:
-            if self.connection.connect(r'https://ca.finance.yahoo.com/quote/{}/key-statistics'.format(ticker)):
-                body = self.connection.get_body()
-                data = str(body.find_all('script'))
-                values = data.split(r'"QuoteSummaryStore"')
-                
-                # check if the data needed exits within the scraped data 
-                stats_output = dict()
-                for key, val in METERICS.items():
-                    pattern = '"%s":{(.*?)}' % (val,)
-                    found_data = re.findall(pattern, values[1])
-                    
-                    if found_data:
-                        pattern2 = r'"fmt":(.*)'
-                        found_stats = re.findall(pattern2, found_data[0])
-                    else:
-                        found_stats = found_data
-                    
-                    if found_stats:
-                        final_stats_data =  found_stats[0].split(',', 1)[0]
-                        final_stats_data = final_stats_data.strip('""')
-                        stats_output[key] = final_stats_data
-                    else:
-                        value_none = 'NAN'
-                        stats_output[key] = value_none
-                return stats_output
+            response = self.connection.connect(self._company_stats_url(ticker))
+            if response:
+                return self._parse_company_stats(response.get_raw_data())
                         
             return False
         except Exception as e:
             print("COMPANY INFO - STATS:", e)
             return False        
 
+    def _company_stats_url(self, ticker):
+        """
+        Get the url of the company key statistics page
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+    
+        Returns:
+            url: The url of the key statistics page
+        """
+        
+        return r'https://ca.finance.yahoo.com/quote/{}/key-statistics'.format(ticker)
+
+    def _parse_company_stats(self, text):
+        """
+        Parse the company financial statistics from the key statistics page
+        
+        Parameters:
+            text: The html of the key statistics page 
+    
+        Returns:
+            stats_output: The dictionary of company stat and value 
+        """
+    
+        return parse_key_statistics_page(text)
+
     def get_analysts_ratings(self, ticker=None):
         """
         Get current and historical analyst ratings from Yahoo Finance
@@ -302,12 +359,13 @@ class YahooFinanceScraper():
                 
         try:
             url = f"https://ca.finance.yahoo.com/quote/{ticker}/analysis?p={ticker}"
-            if self.connection.connect(url):
-                text_response = self.connection.get_raw_data()
+            response = self.connection.connect(url)
+            if response:
+                text_response = response.get_raw_data()
                 
                 if text_response:
                     find_ratings = re.search(r'"upgradeDowngradeHistory":(.*),"pageViews"', text_response).group(1)
-                    analyst_ratings = self.connection.get_json_data(find_ratings)
+                    analyst_ratings = response.get_json_data(find_ratings)
                     return analyst_ratings['history']
             
             return False
@@ -329,24 +387,49 @@ class YahooFinanceScraper():
         ticker = ticker.upper()
         
         try:
-            all_info = dict()
-            url = f"https://query2.finance.yahoo.com/v10/finance/quoteSummary/{ticker}?formatted=true&crumb=Tib2mBtP9rD&lang=en-CA&region=CA&modules=summaryProfile%2Cdetails&corsDomain=ca.finance.yahoo.com"
-            if self.connection.connect(url):
-                json_data = self.connection.get_json_data()
-                if json_data['quoteSummary']['result'][0]['summaryProfile']:
-                    summary = json_data['quoteSummary']['result'][0]['summaryProfile']
-                    all_info['Sector'] = summary['sector']
-                    all_info['Industry'] = summary['industry']
-                    all_info['Full-Time Employees'] = summary['fullTimeEmployees']
-                    all_info['Website'] = summary['website']
-                    all_info['Business Summary'] = summary['longBusinessSummary']
-                    
-                return all_info
+            response = self.connection.connect(self._ticker_info_url(ticker))
+            if response:
+                return self._parse_ticker_info(response.get_json_data())
             return False
         except Exception as e:
             print(f"YahooFinanceScraper.get_ticker_info ERROR: {e}")
             return False
     
+    def _ticker_info_url(self, ticker):
+        """
+        Get the url of the business summary
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+            
+        Returns:
+            url: The url of the business summary
+        """
+        
+        return f"https://query2.finance.yahoo.com/v10/finance/quoteSummary/{ticker.upper()}?formatted=true&crumb=Tib2mBtP9rD&lang=en-CA&region=CA&modules=summaryProfile%2Cdetails&corsDomain=ca.finance.yahoo.com"
+    
+    def _parse_ticker_info(self, json_data):
+        """
+        Parse the business summary response
+        
+        Parameters:
+            json_data: The json data of the response 
+            
+        Returns:
+            all_info: dictionary of business summary 
+        """
+        
+        all_info = dict()
+        if json_data['quoteSummary']['result'][0]['summaryProfile']:
+            summary = json_data['quoteSummary']['result'][0]['summaryProfile']
+            all_info['Sector'] = summary['sector']
+            all_info['Industry'] = summary['industry']
+            all_info['Full-Time Employees'] = summary['fullTimeEmployees']
+            all_info['Website'] = summary['website']
+            all_info['Business Summary'] = summary['longBusinessSummary']
+            
+        return all_info
+    
     def get_company_name(self, ticker):
         """
         Web scrape the company full name
@@ -360,21 +443,47 @@ class YahooFinanceScraper():
         ticker = ticker.upper()
         
         try:
-            company_name = dict()
-            url = f'https://query2.finance.yahoo.com/v1/finance/quoteType/{ticker}?lang=en-CA&region=CA&corsDomain=ca.finance.yahoo.com'
-            if self.connection.connect(url):
-                json_data = self.connection.get_json_data()
-                if json_data['quoteType']['result']:
-                    result = json_data['quoteType']['result'][0]
-                    company_name['ticker'] = result['symbol']
-                    company_name['name'] = result['longName']
-                
-                    return company_name
+            response = self.connection.connect(self._company_name_url(ticker))
+            if response:
+                return self._parse_company_name(response.get_json_data())
             return False
         except Exception as e:
             print(f"YahooFinanceScraper.get_company_name ERROR: {e}")
             return False
     
+    def _company_name_url(self, ticker):
+        """
+        Get the url of the company quote type
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+    
+        Returns:
+            url: The url of the company quote type
+        """
+        
+        return f'https://query2.finance.yahoo.com/v1/finance/quoteType/{ticker.upper()}?lang=en-CA&region=CA&corsDomain=ca.finance.yahoo.com'
+    
+    def _parse_company_name(self, json_data):
+        """
+        Parse the company quote type response
+        
+        Parameters:
+            json_data: The json data of the response 
+    
+        Returns:
+            company_name: dictionary with the ticker and full name, False if there is none
+        """
+        
+        company_name = dict()
+        if json_data['quoteType']['result']:
+            result = json_data['quoteType']['result'][0]
+            company_name['ticker'] = result['symbol']
+            company_name['name'] = result['longName']
+        
+            return company_name
+        return False
+    
     def get_company_financials(self, ticker):
         """
         Web scrape the company financial statements 
@@ -388,30 +497,316 @@ class YahooFinanceScraper():
         ticker = ticker.upper()
         
         try:
-            financials_data_output = dict()
-            url = f'https://query1.finance.yahoo.com/v10/finance/quoteSummary/{ticker}?formatted=true&crumb=Tib2mBtP9rD&lang=en-CA&region=CA&modules=incomeStatementHistory%2CcashflowStatementHistory%2CbalanceSheetHistory&corsDomain=ca.finance.yahoo.com'
-            if self.connection.connect(url):
-                json_data = self.connection.get_json_data()
-                if json_data['quoteSummary']['result']:
-                    fin_data = json_data['quoteSummary']['result'][0]
-                    financials_data_output['Cashflow Statement'] = fin_data['cashflowStatementHistory']['cashflowStatements']
-                    financials_data_output['Balance Sheet'] = fin_data['balanceSheetHistory']['balanceSheetStatements']
-                    financials_data_output['Income Statement'] = fin_data['incomeStatementHistory']['incomeStatementHistory']
-                    return financials_data_output
+            response = self.connection.connect(self._company_financials_url(ticker))
+            if response:
+                return self._parse_company_financials(response.get_json_data())
             return False
         except Exception as e:
             print(f"YahooFinanceScraper.get_company_financials ERROR: {e}")
             return False
+    
+    def _company_financials_url(self, ticker):
+        """
+        Get the url of the company financial statements 
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+    
+        Returns:
+            url: The url of the financial statements
+        """
         
+        return f'https://query1.finance.yahoo.com/v10/finance/quoteSummary/{ticker.upper()}?formatted=true&crumb=Tib2mBtP9rD&lang=en-CA&region=CA&modules=incomeStatementHistory%2CcashflowStatementHistory%2CbalanceSheetHistory&corsDomain=ca.finance.yahoo.com'
+    
+    def _parse_company_financials(self, json_data):
+        """
+        Parse the company financial statements response
+        
+        Parameters:
+            json_data: The json data of the response 
+    
+        Returns:
+            financials_data_output: The dictionary of company's scraped financial information, False if there is none
+        """
+        
+        financials_data_output = dict()
+        if json_data['quoteSummary']['result']:
+            fin_data = json_data['quoteSummary']['result'][0]
+            financials_data_output['Cashflow Statement'] = fin_data['cashflowStatementHistory']['cashflowStatements']
+            financials_data_output['Balance Sheet'] = fin_data['balanceSheetHistory']['balanceSheetStatements']
+            financials_data_output['Income Statement'] = fin_data['incomeStatementHistory']['incomeStatementHistory']
+            return financials_data_output
+        return False
+
+    def get_fundamentals(self, ticker):
+        """
+        Web scrape the business summary, company name, financial statements and stats
+        of the company with one quoteSummary request
+
+        Parameters:
+            ticker: The ticker symbol of the company
+
+        Returns:
+            fundamentals: The dictionary of the parsed fundamentals, see _parse_fundamentals
+        """
+        ticker = ticker.upper()
+
+        try:
+            response = self.connection.connect(self._fundamentals_url(ticker))
+            if response:
+                return self._parse_fundamentals(response.get_json_data(), ticker.upper())
+            return False
+        except Exception as e:
+            print(f"YahooFinanceScraper.get_fundamentals ERROR: {e}")
+            return False
+
+    def _fundamentals_url(self, ticker):
+        """
+        Get the url of every quoteSummary module stored for a company, the modules of
+        the stats come first so the url gets the ttl of the stats in the http cache
+
+        Parameters:
+            ticker: The ticker symbol of the company
+
+        Returns:
+            url: The url of the fundamentals
+        """
+
+        modules = '%2C'.join(STATS_MODULES + ('summaryProfile', 'quoteType') + FINANCIAL_MODULES)
+        return f'https://query1.finance.yahoo.com/v10/finance/quoteSummary/{ticker.upper()}?formatted=true&crumb=Tib2mBtP9rD&lang=en-CA&region=CA&modules={modules}&corsDomain=ca.finance.yahoo.com'
+
+    def _parse_fundamentals(self, json_data, ticker):
+        """
+        Parse the fundamentals response, each part has the format of the scraper it replaces.
+        The name falls back to the short name, then to the ticker
+
+        Parameters:
+            json_data: The json data of the response
+            ticker: The ticker symbol of the company
+
+        Returns:
+            fundamentals: The dictionary with the 'info' of get_ticker_info, the 'name' of get_company_name,
+                          the 'financials' of get_company_financials and the 'stats' of get_company_stats,
+                          False if there is none or the company profile or a financial statement is missing
+        """
+
+        if not json_data['quoteSummary']['result']:
+            return False
+
+        result = json_data['quoteSummary']['result'][0]
+        if not result.get('summaryProfile') or not all(result.get(name) for name in FINANCIAL_MODULES):
+            return False
+
+        quote_type = result.get('quoteType') or {}
+        name = quote_type.get('longName') or quote_type.get('shortName') or ticker
+        return {'info': self._parse_ticker_info(json_data),
+                'name': {'ticker': quote_type.get('symbol') or ticker, 'name': name},
+                'financials': self._parse_company_financials(json_data),
+                'stats': parse_key_statistics([result.get(name) or {} for name in STATS_MODULES])}
+
+    def get_key_statistics(self, ticker):
+        """
+        Web scrape the company stats with a quoteSummary request of the stats modules only,
+        for refreshing the stats of a company already stored
+
+        Parameters:
+            ticker: The ticker symbol of the company
+
+        Returns:
+            stats_output: The dictionary of company stat and value, False if there is none
+        """
+
+        try:
+            response = self.connection.connect(self._key_statistics_url(ticker))
+            if response:
+                return self._parse_key_statistics(response.get_json_data())
+            return False
+        except Exception as e:
+            print(f"YahooFinanceScraper.get_key_statistics ERROR: {e}")
+            return False
+
+    def _key_statistics_url(self, ticker):
+        """
+        Get the url of the quoteSummary modules of the company stats
+
+        Parameters:
+            ticker: The ticker symbol of the company
+
+        Returns:
+            url: The url of the key statistics
+        """
+
+        modules = '%2C'.join(STATS_MODULES)
+        return f'https://query1.finance.yahoo.com/v10/finance/quoteSummary/{ticker.upper()}?formatted=true&crumb=Tib2mBtP9rD&lang=en-CA&region=CA&modules={modules}&corsDomain=ca.finance.yahoo.com'
+
+    def _parse_key_statistics(self, json_data):
+        """
+        Parse the key statistics response
+
+        Parameters:
+            json_data: The json data of the response
+
+        Returns:
+            stats_output: The dictionary of company stat and value, False if there is none
+        """
+
+        if not json_data['quoteSummary']['result']:
+            return False
+
+        result = json_data['quoteSummary']['result'][0]
+        return parse_key_statistics([result.get(name) or {} for name in STATS_MODULES])
+
     def clean_up(self):
         self.connection.close()
 
 
+class AsyncYahooFinanceScraper(YahooFinanceScraper):
+    """
+    Web scrape the data from yahoo finance with coroutines, the requests of many
+    coroutines share one event loop and its kept alive connections
+    """
+    
+    def __init__(self, connection=None):
+        self.connection = connection or EstablishConnectionByAiohttp()
+    
+    async def get_eod_API(self, ticker, *, end_date=datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"), start_date="01/01/1975 00:00:00", columnar=False):   
+        """
+        Web scrape the end of data from yahoo finance using the API
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+            start_date: The start date of the end of day data needed   
+            end_date: The end date of the end of day data needed     
+            columnar: True to get EODColumns, with NaN for the missing values   
+             
+        Returns:
+            eod_data: The list of tuple of end of data for the stock, or the EODColumns
+        """
+        
+        try:
+            response = await self.connection.connect(self._eod_API_url(ticker, start_date, end_date))
+            if response:
+                return self._parse_eod_API(response.get_json_data(), columnar)
+            return False
+        except Exception as e:
+            print(f"AsyncYahooFinanceScraper.get_eod_API ERROR: {e}")
+            return False
+    
+    async def get_company_stats(self, ticker):
+        """
+        Web scrape the company financial statistics from yahoo finance 
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+    
+        Returns:
+            stats_output: The dictionary of company stat and value 
+        """
+        
+        try:
+            response = await self.connection.connect(self._company_stats_url(ticker))
+            if response:
+                return self._parse_company_stats(response.get_raw_data())
+            return False
+        except Exception as e:
+            print("COMPANY INFO - STATS:", e)
+            return False
+    
+    async def get_ticker_info(self, ticker):   
+        """
+        Web scrape the business summary for the ticker
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+            
+        Returns:
+            all_info: dictionary of business summary 
+        """
+        
+        try:
+            response = await self.connection.connect(self._ticker_info_url(ticker))
+            if response:
+                return self._parse_ticker_info(response.get_json_data())
+            return False
+        except Exception as e:
+            print(f"AsyncYahooFinanceScraper.get_ticker_info ERROR: {e}")
+            return False
+    
+    async def get_company_name(self, ticker):
+        """
+        Web scrape the company full name
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+    
+        Returns:
+            company_name: dictionary with the ticker and full name 
+        """
+        
+        try:
+            response = await self.connection.connect(self._company_name_url(ticker))
+            if response:
+                return self._parse_company_name(response.get_json_data())
+            return False
+        except Exception as e:
+            print(f"AsyncYahooFinanceScraper.get_company_name ERROR: {e}")
+            return False
+    
+    async def get_company_financials(self, ticker):
+        """
+        Web scrape the company financial statements 
+        
+        Parameters:
+            ticker: The ticker symbol of the company 
+    
+        Returns:
+            financials_data_output: The dictionary of company's scraped financial information
+        """
+        
+        try:
+            response = await self.connection.connect(self._company_financials_url(ticker))
+            if response:
+                return self._parse_company_financials(response.get_json_data())
+            return False
+        except Exception as e:
+            print(f"AsyncYahooFinanceScraper.get_company_financials ERROR: {e}")
+            return False
+    
+    async def get_fundamentals(self, ticker):
+        """
+        Web scrape the business summary, company name, financial statements and stats
+        of the company with one quoteSummary request
 
+        Parameters:
+            ticker: The ticker symbol of the company
 
+        Returns:
+            fundamentals: The dictionary of the parsed fundamentals, see _parse_fundamentals
+        """
 
+        try:
+            response = await self.connection.connect(self._fundamentals_url(ticker))
+            if response:
+                return self._parse_fundamentals(response.get_json_data(), ticker.upper())
+            return False
+        except Exception as e:
+            print(f"AsyncYahooFinanceScraper.get_fundamentals ERROR: {e}")
+            return False
 
+    async def get_new_ticker_data(self, ticker, end_date):
+        """
+        Web scrape everything stored for a new ticker, the two requests run concurrently
 
+        Parameters:
+            ticker: The ticker symbol of the company
+            end_date: The end date of the end of day data needed
 
+        Returns:
+            ticker_data: The tuple of the EODColumns and the fundamentals
+        """
 
-
+        return await asyncio.gather(self.get_eod_API(ticker, end_date=end_date, columnar=True),
+                                    self.get_fundamentals(ticker))
+    
+    async def clean_up(self):
+        await self.connection.close()
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from stockdashboard.signals.technical_signal_calculations import TECHNICAL_INDICATORS
+from stockdashboard.signals.indicator_registry import compute_indicators, indicator_dependencies
+from stockdashboard.signals.eod_arrays import PRICE_COLUMNS, eod_to_arrays
+from stockdashboard.signals.indicator_result import IndicatorResult
+from stockdashboard.signals.benchmark_analytics import benchmark_store
+
+
+def _sp500_correlation(close, sp500_close):
+    """
+    Calculate the 5 day correlation coefficient of every ticker with the S&P 500 on the 
+    S&P 500 dates, like the registered SP500ROLL_CORR
+
+    Parameters:
+        close: The 2-D array (dates x tickers) of the closes, NaN where the ticker has no bar
+        sp500_close: The S&P 500 close on the dates, NaN where it has no bar
+
+    Returns:
+        correlation: The 2-D array (dates x tickers) of the correlation coefficients
+    """
+
+    sp500_rows = ~np.isnan(sp500_close)
+    correlation = np.full(close.shape, np.nan)
+    correlation[sp500_rows] = pd.DataFrame(close[sp500_rows]).rolling(window=5).corr(other=pd.Series(sp500_close[sp500_rows])).values
+
+    return correlation
+
+
+# the registered indicators calculated on the S&P 500 dates instead of the bars of the ticker, 
+# the batch calculates them on the aligned matrices and gives them to the registry as inputs
+DATE_ALIGNED_INDICATORS = {'SP500ROLL_CORR': _sp500_correlation}
+
+
+def batch_price_columns(indicators=TECHNICAL_INDICATORS):
+    """
+    Get the price columns the batch calculation of the indicators reads
+
+    Parameters:
+        indicators: The names of the registered indicators
+
+    Returns:
+        columns: The price columns, in the order of PRICE_COLUMNS
+    """
+
+    # the closes tell which rows of a ticker are bars
+    dependencies = indicator_dependencies(indicators, provided=DATE_ALIGNED_INDICATORS) | {'Close'}
+    return [column for column in PRICE_COLUMNS if column in dependencies]
+
+
+def align_eod_data(ticker_eod_data, sp500_data):
+    """
+    Align the end of day data of many tickers and the S&P 500 on one date axis
+
+    Parameters:
+        ticker_eod_data: The dictionary of ticker symbol and end of day data
+        sp500_data: The end of day data for S&P 500
+
+    Returns:
+        dates: The sorted numpy datetime64[D] array of every date
+        prices: The dictionary of price column and 2-D array (dates x tickers), NaN
+                where the ticker has no bar
+        sp500_close: The S&P 500 close on the dates, NaN where it has no bar
+    """
+
+    def _to_arrays(eod_data):
+        # same as clean_data, today's bar is dropped
+        eod_dates, eod_prices = eod_to_arrays(eod_data)
+        return eod_dates, np.column_stack([eod_prices[column] for column in PRICE_COLUMNS]).reshape(-1, len(PRICE_COLUMNS))
+
+    tickers_arrays = {ticker: _to_arrays(eod_data) for ticker, eod_data in ticker_eod_data.items()}
+
+    # the S&P 500 cleaned once and shared with the single ticker correlation
+    sp500 = benchmark_store.get('S&P 500', sp500_data)
+
+    dates = np.unique(np.concatenate([sp500.dates] + [x[0] for x in tickers_arrays.values()]))
+
+    prices = {column: np.full((len(dates), len(tickers_arrays)), np.nan) for column in PRICE_COLUMNS}
+    for idx, (ticker_dates, ticker_values) in enumerate(tickers_arrays.values()):
+        rows = np.searchsorted(dates, ticker_dates)
+        for col_idx, column in enumerate(PRICE_COLUMNS):
+            prices[column][rows, idx] = ticker_values[:, col_idx]
+
+    sp500_close = np.full(len(dates), np.nan)
+    sp500_close[np.searchsorted(dates, sp500.dates)] = sp500.close
+
+    return dates, prices, sp500_close
+
+
+def calculate_batch_indicators(prices, sp500_close, indicators=TECHNICAL_INDICATORS):
+    """
+    Calculate the technical indicator matrices of many tickers at once, the registered 
+    indicators run column-wise over the aligned price matrices
+
+    Parameters:
+        prices: The dictionary of price column and 2-D array (dates x tickers), NaN
+                where the ticker has no bar, at least the batch_price_columns
+        sp500_close: The S&P 500 close on the dates, NaN where it has no bar
+        indicators: The names of the registered indicators to calculate
+
+    Returns:
+        indicators: The dictionary of indicator name and 2-D array (dates x tickers), 
+                    in the order of the indicators
+    """
+
+    close = prices['Close']
+    valid = ~np.isnan(close)
+    rows_count, tickers_count = close.shape
+
+    # pack the bars of every ticker to the top of its column so the indicators
+    # run over consecutive bars, exactly like the single ticker calculation
+    order = np.argsort(~valid, axis=0, kind='stable')
+    packed_valid = np.arange(rows_count)[:, None] < valid.sum(axis=0)[None, :]
+
+    def _pack(values):
+        packed = np.take_along_axis(values, order, axis=0)
+        packed[~packed_valid] = np.nan
+        return packed
+
+    def _unpack(packed):
+        values = np.full(packed.shape, np.nan)
+        np.put_along_axis(values, order, np.where(packed_valid, packed, np.nan), axis=0)
+        return values
+
+    # every registered indicator below runs column-wise over all the tickers at once
+    inputs = {column: pd.DataFrame(_pack(prices[column])) for column in batch_price_columns(indicators)}
+
+    dependencies = indicator_dependencies(indicators, provided=DATE_ALIGNED_INDICATORS)
+    for name, calculation in DATE_ALIGNED_INDICATORS.items():
+        if name in dependencies:
+            inputs[name] = pd.DataFrame(_pack(calculation(close, sp500_close)))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = compute_indicators(inputs, indicators)
+
+    return {name: _unpack(np.asarray(matrix, dtype=float)) for name, matrix in values.items()}
+
+
+def split_batch_indicators(tickers, dates, prices, indicators):
+    """
+    Split the indicator matrices into one IndicatorResult per ticker, with only the 
+    dates the ticker has a bar
+
+    Parameters:
+        tickers: The list of ticker symbols, one per column
+        dates: The sorted numpy datetime64[D] array of the dates, one per row
+        prices: The dictionary of price column and 2-D array (dates x tickers)
+        indicators: The dictionary of indicator name and 2-D array (dates x tickers)
+
+    Returns:
+        output: The dictionary of ticker symbol and IndicatorResult
+    """
+
+    valid = ~np.isnan(prices['Close'])
+
+    output = dict()
+    for idx, ticker in enumerate(tickers):
+        rows = valid[:, idx]
+
+        columns = {column: prices[column][rows, idx] for column in PRICE_COLUMNS}
+        columns.update({name: values[rows, idx] for name, values in indicators.items()})
+
+        output[ticker] = IndicatorResult(dates[rows], columns)
+
+    return output
+
+
+def get_batch_technical_indicators(tickers, dates, prices, sp500_close, indicators=TECHNICAL_INDICATORS):
+    """
+    Calculate the technical indicators of many tickers at once, column-wise over
+    the aligned price matrices
+
+    Parameters:
+        tickers: The list of ticker symbols, one per column
+        dates: The sorted numpy datetime64[D] array of the dates, one per row
+        prices: The dictionary of price column and 2-D array (dates x tickers), NaN
+                where the ticker has no bar (see align_eod_data)
+        sp500_close: The S&P 500 close on the dates, NaN where it has no bar
+        indicators: The names of the registered indicators to calculate, all by default
+
+    Returns:
+        output: The dictionary of ticker symbol and IndicatorResult, the same as
+                get_techical_indicators for each ticker
+    """
+
+    return split_batch_indicators(tickers, dates, prices, calculate_batch_indicators(prices, sp500_close, indicators))
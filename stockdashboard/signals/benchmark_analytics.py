@@ -0,0 +1,219 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from stockdashboard.signals.eod_arrays import eod_to_arrays
+from stockdashboard.signals.indicator_result import IndicatorResult
+
+# benchmark name --> yahoo finance symbol, the same indexes as EndOfDayData._market_indexes_symbols
+BENCHMARK_SYMBOLS = {"S&P 500": "^GSPC",
+                     "NASDAQ": "^IXIC",
+                     "DJIA": "^DJI",
+                     "RUSSELL 2000": "^RUT",
+                     "S&P/TSX": "^GSPTSE"}
+
+BENCHMARK_WINDOWS = (20, 63, 126, 252)
+
+
+class Benchmark():
+    """
+    The cleaned end of day closes of a benchmark index, sorted by date
+    """
+
+    def __init__(self, name, eod_data):
+        self.name = name
+        self.signature = Benchmark.signature_of(eod_data)
+        self.dates, prices = eod_to_arrays(eod_data)
+        self.close = prices['Close']
+        self._series = None
+
+    @staticmethod
+    def signature_of(eod_data):
+        """
+        Get a cheap signature of the end of day data, to know when it has changed
+
+        Parameters:
+            eod_data: The end of day data of the benchmark
+
+        Returns:
+            signature: The tuple of the number of bars and the first and last bars
+        """
+
+        if not eod_data:
+            return (0,)
+        return (len(eod_data), str(eod_data[0][0]), str(eod_data[-1][0]), float(eod_data[-1][4]))
+
+    @property
+    def series(self):
+        """
+        Get the closes as a pandas series indexed by date, like clean_data
+        """
+
+        if self._series is None:
+            self._series = pd.Series(self.close, index=pd.DatetimeIndex(self.dates.astype('datetime64[ns]'), name='Date'), name='Close')
+        return self._series
+
+
+class BenchmarkStore():
+    """
+    The benchmarks cleaned once and shared by every request, a benchmark is only
+    cleaned again when its end of day data changes
+    """
+
+    def __init__(self):
+        self._benchmarks = dict()
+        self._lock = threading.Lock()
+
+    def get(self, name, eod_data):
+        """
+        Get the cleaned benchmark of the end of day data
+
+        Parameters:
+            name: The benchmark name (i.e. a key of BENCHMARK_SYMBOLS)
+            eod_data: The end of day data of the benchmark
+
+        Returns:
+            benchmark: The Benchmark of the data
+        """
+
+        signature = Benchmark.signature_of(eod_data)
+
+        with self._lock:
+            benchmark = self._benchmarks.get(name)
+            if benchmark is None or benchmark.signature != signature:
+                benchmark = Benchmark(name, eod_data)
+                self._benchmarks[name] = benchmark
+
+        return benchmark
+
+    def __contains__(self, name):
+        return name in self._benchmarks
+
+
+benchmark_store = BenchmarkStore()
+
+
+def align_to_benchmark(dates, close, benchmark):
+    """
+    Align the ticker closes on the benchmark dates (from the first ticker date)
+    with a sorted-array merge
+
+    Parameters:
+        dates: The sorted numpy datetime64[D] array of the ticker dates
+        close: The ticker closes
+        benchmark: The Benchmark to align to
+
+    Returns:
+        rows: The benchmark rows from the first ticker date
+        aligned_close: The ticker close on each of those rows, NaN where the ticker has no bar
+        ticker_rows: For every ticker date, the index in the rows (-1 if the benchmark has no bar)
+    """
+
+    rows = np.arange(np.searchsorted(benchmark.dates, dates[0]), len(benchmark.dates)) if len(dates) else np.arange(0)
+    benchmark_dates = benchmark.dates[rows]
+
+    positions = np.searchsorted(benchmark_dates, dates)
+    found = positions < len(benchmark_dates)
+    found[found] = benchmark_dates[positions[found]] == dates[found]
+
+    aligned_close = np.full(len(rows), np.nan)
+    aligned_close[positions[found]] = close[found]
+    ticker_rows = np.where(found, positions, -1)
+
+    return rows, aligned_close, ticker_rows
+
+
+def _daily_returns(close):
+    """
+    Get the daily returns of the closes, NaN where either close is missing or not positive
+
+    Parameters:
+        close: The array of closes
+
+    Returns:
+        returns: The array of daily returns, NaN for the first row
+    """
+
+    close = np.where(close > 0, close, np.nan)
+    returns = np.full(len(close), np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+
+    return returns
+
+
+def rolling_correlation_beta(ticker_returns, benchmark_returns, windows=BENCHMARK_WINDOWS):
+    """
+    Calculate the rolling correlation and beta of the ticker returns to the benchmark
+    returns for every window at once, with one set of cumulative sums
+
+    Parameters:
+        ticker_returns: The array of the ticker returns
+        benchmark_returns: The array of the benchmark returns on the same rows
+        windows: The rolling window lengths
+
+    Returns:
+        correlation: The dictionary of window and correlation array, NaN until the window is full
+        beta: The dictionary of window and beta array, NaN until the window is full
+    """
+
+    valid = ~(np.isnan(ticker_returns) | np.isnan(benchmark_returns))
+
+    # centering first keeps the windowed variances precise
+    x = np.where(valid, benchmark_returns - benchmark_returns[valid].mean() if valid.any() else 0, 0)
+    y = np.where(valid, ticker_returns - ticker_returns[valid].mean() if valid.any() else 0, 0)
+
+    sums = np.zeros((6, len(x) + 1))
+    np.cumsum(np.vstack((valid, x, y, x * x, y * y, x * y)), axis=1, out=sums[:, 1:])
+
+    correlation, beta = dict(), dict()
+    for window in windows:
+        correlation[window] = np.full(len(x), np.nan)
+        beta[window] = np.full(len(x), np.nan)
+        if len(x) < window:
+            continue
+
+        count, sum_x, sum_y, sum_xx, sum_yy, sum_xy = sums[:, window:] - sums[:, :-window]
+        full = count == window
+
+        cov = sum_xy - sum_x * sum_y / window
+        var_x = np.maximum(sum_xx - sum_x * sum_x / window, 0)
+        var_y = np.maximum(sum_yy - sum_y * sum_y / window, 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation[window][window - 1:] = np.where(full & (var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan)
+            beta[window][window - 1:] = np.where(full & (var_x > 0), cov / var_x, np.nan)
+
+    return correlation, beta
+
+
+def get_benchmark_analytics(ticker_data, benchmarks, windows=BENCHMARK_WINDOWS):
+    """
+    Calculate the rolling correlation and beta of the ticker daily returns to every
+    benchmark for every window
+
+    Parameters:
+        ticker_data: The end of day data for the ticker
+        benchmarks: The list of Benchmark (see benchmark_store)
+        windows: The rolling window lengths, in benchmark bars
+
+    Returns:
+        output: The IndicatorResult on the ticker dates, with the CORR_<window>_<benchmark>
+                and BETA_<window>_<benchmark> columns
+    """
+
+    dates, prices = eod_to_arrays(ticker_data)
+    close = prices['Close']
+
+    columns = dict()
+    for benchmark in benchmarks:
+        rows, aligned_close, ticker_rows = align_to_benchmark(dates, close, benchmark)
+        correlation, beta = rolling_correlation_beta(_daily_returns(aligned_close), _daily_returns(benchmark.close[rows]), windows)
+
+        # back on the ticker dates, NaN where the benchmark has no bar
+        found = ticker_rows >= 0
+        for window in windows:
+            for name, values in ((f'CORR_{window}_{benchmark.name}', correlation[window]), (f'BETA_{window}_{benchmark.name}', beta[window])):
+                columns[name] = np.full(len(dates), np.nan)
+                columns[name][found] = values[ticker_rows[found]]
+
+    return IndicatorResult(dates, columns)
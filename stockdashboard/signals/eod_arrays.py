@@ -0,0 +1,45 @@
+import datetime
+import numpy as np
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "AdjClose"]
+
+# ordinal of the numpy datetime64 epoch
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def eod_dates(eod_data):
+    """
+    Get the dates of the end of day rows as a numpy datetime64[D] array, without
+    formatting them as strings
+
+    Parameters:
+        eod_data: The end of day data (the date, a date or datetime, first in every row)
+
+    Returns:
+        dates: The numpy datetime64[D] array of the dates
+    """
+
+    ordinals = np.fromiter((x[0].toordinal() for x in eod_data), dtype=np.int64, count=len(eod_data))
+    return (ordinals - _EPOCH_ORDINAL).astype('datetime64[D]')
+
+
+def eod_to_arrays(eod_data, drop_today=True):
+    """
+    Convert the end of day rows to a date array and float64 price arrays
+
+    Parameters:
+        eod_data: The end of day data, rows of date followed by PRICE_COLUMNS
+        drop_today: True to drop today's bar, it is not complete
+
+    Returns:
+        dates: The numpy datetime64[D] array of the dates
+        prices: The dictionary of price column and float64 array
+    """
+
+    dates = eod_dates(eod_data)
+    values = np.array([x[1:7] for x in eod_data], dtype=float).reshape(-1, len(PRICE_COLUMNS))
+
+    if drop_today and len(dates) and dates[-1] >= np.datetime64(datetime.date.today(), 'D'):
+        dates, values = dates[:-1], values[:-1]
+
+    return dates, {column: values[:, idx] for idx, column in enumerate(PRICE_COLUMNS)}
@@ -0,0 +1,274 @@
+import datetime
+import numpy as np
+
+from stockdashboard.signals.technical_signal_calculations import TECHNICAL_INDICATORS, clean_data, wilder_smoothing
+from stockdashboard.signals.eod_arrays import PRICE_COLUMNS
+from stockdashboard.signals.indicator_result import IndicatorResult
+
+EMA_SPANS = (5, 21, 63, 126, 252)
+MACD_SPANS = (12, 26)
+MACD_SIGNAL_SPAN = 9
+DAILY_MOVEMENT_SPAN = 10
+WILDER_PERIOD = 14
+BB_WINDOW = 20
+CORRELATION_WINDOW = 5
+
+# the state needs full bollinger and wilder windows before it can be extended
+MIN_STATE_BARS = max(BB_WINDOW, WILDER_PERIOD)
+
+# the registered indicators the state can extend, the others are only calculated in full
+INCREMENTAL_INDICATORS = ('ATR', 'EMA_5', 'EMA_21', 'EMA_63', 'EMA_126', 'EMA_252', 'RSI', 'BB_20MA', 'BB_UpperBands', 
+                          'BB_LowerBands', 'MACD', 'Signal_Line', 'MACD_Histogram', 'SP500ROLL_CORR', 'Daily Movement EMA')
+
+
+def _ema_step(previous, value, span):
+    """
+    Advance an exponential moving average (pandas ewm, adjust=False) by one value
+
+    Parameters:
+        previous: The previous ema value
+        value: The new value
+        span: The span of the ema
+
+    Returns:
+        ema: The updated ema value
+    """
+
+    alpha = 2 / (span + 1)
+    return (1 - alpha) * previous + alpha * value
+
+
+def _last_ema(series, span):
+    """
+    Get the last exponential moving average (pandas ewm, adjust=False) of the series
+
+    Parameters:
+        series: The pandas series of values
+        span: The span of the ema
+
+    Returns:
+        ema: The last ema value
+    """
+
+    return series.ewm(span=span, adjust=False).mean().iloc[-1]
+
+
+def _window_correlation(window):
+    """
+    Calculate the correlation coefficient of the (S&P 500 close, ticker close) pairs
+
+    Parameters:
+        window: The list of [S&P 500 close, ticker close] pairs
+
+    Returns:
+        correlation: The correlation coefficient, NaN if the window is incomplete
+    """
+
+    pairs = np.array(window, dtype=float)
+    if len(pairs) < CORRELATION_WINDOW or np.isnan(pairs).any():
+        return np.nan
+
+    deviations = pairs - pairs.mean(axis=0)
+    denominator = np.sqrt((deviations[:, 0] ** 2).sum() * (deviations[:, 1] ** 2).sum())
+    if denominator == 0:
+        return np.nan
+
+    return (deviations[:, 0] * deviations[:, 1]).sum() / denominator
+
+
+def _rows_after(eod_data, last_date):
+    """
+    Get the end of day rows after last_date, excluding today's (incomplete) bar
+
+    Parameters:
+        eod_data: The end of day data sorted by date
+        last_date: The date string (%Y-%m-%d) of the last processed bar
+
+    Returns:
+        new_rows: The list of the rows newer than last_date
+    """
+
+    today = datetime.date.today().strftime("%Y-%m-%d")
+
+    # walk back from the end, the new bars are only the tail of the history
+    new_rows = list()
+    for row in reversed(eod_data):
+        row_date = row[0].strftime(r'%Y-%m-%d')
+        if row_date <= last_date:
+            break
+        if row_date < today:
+            new_rows.append([row_date] + list(row[1:]))
+
+    return new_rows[::-1]
+
+
+def build_indicator_state(ticker_data, sp500_data, indicators=TECHNICAL_INDICATORS):
+    """
+    Build the trailing state of the technical indicators from the full history
+
+    Parameters:
+        ticker_data: The end of day data for the ticker
+        sp500_data: The end of day data for S&P 500
+        indicators: The names of the indicators the state is extended for
+
+    Returns:
+        state: The json serializable dictionary with the trailing state of every indicator
+    """
+
+    ticker_df = clean_data(ticker_data)
+    sp500_df = clean_data(sp500_data)
+
+    close = ticker_df['Close'].values.astype(float)
+    high = ticker_df['High'].values.astype(float)
+    low = ticker_df['Low'].values.astype(float)
+    previous_close = np.concatenate(([np.nan], close[:-1]))
+
+    # average true range
+    true_range = np.fmax(np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)), high - low).round(4)
+
+    # relative strength index
+    change = close - previous_close
+    advance = np.where(change >= 0, change, 0)
+    decline = np.abs(np.where(change <= 0, change, 0))
+
+    # moving average convergence divergence
+    macd_ema = {str(span): _last_ema(ticker_df['Close'], span) for span in MACD_SPANS}
+    macd = ticker_df['Close'].ewm(span=MACD_SPANS[0], adjust=False).mean() - ticker_df['Close'].ewm(span=MACD_SPANS[1], adjust=False).mean()
+    macd_ema['signal'] = _last_ema(macd, MACD_SIGNAL_SPAN)
+
+    # correlation window is kept on the S&P 500 dates up to the last ticker bar
+    last_date = ticker_df.index[-1]
+    sp500_df = sp500_df.loc[ticker_df.index[0]:last_date]
+    sp500_close = sp500_df['Close'].values.astype(float)
+    aligned_close = ticker_df['Close'].reindex(sp500_df.index).values.astype(float)
+    corr_window = [[sp, tk] for sp, tk in zip(sp500_close[-(CORRELATION_WINDOW - 1):], aligned_close[-(CORRELATION_WINDOW - 1):])]
+
+    state = {
+        'indicators': list(indicators),
+        'last_date': last_date.strftime('%Y-%m-%d'),
+        'bars': len(close),
+        'last_close': close[-1],
+        'ema': {str(span): _last_ema(ticker_df['Close'], span) for span in EMA_SPANS},
+        'macd_ema': macd_ema,
+        'daily_movement_ema': _last_ema(ticker_df['High'] - ticker_df['Low'], DAILY_MOVEMENT_SPAN),
+        'atr': wilder_smoothing(true_range, WILDER_PERIOD)[-1],
+        'rsi_advance': wilder_smoothing(advance, WILDER_PERIOD)[-1],
+        'rsi_decline': wilder_smoothing(decline, WILDER_PERIOD)[-1],
+        'bb_window': close[-(BB_WINDOW - 1):].tolist(),
+        'corr_window': corr_window,
+        'sp500_last_date': (sp500_df.index[-1] if len(sp500_df) else last_date).strftime('%Y-%m-%d'),
+    }
+
+    return _to_builtin(state)
+
+
+def update_indicator_state(state, ticker_data, sp500_data, indicators=TECHNICAL_INDICATORS):
+    """
+    Extend the trailing indicator state with the bars added after state['last_date'],
+    in O(new bars)
+
+    Parameters:
+        state: The indicator state from build_indicator_state, updated in place
+        ticker_data: The end of day data for the ticker (only the tail is read)
+        sp500_data: The end of day data for S&P 500 (only the tail is read)
+        indicators: The names of the indicators to extend
+
+    Returns:
+        new_rows: The IndicatorResult of the new rows, or None if the state cannot 
+                  be extended and the indicators must be recalculated
+    """
+
+    # a state built for other indicators, or an indicator without a step formula, is recalculated
+    if state.get('indicators') != list(indicators) or any(name not in INCREMENTAL_INDICATORS for name in indicators):
+        return None
+
+    if state['bars'] < MIN_STATE_BARS:
+        return None
+
+    new_ticker_rows = _rows_after(ticker_data, state['last_date'])
+    if not new_ticker_rows:
+        return IndicatorResult([], dict())
+
+    new_last_date = new_ticker_rows[-1][0]
+    new_sp500_rows = [x for x in _rows_after(sp500_data, state['sp500_last_date']) if x[0] <= new_last_date]
+
+    # the S&P 500 must cover exactly the new bars, otherwise older correlations would change
+    if not new_sp500_rows or new_sp500_rows[0][0] <= state['last_date'] or new_sp500_rows[-1][0] != new_last_date:
+        return None
+
+    # correlation on the S&P 500 dates, joined with the new ticker closes
+    ticker_close_by_date = {x[0]: float(x[4]) for x in new_ticker_rows}
+    correlation_by_date = dict()
+    corr_window = state['corr_window']
+    for sp500_row in new_sp500_rows:
+        corr_window = (corr_window + [[float(sp500_row[4]), ticker_close_by_date.get(sp500_row[0], np.nan)]])[-CORRELATION_WINDOW:]
+        correlation_by_date[sp500_row[0]] = _window_correlation(corr_window)
+    state['corr_window'] = corr_window[-(CORRELATION_WINDOW - 1):]
+    state['sp500_last_date'] = new_sp500_rows[-1][0]
+
+    new_rows = list()
+    for date, open_price, high, low, close, volume, adj_close in new_ticker_rows:
+        open_price, high, low, close, adj_close = float(open_price), float(high), float(low), float(close), float(adj_close)
+        previous_close = state['last_close']
+
+        # ^formula --> Current ATR = [(Prior ATR x 13) + Current TR] / 14
+        true_range = round(max(abs(high - previous_close), abs(low - previous_close), high - low), 4)
+        state['atr'] = ((state['atr'] * (WILDER_PERIOD - 1)) + true_range) / WILDER_PERIOD
+
+        for span in EMA_SPANS:
+            state['ema'][str(span)] = _ema_step(state['ema'][str(span)], close, span)
+
+        change = close - previous_close
+        advance = change if change >= 0 else 0
+        decline = abs(change) if change <= 0 else 0
+        state['rsi_advance'] = ((state['rsi_advance'] * (WILDER_PERIOD - 1)) + advance) / WILDER_PERIOD
+        state['rsi_decline'] = ((state['rsi_decline'] * (WILDER_PERIOD - 1)) + decline) / WILDER_PERIOD
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + np.float64(state['rsi_advance']) / state['rsi_decline']))
+
+        bb_window = np.array(state['bb_window'] + [close])
+        state['bb_window'] = bb_window[1:].tolist()
+        bb_ma = bb_window.mean()
+        bb_std = bb_window.std(ddof=0)
+
+        macd_ema = state['macd_ema']
+        for span in MACD_SPANS:
+            macd_ema[str(span)] = _ema_step(macd_ema[str(span)], close, span)
+        macd = macd_ema[str(MACD_SPANS[0])] - macd_ema[str(MACD_SPANS[1])]
+        macd_ema['signal'] = _ema_step(macd_ema['signal'], macd, MACD_SIGNAL_SPAN)
+
+        state['daily_movement_ema'] = _ema_step(state['daily_movement_ema'], high - low, DAILY_MOVEMENT_SPAN)
+        state['last_close'] = close
+        state['bars'] += 1
+
+        values = {'Open': open_price, 'High': high, 'Low': low, 'Close': close, 'Volume': volume, 'AdjClose': adj_close, 'ATR': state['atr']}
+        values.update({f'EMA_{span}': state['ema'][str(span)] for span in EMA_SPANS})
+        values.update({'RSI': rsi, 'BB_20MA': bb_ma, 'BB_UpperBands': bb_ma + (bb_std * 2), 'BB_LowerBands': bb_ma - (bb_std * 2),
+                       'MACD': macd, 'Signal_Line': macd_ema['signal'], 'MACD_Histogram': macd - macd_ema['signal'],
+                       'SP500ROLL_CORR': correlation_by_date.get(date, np.nan), 'Daily Movement EMA': state['daily_movement_ema']})
+        new_rows.append(values)
+
+    state['last_date'] = new_last_date
+
+    return IndicatorResult([x[0] for x in new_ticker_rows], {name: [x[name] for x in new_rows] for name in PRICE_COLUMNS + list(indicators)})
+
+
+def _to_builtin(state):
+    """
+    Convert the numpy values in the state to python types for json serialization
+
+    Parameters:
+        state: The indicator state
+
+    Returns:
+        state: The indicator state with python types
+    """
+
+    if isinstance(state, dict):
+        return {key: _to_builtin(value) for key, value in state.items()}
+    if isinstance(state, (list, tuple)):
+        return [_to_builtin(value) for value in state]
+    if isinstance(state, np.generic):
+        return state.item()
+
+    return state
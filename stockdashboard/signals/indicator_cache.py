@@ -0,0 +1,187 @@
+import os
+import json
+import hashlib
+import threading
+import collections
+import numpy as np
+
+from stockdashboard.signals.indicator_result import IndicatorResult
+
+# 64 MB of indicator arrays kept in memory, roughly 250 tickers with 10 years of history
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+
+def indicator_params_hash(indicators, sp500_last_date=None):
+    """
+    Hash the parameter set of an indicator calculation
+
+    Parameters:
+        indicators: The list of the calculated indicator names
+        sp500_last_date: The date of the last S&P 500 bar used for the correlation
+
+    Returns:
+        params_hash: The short hex digest of the parameters
+    """
+
+    params = json.dumps({'indicators': list(indicators), 'sp500_last_date': str(sp500_last_date)})
+    return hashlib.sha1(params.encode()).hexdigest()[:16]
+
+
+class IndicatorCache():
+    """
+    Memoized technical indicator results keyed by (ticker, last bar date, parameter hash),
+    with an in-memory LRU tier limited to a byte budget and an on-disk tier that
+    survives restarts
+    """
+
+    def __init__(self, cache_dir, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.memory_bytes = 0
+        self.hits = {'memory': 0, 'disk': 0}
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        """
+        Get the path of the disk file of a key
+
+        Parameters:
+            key: The (ticker, last date, parameter hash) key
+
+        Returns:
+            path: The path of the .npz file
+        """
+
+        return os.path.join(self.cache_dir, '{}_{}_{}.npz'.format(*key))
+
+    def _remember(self, key, result):
+        """
+        Add a result to the memory tier and evict the least recently used results over the budget
+
+        Parameters:
+            key: The (ticker, last date, parameter hash) key
+            result: The IndicatorResult to keep in memory
+        """
+
+        if key in self._memory:
+            self.memory_bytes -= self._memory.pop(key).nbytes
+
+        # a result larger than the whole budget is only kept on disk
+        if result.nbytes > self.memory_budget:
+            return
+
+        self._memory[key] = result
+        self.memory_bytes += result.nbytes
+
+        while self.memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= evicted.nbytes
+
+    def get(self, ticker, last_date, params_hash):
+        """
+        Get a cached result, from memory first and then from disk
+
+        Parameters:
+            ticker: The ticker symbol
+            last_date: The date (%Y-%m-%d) of the last end of day bar
+            params_hash: The hash of the indicator parameters (see indicator_params_hash)
+
+        Returns:
+            result: The cached IndicatorResult, None if it is not cached
+        """
+
+        key = (ticker, str(last_date), params_hash)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits['memory'] += 1
+                return self._memory[key]
+
+            path = self._path(key)
+            if not os.path.exists(path):
+                self.misses += 1
+                return None
+
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    names = data['names'].tolist()
+                    result = IndicatorResult(data['dates'], {name: data[f'column_{idx}'] for idx, name in enumerate(names)})
+            except (OSError, ValueError, KeyError) as e:
+                print('INDICATOR CACHE: CANNOT READ', path, e)
+                self.misses += 1
+                return None
+
+            self._remember(key, result)
+            self.hits['disk'] += 1
+
+            return result
+
+    def _remove(self, ticker, before_date=None):
+        """
+        Remove the cached results of the ticker from memory and from disk, the lock must be held
+
+        Parameters:
+            ticker: The ticker symbol
+            before_date: Only remove the results ending before this date (%Y-%m-%d), None for all of them
+        """
+
+        def stale(date):
+            return before_date is None or date < before_date
+
+        for key in [x for x in self._memory if x[0] == ticker and stale(x[1])]:
+            self.memory_bytes -= self._memory.pop(key).nbytes
+
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith('.npz'):
+                continue
+            file_ticker, file_date, _ = file_name.rsplit('_', 2)
+            if file_ticker == ticker and stale(file_date):
+                try:
+                    os.remove(os.path.join(self.cache_dir, file_name))
+                except FileNotFoundError:
+                    pass
+
+    def set(self, ticker, last_date, params_hash, result):
+        """
+        Cache a result in memory and on disk, the results of the ticker ending on
+        an earlier bar are removed so the disk tier keeps one date per ticker
+
+        Parameters:
+            ticker: The ticker symbol
+            last_date: The date (%Y-%m-%d) of the last end of day bar
+            params_hash: The hash of the indicator parameters (see indicator_params_hash)
+            result: The IndicatorResult to cache
+        """
+
+        key = (ticker, str(last_date), params_hash)
+        path = self._path(key)
+
+        # column names are stored apart, they are not all valid npz keys
+        arrays = {f'column_{idx}': values for idx, values in enumerate(result.columns.values())}
+
+        with self._lock:
+            self._remember(key, result)
+
+            # write then rename, a concurrent reader never sees a partial file
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as f:
+                np.savez(f, dates=result.dates, names=np.array(list(result.columns), dtype=str), **arrays)
+            os.replace(temp_path, path)
+
+            self._remove(ticker, before_date=str(last_date))
+
+    def invalidate(self, ticker):
+        """
+        Remove every cached result of the ticker, from memory and from disk
+
+        Parameters:
+            ticker: The ticker symbol
+        """
+
+        with self._lock:
+            self._remove(ticker)
@@ -0,0 +1,204 @@
+import os
+import math
+import concurrent.futures
+import numpy as np
+from multiprocessing import shared_memory
+
+from stockdashboard.signals.technical_signal_calculations import TECHNICAL_INDICATORS
+from stockdashboard.signals.batch_indicators import align_eod_data, batch_price_columns, calculate_batch_indicators, split_batch_indicators
+
+# shards per process, smaller shards balance the load of uneven histories
+SHARDS_PER_PROCESS = 4
+
+
+def _create_shared_array(shape):
+    """
+    Create a float64 array in a new shared memory block
+
+    Parameters:
+        shape: The shape of the array
+
+    Returns:
+        shm: The SharedMemory block, to close and unlink when done
+        array: The numpy array backed by the block
+    """
+
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _attach_shared_array(name, shape):
+    """
+    Attach to a float64 array in an existing shared memory block
+
+    Parameters:
+        name: The name of the SharedMemory block
+        shape: The shape of the array
+
+    Returns:
+        shm: The SharedMemory block, to close when done
+        array: The numpy array backed by the block
+    """
+
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _farm_worker(prices_name, prices_shape, sp500_name, start, end, columns, indicator_names):
+    """
+    Calculate the indicators of a shard of tickers (columns start:end) in a worker process,
+    the prices are read from shared memory and the indicators written to a new block
+
+    Parameters:
+        prices_name: The shared memory name of the (price column x dates x tickers) array
+        prices_shape: The shape of the prices array
+        sp500_name: The shared memory name of the S&P 500 close array
+        start: The first ticker column of the shard
+        end: The column after the last ticker column of the shard
+        columns: The price columns, in the order of the prices array
+        indicator_names: The names of the registered indicators to calculate
+
+    Returns:
+        output_name: The shared memory name of the (indicator x dates x shard tickers) array
+        names: The indicator names, in the order of the output array
+    """
+
+    prices_shm, prices = _attach_shared_array(prices_name, prices_shape)
+    sp500_shm, sp500_close = _attach_shared_array(sp500_name, prices_shape[1:2])
+
+    try:
+        shard_prices = {column: prices[idx, :, start:end] for idx, column in enumerate(columns)}
+        indicators = calculate_batch_indicators(shard_prices, sp500_close, indicator_names)
+    finally:
+        # the views must be released before the blocks are closed
+        del prices, sp500_close, shard_prices
+        prices_shm.close()
+        sp500_shm.close()
+
+    names = list(indicators)
+    output_shm, output = _create_shared_array((len(names), prices_shape[1], end - start))
+    try:
+        for idx, name in enumerate(names):
+            output[idx] = indicators[name]
+    except Exception:
+        del output
+        output_shm.close()
+        output_shm.unlink()
+        raise
+
+    del output
+    output_shm.close()
+
+    return output_shm.name, names
+
+
+def _read_shard(output_name, names, shape, tickers, dates, prices):
+    """
+    Split the indicators of a finished shard per ticker and release its shared memory
+
+    Parameters:
+        output_name: The shared memory name of the shard indicators
+        names: The indicator names, in the order of the array
+        shape: The (dates, shard tickers) shape of every indicator
+        tickers: The ticker symbols of the shard
+        dates: The numpy datetime64[D] array of the dates
+        prices: The dictionary of price column and 2-D array of the shard
+
+    Returns:
+        output: The dictionary of ticker symbol and IndicatorResult
+    """
+
+    output_shm, output = _attach_shared_array(output_name, (len(names),) + shape)
+    try:
+        # split_batch_indicators copies the rows of every ticker out of the block
+        return split_batch_indicators(tickers, dates, prices, {name: output[idx] for idx, name in enumerate(names)})
+    finally:
+        del output
+        output_shm.close()
+        output_shm.unlink()
+
+
+def get_farm_technical_indicators(ticker_eod_data, sp500_data, processes=None, shard_size=None, indicators=TECHNICAL_INDICATORS):
+    """
+    Calculate the technical indicators of a large universe of tickers on a process pool,
+    the tickers are sharded across the processes and the price matrices shared
+    through shared memory instead of being pickled
+
+    Parameters:
+        ticker_eod_data: The dictionary of ticker symbol and end of day data
+        sp500_data: The end of day data for S&P 500
+        processes: The number of worker processes, the number of cores by default
+        shard_size: The number of tickers per task, by default the tickers are split
+                    in SHARDS_PER_PROCESS shards per process
+        indicators: The names of the registered indicators to calculate, all by default
+
+    Returns:
+        output: The dictionary of ticker symbol and IndicatorResult, the same as
+                get_techical_indicators for each ticker
+    """
+
+    tickers = list(ticker_eod_data)
+    if not tickers:
+        return dict()
+
+    processes = processes or os.cpu_count() or 1
+    shard_size = shard_size or max(math.ceil(len(tickers) / (processes * SHARDS_PER_PROCESS)), 1)
+
+    dates, prices, sp500_close = align_eod_data(ticker_eod_data, sp500_data)
+    # only the price columns the indicators read are shipped to the workers
+    columns = batch_price_columns(indicators)
+    prices_shape = (len(columns), len(dates), len(tickers))
+
+    prices_shm, shared_prices = _create_shared_array(prices_shape)
+    sp500_shm, shared_sp500_close = _create_shared_array((len(dates),))
+
+    results = dict()
+    try:
+        for idx, column in enumerate(columns):
+            shared_prices[idx] = prices[column]
+        shared_sp500_close[:] = sp500_close
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = {executor.submit(_farm_worker, prices_shm.name, prices_shape, sp500_shm.name, start, min(start + shard_size, len(tickers)), columns, list(indicators)): start
+                       for start in range(0, len(tickers), shard_size)}
+
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    start = futures[future]
+                    end = min(start + shard_size, len(tickers))
+                    output_name, names = future.result()
+
+                    shard_prices = {column: values[:, start:end] for column, values in prices.items()}
+                    results.update(_read_shard(output_name, names, (len(dates), end - start), tickers[start:end], dates, shard_prices))
+            except Exception:
+                # release the blocks of the shards that finished but were not read
+                for future in futures:
+                    future.cancel()
+                for future in futures:
+                    if not future.cancelled() and future.exception() is None:
+                        _release_shared_memory(future.result()[0])
+                raise
+    finally:
+        del shared_prices, shared_sp500_close
+        for shm in (prices_shm, sp500_shm):
+            shm.close()
+            shm.unlink()
+
+    return {ticker: results[ticker] for ticker in tickers}
+
+
+def _release_shared_memory(name):
+    """
+    Unlink a shared memory block that was not read, ignoring blocks already released
+
+    Parameters:
+        name: The name of the SharedMemory block
+    """
+
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+
+    shm.close()
+    shm.unlink()
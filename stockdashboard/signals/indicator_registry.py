@@ -0,0 +1,106 @@
+class Indicator():
+    """
+    A registered indicator (or shared intermediate), with the names of the values
+    it needs and the names of the values it calculates
+    """
+
+    def __init__(self, func, inputs, outputs):
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def __repr__(self):
+        return f'{self.func.__name__},{self.inputs},{self.outputs}'
+
+
+# output name --> indicator calculating it
+INDICATOR_REGISTRY = dict()
+
+
+def register_indicator(inputs, outputs):
+    """
+    Decorator to register an indicator function in the registry, the function is
+    called with the input values in order and returns one value per output
+    (a tuple when there are several outputs)
+
+    Parameters:
+        inputs: The names of the values the indicator needs
+        outputs: The names of the values the indicator calculates
+
+    Returns:
+        decorator: The decorator registering the function
+    """
+
+    def decorator(func):
+        indicator = Indicator(func, inputs, outputs)
+        for output in indicator.outputs:
+            if output in INDICATOR_REGISTRY:
+                raise ValueError(f"Indicator output '{output}' is already registered by {INDICATOR_REGISTRY[output]}")
+            INDICATOR_REGISTRY[output] = indicator
+        return func
+
+    return decorator
+
+
+def compute_indicators(inputs, outputs):
+    """
+    Calculate only the requested indicators and the intermediates they depend on,
+    every intermediate is calculated once and shared
+
+    Parameters:
+        inputs: The dictionary of the base values (i.e. the price columns)
+        outputs: The names of the indicators to calculate
+
+    Returns:
+        indicators: The dictionary of the requested indicator names and values
+    """
+
+    values = dict(inputs)
+
+    def _resolve(name, resolving):
+        if name in values:
+            return
+        if name not in INDICATOR_REGISTRY:
+            raise ValueError(f"Unknown indicator or input '{name}'")
+        if name in resolving:
+            raise ValueError(f"Circular indicator dependency on '{name}'")
+
+        indicator = INDICATOR_REGISTRY[name]
+        for dependency in indicator.inputs:
+            _resolve(dependency, resolving | {name})
+
+        results = indicator.func(*[values[x] for x in indicator.inputs])
+        if len(indicator.outputs) == 1:
+            results = (results,)
+        values.update(zip(indicator.outputs, results))
+
+    for name in outputs:
+        _resolve(name, frozenset())
+
+    return {name: values[name] for name in outputs}
+
+
+def indicator_dependencies(outputs, provided=()):
+    """
+    Get every name the indicators depend on, the registered intermediates and the
+    base values, without calculating anything
+
+    Parameters:
+        outputs: The names of the indicators
+        provided: The names of the values given as inputs, their dependencies are not followed
+
+    Returns:
+        dependencies: The set of the names of the indicators, their intermediates and their base values
+    """
+
+    dependencies = set()
+    pending = list(outputs)
+    while pending:
+        name = pending.pop()
+        if name in dependencies:
+            continue
+        dependencies.add(name)
+        if name in INDICATOR_REGISTRY and name not in provided:
+            pending.extend(INDICATOR_REGISTRY[name].inputs)
+
+    return dependencies
@@ -0,0 +1,167 @@
+import io
+import csv
+import json
+import numpy as np
+
+
+class IndicatorResult():
+    """
+    Columnar technical indicator data, a sorted date array and one float array
+    per column, formatted for display only when the rows are requested
+    """
+
+    # columns shown as 0 when the indicator is not available yet
+    ZERO_FILL_COLUMNS = ('ATR', 'RSI', 'BB_20MA', 'BB_UpperBands', 'BB_LowerBands', 'SP500ROLL_CORR')
+    PERCENT_COLUMNS = ('SP500ROLL_CORR',)
+    INTEGER_COLUMNS = ('Volume',)
+
+    def __init__(self, dates, columns):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.columns = {name: np.asarray(values, dtype=float) for name, values in columns.items()}
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Create the result from a dataframe indexed by date
+
+        Parameters:
+            df: The pandas dataframe of the indicators, indexed by date
+
+        Returns:
+            result: The IndicatorResult of the dataframe
+        """
+
+        return cls(df.index.values.astype('datetime64[D]'), {name: df[name].values for name in df.columns})
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def last_date(self):
+        """
+        Get the date of the last row as a string (%Y-%m-%d), None if empty
+        """
+
+        return str(self.dates[-1]) if len(self.dates) else None
+
+    @property
+    def nbytes(self):
+        """
+        Get the number of bytes used by the arrays of the result
+        """
+
+        return self.dates.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def slice(self, start_date=None, end_date=None):
+        """
+        Get the rows between two dates (inclusive) without copying the arrays
+
+        Parameters:
+            start_date: The first date (%Y-%m-%d or date), None for the first row
+            end_date: The last date (%Y-%m-%d or date), None for the last row
+
+        Returns:
+            result: The IndicatorResult of the rows in the date range
+        """
+
+        start = 0 if start_date is None else np.searchsorted(self.dates, np.datetime64(start_date, 'D'), side='left')
+        end = len(self.dates) if end_date is None else np.searchsorted(self.dates, np.datetime64(end_date, 'D'), side='right')
+
+        return IndicatorResult(self.dates[start:end], {name: values[start:end] for name, values in self.columns.items()})
+
+    def append(self, other):
+        """
+        Append the rows of another result that starts after the last date of this one
+
+        Parameters:
+            other: The IndicatorResult with the newer rows
+
+        Returns:
+            result: The IndicatorResult with the rows of both results
+
+        Raises:
+            ValueError: The other result has other columns or does not start after the last date of this one
+        """
+
+        if not len(other):
+            return self
+        if list(other.columns) != list(self.columns):
+            raise ValueError(f"Cannot append the columns {list(other.columns)} to {list(self.columns)}")
+        if len(self) and other.dates[0] <= self.dates[-1]:
+            raise ValueError(f"Cannot append rows from {other.dates[0]}, the result already ends on {self.dates[-1]}")
+
+        dates = np.concatenate((self.dates, other.dates))
+        columns = {name: np.concatenate((values, other.columns[name])) for name, values in self.columns.items()}
+
+        return IndicatorResult(dates, columns)
+
+    def _formatted_columns(self):
+        """
+        Format every column for display, rounded to 2 decimals
+
+        Returns:
+            formatted: The dictionary of column name and list of formatted values
+        """
+
+        formatted = dict()
+        for name, values in self.columns.items():
+            if name in self.ZERO_FILL_COLUMNS:
+                values = np.where(np.isnan(values), 0, values)
+
+            if name in self.PERCENT_COLUMNS:
+                formatted[name] = ["{:.2%}".format(x) for x in values]
+            elif name in self.INTEGER_COLUMNS:
+                formatted[name] = values.astype(np.int64).tolist()
+            else:
+                formatted[name] = np.round(values, 2).tolist()
+
+        return formatted
+
+    def items(self, reverse=False):
+        """
+        Generate the formatted (date, row) pairs used by the templates
+
+        Parameters:
+            reverse: True to start from the most recent date
+
+        Returns:
+            rows: The generator of the date string and dictionary of formatted values
+        """
+
+        formatted = self._formatted_columns()
+        dates = np.datetime_as_string(self.dates, unit='D').tolist()
+        names = list(formatted)
+
+        indexes = range(len(dates) - 1, -1, -1) if reverse else range(len(dates))
+        for idx in indexes:
+            yield dates[idx], {name: formatted[name][idx] for name in names}
+
+    def to_csv(self):
+        """
+        Serialize the formatted rows to csv
+
+        Returns:
+            csv_data: The csv string with a Date column followed by every indicator
+        """
+
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Date'] + list(self.columns))
+        for date, row in self.items():
+            writer.writerow([date] + list(row.values()))
+
+        return output.getvalue()
+
+    def to_json(self):
+        """
+        Serialize the unrounded columns to json, NaN values as null
+
+        Returns:
+            json_data: The json string with the dates and one list per column
+        """
+
+        output = {'Date': np.datetime_as_string(self.dates, unit='D').tolist()}
+        for name, values in self.columns.items():
+            output[name] = [None if np.isnan(x) else x for x in values.tolist()]
+
+        return json.dumps(output)
@@ -1,9 +1,19 @@
 import numpy as np
 import pandas as pd
-import datetime
 import time
 import concurrent.futures
 
+from stockdashboard.signals.eod_arrays import PRICE_COLUMNS, eod_to_arrays
+from stockdashboard.signals.indicator_result import IndicatorResult
+from stockdashboard.signals.indicator_registry import register_indicator, compute_indicators
+from stockdashboard.signals.benchmark_analytics import benchmark_store
+
+EMA_INDICATORS = ['EMA_5', 'EMA_21', 'EMA_63', 'EMA_126', 'EMA_252']
+
+TECHNICAL_INDICATORS = ['ATR'] + EMA_INDICATORS + ['RSI', 'BB_20MA', 'BB_UpperBands', 'BB_LowerBands', 
+                                                  'MACD', 'Signal_Line', 'MACD_Histogram', 
+                                                  'SP500ROLL_CORR', 'Daily Movement EMA']
+
 def clean_data(ticker_eod):
     """
     Get the ticker end of day data and clean the data
@@ -12,155 +22,246 @@ def clean_data(ticker_eod):
         ticker_eod: The end of day data for the ticker 
          
     Returns:
-        cleaned_data: The cleaned data returned in a pandas dataframe
+        cleaned_data: The cleaned data returned in a pandas dataframe, indexed by date 
+                      (datetime64) with float64 columns, the dates are only formatted 
+                      as strings when rendered
     """
     
-    eod_data = [x for x in ticker_eod]
+    # today's bar is dropped, it is not complete
+    dates, prices = eod_to_arrays(ticker_eod)
     
-    # ticker dataframer
+    # ticker dataframe
     #"Date", "Open", "High", "Low", "Close", "Volume", "AdjClose"
-    cleaned_data = pd.DataFrame(eod_data, columns = ["Date", "Open", "High", "Low", "Close", "Volume", "AdjClose"])
-    cleaned_data['Date'] = cleaned_data['Date'].apply(lambda d: d.strftime(r'%Y-%m-%d'))
-    cleaned_data.set_index('Date', inplace=True)
-    cleaned_data = cleaned_data.apply(pd.to_numeric, errors="ignore")
-    
-    # last day calculation 
-    last_day_in_df = cleaned_data.tail(1).index.item()
-    
-    if(last_day_in_df >= datetime.date.today().strftime("%Y-%m-%d")):
-        cleaned_data.drop(cleaned_data.tail(1).index,inplace=True) 
+    cleaned_data = pd.DataFrame(prices, index=pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='Date'), columns=PRICE_COLUMNS)
     
     return cleaned_data
     
 
-def atr_calculation(eod_df):
+def _linear_recurrence(decay, values):
     """
-    Calculate the average true range (atr) for the ticker 
+    Solve the first order recurrence y[k] = decay[k] * y[k-1] + values[k] along 
+    the first axis, with y[-1] = 0, using a log-step prefix scan instead of a 
+    python loop 
     
     Parameters:
-        eod_df: The pandas dataframe with the eod data 
+        decay: The multiplier applied to the previous output at every row
+        values: The value added at every row, 1-D or 2-D (one column per series)
          
     Returns:
-        atr_data: The pandas column with the atr calculated data
+        output: The numpy array of the solved recurrence 
     """
     
-    # copy the dataframe 
-    ticker_df = eod_df.copy()
-    
-    # ATR CALCULATIONS 
-    # ^formula --> Current ATR = [(Prior ATR x 13) + Current TR] / 14
-    ticker_df['CH_PC'] = np.abs(np.subtract(ticker_df['High'], ticker_df['Close'].shift(1)))  # current high - previous close 
-    ticker_df['CL_PC'] = np.abs(np.subtract(ticker_df['Low'], ticker_df['Close'].shift(1)))  # current low - previous close 
-    ticker_df['CH_CL'] = np.abs(np.subtract(ticker_df['High'], ticker_df['Low']))  # current high - current low
-    ticker_df['TR'] = ticker_df[['CH_PC', 'CL_PC', 'CH_CL']].max(axis=1)
-    ticker_df['TR'] = ticker_df['TR'].round(4)
-    
-    ticker_df['TEMP_ATR'] = ticker_df['TR'].rolling(14).mean()           
+    output = np.array(values, dtype=float)
+    multiplier = np.array(np.broadcast_to(decay, output.shape), dtype=float)
     
-    atr = ticker_df['TEMP_ATR'].values
-    tr = ticker_df['TR'].values
-    atr_data = [0] * len(atr)
-    
-    for x in range(len(atr)):
-        if x < 14:
-            atr_data[x] = atr[x]
-        else:
-            atr_data[x] = ((atr[x-1] * 13) + tr[x]) / 14
-            atr[x] = atr_data[x]
-    
-    return atr_data
+    # every pass folds in the rows "shift" positions back, doubling the span covered
+    shift = 1
+    while shift < len(output):
+        output[shift:] = output[shift:] + multiplier[shift:] * output[:-shift]
+        multiplier[shift:] = multiplier[shift:] * multiplier[:-shift]
+        shift *= 2
     
+    return output
 
-def exponential_moving_average_calculation(eod_df):
+
+def wilder_smoothing(values, period=14):
     """
-    Calculate the exponential moving average (ema) for the ticker 
+    Calculate Wilder's moving average of the values (the smoothing used by ATR and RSI)
     
     Parameters:
-        eod_df: The pandas dataframe with the eod data 
+        values: The 1-D (or 2-D, one column per series) array of values to smooth
+        period: The smoothing period 
          
     Returns:
-        ema_data: The pandas column with the ema calculated data
+        smoothed: The numpy array of smoothed values, NaN until the first full period
     """
     
-    # copy the dataframe 
-    ticker_df = eod_df.copy()
+    # ^formula --> First Average = Sum of the first period values / period 
+    #              Current Average = [(Prior Average x (period - 1)) + Current Value] / period
+    values = np.asarray(values, dtype=float)
+    smoothed = np.full(values.shape, np.nan)
     
-    # EXPONENTIAL MOVING AVERAGE 
-    ticker_df['EMA_5'] = ticker_df['Close'].ewm(span=5,adjust=False).mean()  # daily
-    ticker_df['EMA_21'] = ticker_df['Close'].ewm(span=21,adjust=False).mean()  # one month
-    ticker_df['EMA_63'] = ticker_df['Close'].ewm(span=63,adjust=False).mean()  # three month 
-    ticker_df['EMA_126'] = ticker_df['Close'].ewm(span=126,adjust=False).mean()  # six month 
-    ticker_df['EMA_252'] = ticker_df['Close'].ewm(span=252,adjust=False).mean()  # year 
+    if len(values) < period:
+        return smoothed
     
-    ema_data = ticker_df[['EMA_5','EMA_21','EMA_63','EMA_126','EMA_252']]
+    increments = values[period-1:] / period
+    increments[0] = values[:period].mean(axis=0)
+    decay = np.full(increments.shape, (period - 1) / period)
+    decay[0] = 0
     
-    return ema_data
+    smoothed[period-1:] = _linear_recurrence(decay, increments)
+    
+    return smoothed
     
 
-def rsi_calculation(eod_df):
+def _like(template, values):
     """
-    Calculate the relative strength index (rsi) for the ticker 
+    Wrap the values with the index (and the columns) of the template, the registered 
+    indicators get a pandas series for one ticker or a dataframe of one column per ticker 
+    from the batch calculation 
     
     Parameters:
-        eod_df: The pandas dataframe with the eod data 
+        template: The pandas series or dataframe
+        values: The numpy array of the same shape
          
     Returns:
-        rsi_data: The pandas column with the rsi calculated data
+        output: The pandas series or dataframe of the values
     """
     
-    # copy the dataframe 
-    ticker_df = eod_df.copy()
+    if isinstance(template, pd.DataFrame):
+        return pd.DataFrame(values, index=template.index, columns=template.columns)
     
-    # RSI CALCULATIONS 
-    ticker_df['Advance'] = np.where((ticker_df['Close'] >= ticker_df['Close'].shift(1)), (ticker_df['Close'] - ticker_df['Close'].shift(1)), 0)
-    ticker_df['Decline'] = np.where((ticker_df['Close'] <= ticker_df['Close'].shift(1)), (ticker_df['Close'] - ticker_df['Close'].shift(1)), 0)
+    return pd.Series(values, index=template.index)
+
+
+# REGISTERED INDICATORS 
+# each indicator declares the values it needs, see indicator_registry.compute_indicators, 
+# and works column-wise so the batch calculation runs it over many tickers at once
+
+@register_indicator(inputs=['Close'], outputs=['Previous_Close'])
+def _previous_close(close):
+    return close.shift(1)
+
+
+@register_indicator(inputs=['Close', 'Previous_Close'], outputs=['Close_Diff'])
+def _close_diff(close, previous_close):
     # ^formula --> Current Close - Prev. Close 
+    return close - previous_close
+
+
+@register_indicator(inputs=['High', 'Low', 'Previous_Close'], outputs=['TR'])
+def _true_range(high, low, previous_close):
+    # the largest of the ranges, ignoring the missing previous close of the first bar 
+    return np.fmax(np.fmax(np.abs(high - previous_close),  # current high - previous close 
+                           np.abs(low - previous_close)),  # current low - previous close 
+                   np.abs(high - low)).round(4)  # current high - current low
+
+
+@register_indicator(inputs=['TR'], outputs=['ATR'])
+def _average_true_range(true_range):
+    # ^formula --> Current ATR = [(Prior ATR x 13) + Current TR] / 14
+    return _like(true_range, wilder_smoothing(true_range.values, 14))
+
+
+def _exponential_moving_average(span):
+    def _ema(close):
+        return close.ewm(span=span, adjust=False).mean()
     
-    ticker_df['Advance'] = ticker_df['Advance'].abs()
-    ticker_df['Decline'] = ticker_df['Decline'].abs()
+    _ema.__name__ = f'_ema_{span}'
+    return _ema
+
+
+# daily, (macd), one month, (macd), three month, six month, year 
+for ema_span in (5, 12, 21, 26, 63, 126, 252):
+    register_indicator(inputs=['Close'], outputs=[f'EMA_{ema_span}'])(_exponential_moving_average(ema_span))
+
+
+@register_indicator(inputs=['Close_Diff'], outputs=['RSI'])
+def _relative_strength_index(close_diff):
+    advance = _like(close_diff, np.where(close_diff >= 0, close_diff, 0))
+    decline = _like(close_diff, np.where(close_diff <= 0, close_diff, 0)).abs()
     
-    ticker_df['Average_Advance'] = 0
-    ticker_df = ticker_df[ticker_df['Average_Advance'].notnull()].copy()
-    ticker_df.loc[13:14, 'Average_Advance'] = pd.Series(ticker_df['Advance']).rolling(window=14).mean()
     # ^formula --> First Average Gain = Sum of Gains over the past 14 periods / 14
+    #             Average Gain = [(Prior Average Gain x 13) + Current Gain] / 14
+    relative_strength = wilder_smoothing(advance.values, 14) / _like(close_diff, wilder_smoothing(decline.values, 14))
+    return 100 - (100 / (1 + relative_strength))
+
+
+@register_indicator(inputs=['Close'], outputs=['BB_20MA', 'BB_UpperBands', 'BB_LowerBands'])
+def _bollinger_bands(close):
+    bb_ma = close.rolling(window=20).mean()
+    bb_std = close.rolling(window=20).std(ddof=0)  # population
+    return bb_ma, bb_ma + (bb_std * 2), bb_ma - (bb_std * 2)
+
+
+@register_indicator(inputs=['EMA_12', 'EMA_26'], outputs=['MACD'])
+def _macd(ema_12, ema_26):
+    return ema_12 - ema_26
+
+
+@register_indicator(inputs=['MACD'], outputs=['Signal_Line'])
+def _macd_signal_line(macd):
+    return macd.ewm(span=9, adjust=False).mean()
+
+
+@register_indicator(inputs=['MACD', 'Signal_Line'], outputs=['MACD_Histogram'])
+def _macd_histogram(macd, signal_line):
+    return macd - signal_line
+
+
+@register_indicator(inputs=['SP500_EOD'], outputs=['SP500_Close'])
+def _sp500_close(sp500_data):
+    # cleaned once and shared until the S&P 500 data changes
+    return benchmark_store.get('S&P 500', sp500_data).series
+
+
+@register_indicator(inputs=['Close', 'SP500_Close'], outputs=['SP500ROLL_CORR'])
+def _sp500_correlation(close, sp500_close):
+    # rolling window over the S&P 500 dates from the first ticker date 
+    sp500_close = sp500_close.loc[close.index[0]:]
+    correlation = sp500_close.rolling(window=5).corr(other=close.reindex(sp500_close.index))  # 5 Day Correlation
+    return correlation.reindex(close.index)
+
+
+@register_indicator(inputs=['High', 'Low'], outputs=['Daily Movement EMA'])
+def _daily_movement_ema(high, low):
+    return (high - low).ewm(span=10, adjust=False).mean()
+
+
+def _price_inputs(eod_df):
+    """
+    Get the price columns of the eod data as indicator inputs 
     
-    average_advance = ticker_df['Average_Advance'].values
-    advance = ticker_df['Advance'].values
-    final_average_advance = [0] * len(average_advance)
-    
-    for x in range(len(average_advance)):
-        if x < 14:
-            final_average_advance[x] = average_advance[x]
-        else:
-            final_average_advance[x] = ((average_advance[x-1] * 13) + advance[x]) / 14
-            average_advance[x] = final_average_advance[x]
+    Parameters:
+        eod_df: The pandas dataframe with the eod data 
+         
+    Returns:
+        inputs: The dictionary of column name and pandas column
+    """
     
-    ticker_df = ticker_df.assign(Final_Average_Advance=final_average_advance)
+    return {column: eod_df[column] for column in eod_df.columns}
+
+
+def atr_calculation(eod_df):
+    """
+    Calculate the average true range (atr) for the ticker 
     
-    ticker_df['Average_Decline'] = 0
-    ticker_df = ticker_df[ticker_df['Average_Decline'].notnull()].copy()
-    ticker_df.loc[13:14, 'Average_Decline'] = pd.Series(ticker_df['Decline']).rolling(window=14).mean()
+    Parameters:
+        eod_df: The pandas dataframe with the eod data 
+         
+    Returns:
+        atr_data: The numpy array with the atr calculated data
+    """
     
-    average_decline = ticker_df['Average_Decline'].values
-    decline = ticker_df['Decline'].values
-    final_average_decline = [0] * len(average_decline)
+    return compute_indicators(_price_inputs(eod_df), ['ATR'])['ATR'].values
     
-    for x in range(len(average_decline)):
-        if x < 14:
-            final_average_decline[x] = average_decline[x]
-        else:
-            final_average_decline[x] = ((average_decline[x-1] * 13) + decline[x]) / 14
-            average_decline[x] = final_average_decline[x]
+
+def exponential_moving_average_calculation(eod_df):
+    """
+    Calculate the exponential moving average (ema) for the ticker 
     
+    Parameters:
+        eod_df: The pandas dataframe with the eod data 
+         
+    Returns:
+        ema_data: The pandas columns with the ema calculated data
+    """
     
-    ticker_df = ticker_df.assign(Final_Average_Decline=final_average_decline)
+    return pd.DataFrame(compute_indicators(_price_inputs(eod_df), EMA_INDICATORS))
     
-    ticker_df['RS'] = ticker_df['Final_Average_Advance'] / ticker_df['Final_Average_Decline']
-    ticker_df['RSI'] = 100 - (100 / (1 + ticker_df['RS']))
+
+def rsi_calculation(eod_df):
+    """
+    Calculate the relative strength index (rsi) for the ticker 
     
-    rsi_data = ticker_df[['RSI']]
+    Parameters:
+        eod_df: The pandas dataframe with the eod data 
+         
+    Returns:
+        rsi_data: The pandas column with the rsi calculated data
+    """
     
-    return rsi_data
+    return pd.DataFrame(compute_indicators(_price_inputs(eod_df), ['RSI']))
     
 
 def bollinger_bands_calculation(eod_df):
@@ -171,21 +272,10 @@ def bollinger_bands_calculation(eod_df):
         eod_df: The pandas dataframe with the eod data 
          
     Returns:
-        bb_data: The pandas column with the bollinger bands calculated data
+        bb_data: The pandas columns with the bollinger bands calculated data
     """
     
-    # copy the dataframe 
-    ticker_df = eod_df.copy()
-    
-    # BOLLINGER BANDS
-    ticker_df['BB_20MA'] = ticker_df['Close'].rolling(window=20).mean()
-    ticker_df['20STD'] = ticker_df['Close'].rolling(window=20).std(ddof=0)  # population
-    ticker_df['BB_UpperBands'] = ticker_df['BB_20MA'] + (ticker_df['20STD'] * 2)
-    ticker_df['BB_LowerBands'] = ticker_df['BB_20MA'] - (ticker_df['20STD'] * 2)
-    
-    bb_data = ticker_df[['BB_20MA', 'BB_UpperBands','BB_LowerBands']]
-    
-    return bb_data
+    return pd.DataFrame(compute_indicators(_price_inputs(eod_df), ['BB_20MA', 'BB_UpperBands', 'BB_LowerBands']))
     
 
 def macd_calculation(eod_df):
@@ -196,24 +286,10 @@ def macd_calculation(eod_df):
         eod_df: The pandas dataframe with the eod data 
          
     Returns:
-        macd_data: The pandas column with the macd calculated data
+        macd_data: The pandas columns with the macd calculated data
     """
     
-    # copy the dataframe 
-    ticker_df = eod_df.copy()
-    
-    # MACD 
-    ticker_df['MACD_12EMA'] = ticker_df['Close'].ewm(span=12,adjust=False).mean()
-    ticker_df['MACD_26EMA'] = ticker_df['Close'].ewm(span=26,adjust=False).mean()
-    ticker_df['MACD'] = ticker_df['MACD_12EMA'] - ticker_df['MACD_26EMA'] 
-    ticker_df['Signal_Line'] = ticker_df['MACD'].ewm(span=9,adjust=False).mean() 
-    ticker_df['MACD_Histogram'] = ticker_df['MACD'] - ticker_df['Signal_Line']
-    ticker_df['MACDHist_POSorNEG'] = np.where((ticker_df['MACD_Histogram'] >= 0), 'POSITIVE', 'NEGATIVE')
-    ticker_df['MACD_Change'] = np.where((ticker_df['MACDHist_POSorNEG'].eq(ticker_df['MACDHist_POSorNEG'].shift())), False, True)  # to see if the hist changes from positive to negative 
-    
-    macd_data = ticker_df[['MACD','Signal_Line','MACD_Histogram']]
-    
-    return macd_data
+    return pd.DataFrame(compute_indicators(_price_inputs(eod_df), ['MACD', 'Signal_Line', 'MACD_Histogram']))
     
     
 def correlation_coefficient_calculation(eod_df, sp500_data):
@@ -227,28 +303,11 @@ def correlation_coefficient_calculation(eod_df, sp500_data):
     Returns:
         cc_data: The pandas column with the correlation coefficient calculated data 
     """
-        
-    # copy the dataframe 
-    ticker_df = eod_df.copy()
-    
-    # get the S&P 500 dataframe 
-    df_SP500 = clean_data(sp500_data)
-    
-   
-    # CORRELATION COEFFICIENT        
-    ticker_df['TickerClose'] = ticker_df['Close']
-    TickerStart = ticker_df.index[0]
-           
-    main_df = df_SP500.loc[TickerStart:].join(ticker_df['TickerClose'])
-         
-    x = main_df['Close']
-    y = main_df['TickerClose']
-               
-    main_df['SP500ROLL_CORR'] = x.rolling(window=5).corr(other=y) #5 Day Correlation
     
-    cc_data = main_df[['SP500ROLL_CORR']]
+    inputs = _price_inputs(eod_df)
+    inputs['SP500_EOD'] = sp500_data
     
-    return cc_data
+    return pd.DataFrame(compute_indicators(inputs, ['SP500ROLL_CORR']))
        
        
 def daily_movements_calculation(eod_df):
@@ -263,74 +322,32 @@ def daily_movements_calculation(eod_df):
         daily_movements_data: The pandas column with the daily movements calculated data
     """
     
-    # copy the dataframe 
-    ticker_df = eod_df.copy()
-    
-    # FIND THE DAILY MOVEMENTS (USING EXPONENTIAL MOVING AVERAGE)
-    ticker_df['Daily Movement'] = ticker_df['High'] - ticker_df['Low']
-    ticker_df['Daily Movement EMA'] = ticker_df['Daily Movement'].ewm(span=10,adjust=False).mean() 
-    
-    daily_movements_data = ticker_df[['Daily Movement EMA']]
-    
-    return daily_movements_data
+    return pd.DataFrame(compute_indicators(_price_inputs(eod_df), ['Daily Movement EMA']))
 
 
-def get_techical_indicators(ticker_data, sp500_data):
+def get_techical_indicators(ticker_data, sp500_data, indicators=TECHNICAL_INDICATORS):
     """
-    Calculate various techincal indicators for a stock   
+    Calculate various techincal indicators for a stock, only the requested indicators 
+    and what they depend on are calculated
     
     Parameters:
         ticker_data: The end of day data for the ticker
         sp500_data: The end of day data for S&P 500
+        indicators: The names of the registered indicators to calculate, all by default
          
     Returns:
-        df: The pandas dataframe with the calculated technical indicators
+        output: The IndicatorResult with the price data and calculated technical indicators
     """
     
-    #pd.set_option('display.max_columns', None)
-    
     # clean the data
     df = clean_data(ticker_data)
     
-    # average true range calculation 
-    atr_calculated_data = atr_calculation(df)
-    df = df.assign(ATR=atr_calculated_data)
-    df['ATR'] = pd.to_numeric(df['ATR'],errors='coerce').fillna(0)
-    
-    # exponential moving average calculation
-    ema_calculated_data = exponential_moving_average_calculation(df)
-    df = df.join(ema_calculated_data)
+    inputs = _price_inputs(df)
+    inputs['SP500_EOD'] = sp500_data
     
-    # relative strength index calculation 
-    rsi_calculated_data = rsi_calculation(df)
-    df = df.join(rsi_calculated_data)
-    df['RSI'] = pd.to_numeric(df['RSI'],errors='coerce').fillna(0)
+    columns = {column: df[column] for column in PRICE_COLUMNS}
+    columns.update(compute_indicators(inputs, indicators))
     
-    # bollinger bands calculation 
-    bb_calculated_data = bollinger_bands_calculation(df)
-    df = df.join(bb_calculated_data)
-    df['BB_20MA'] = pd.to_numeric(df['BB_20MA'],errors='coerce').fillna(0)
-    df['BB_UpperBands'] = pd.to_numeric(df['BB_UpperBands'],errors='coerce').fillna(0)
-    df['BB_LowerBands'] = pd.to_numeric(df['BB_LowerBands'],errors='coerce').fillna(0)
-    
-    # moving average convergence divergence
-    macd_data = macd_calculation(df)
-    df = df.join(macd_data)
-    
-    # correlation coefficient calculation 
-    cc_data = correlation_coefficient_calculation(df, sp500_data)
-    df = df.join(cc_data)
-    df['SP500ROLL_CORR'] = pd.to_numeric(df['SP500ROLL_CORR'], errors='coerce').fillna(0).map("{:.2%}".format)
-    
-    # daily movements calculation
-    dm_data = daily_movements_calculation(df)
-    df = df.join(dm_data)
-    
-    # rounding of the data 
-    df = df.round(2)
-
-    df.to_csv('test.csv')
-
-    output = df.to_dict('index')
+    output = IndicatorResult(df.index.values.astype('datetime64[D]'), columns)
 
     return output
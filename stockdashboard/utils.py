@@ -1,5 +1,12 @@
+import re
 import json
 import ast
+import hashlib
+import unicodedata
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# the query parameters tracking the reader, the same article is linked with different values 
+TRACKING_PARAMETERS = re.compile(r'^(utm_.*|fbclid|gclid|ocid|cmpid|mod|guccounter)$', re.IGNORECASE)
 
 def search_bar_data():
   """
@@ -17,3 +24,53 @@ def search_bar_data():
   search_bar = json.dumps(search_bar)
   return search_bar
 
+
+
+def normalize_news_header(header):
+  """
+  Normalize a news header, the same header scraped with another case, spacing or unicode form 
+  gets the same hash 
+
+  Parameters:
+      header: the header of the news article 
+
+  Returns:
+      header: the normalized header 
+  """
+
+  return ' '.join(unicodedata.normalize('NFKC', header or '').casefold().split())
+
+
+def normalize_news_link(link):
+  """
+  Normalize a news link, the scheme, the www. prefix, the fragment, the trailing slash and the 
+  tracking parameters of the query string are dropped 
+
+  Parameters:
+      link: the link of the news article 
+
+  Returns:
+      link: the normalized link 
+  """
+
+  parts = urlsplit((link or '').strip())
+  host = parts.netloc.lower()
+  if host.startswith('www.'):
+    host = host[len('www.'):]
+  query = urlencode([(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMETERS.match(key)])
+
+  return urlunsplit(('', host, parts.path.rstrip('/'), query, ''))
+
+
+def news_hash(text):
+  """
+  Hash a normalized news header or link, the hashes are the indexed dedup keys of the news table 
+
+  Parameters:
+      text: the normalized header or link 
+
+  Returns:
+      hash: the 40 characters hex digest 
+  """
+
+  return hashlib.sha1(text.encode('utf-8')).hexdigest()